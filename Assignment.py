@@ -0,0 +1,157 @@
+"""
+Optimal one-to-one assignment (Hungarian algorithm) for batching robot tasks.
+
+solve_assignment takes a rows x cols cost matrix and returns the (row, col) pairs of a minimum-cost
+matching covering min(rows, cols) pairs. It is the shortest augmenting path form of the Hungarian
+algorithm with row/column potentials, O(n^2 m); the scan over columns in each augmentation step is
+vectorized with NumPy, so a few hundred robots and packages solve in milliseconds.
+
+Pairs that must never be matched (e.g. a package a robot cannot reach) are given cost FORBIDDEN and
+are dropped from the result.
+
+IncrementalAssignment re-solves a matching whose rows, columns and costs change over time (robots
+and packages come and go, robots move) without starting from scratch. It keeps the column potentials
+and the matching between calls, lowers or raises row potentials just enough to stay dual feasible
+under the new costs, drops the matched pairs that are no longer tight, and runs augmentations only
+for the rows left unmatched. When only a few robots or packages change, only a few augment.
+"""
+
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+
+FORBIDDEN = 1e9
+
+
+def solve_assignment(cost) -> List[Tuple[int, int]]:
+    """Minimum-cost matching of rows to columns; each row and column is used at most once."""
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.ndim != 2:
+        raise ValueError("cost must be a 2-D matrix")
+    if cost.size == 0:
+        return []
+    transposed = cost.shape[0] > cost.shape[1]
+    a = cost.T if transposed else cost
+    n, m = a.shape
+
+    # 1-based potentials and matching as in the textbook formulation; column 0 is a virtual start
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=np.int64)  # match[j]: row assigned to column j (0 = none)
+    for i in range(1, n + 1):
+        _augment(a, u, v, match, i)
+
+    pairs = []
+    for j in range(1, m + 1):
+        if match[j]:
+            row, col = int(match[j]) - 1, j - 1
+            if a[row, col] < FORBIDDEN:
+                pairs.append((col, row) if transposed else (row, col))
+    pairs.sort()
+    return pairs
+
+
+def _augment(a: np.ndarray, u: np.ndarray, v: np.ndarray, match: np.ndarray, i: int) -> None:
+    """
+    Match the unmatched row i along a shortest augmenting path, updating the potentials. Needs
+    n <= m, dual feasibility (a[i - 1, j - 1] >= u[i] + v[j]), tight matched pairs and v[j] == 0
+    for every unmatched column j.
+    """
+    m = a.shape[1]
+    way = np.zeros(m + 1, dtype=np.int64)
+    match[0] = i
+    j0 = 0
+    min_v = np.full(m + 1, np.inf)
+    used = np.zeros(m + 1, dtype=bool)
+    while True:
+        used[j0] = True
+        i0 = match[j0]
+        unused = ~used[1:]
+        reduced = a[i0 - 1] - u[i0] - v[1:]
+        better = unused & (reduced < min_v[1:])
+        min_v[1:][better] = reduced[better]
+        way[1:][better] = j0
+        candidates = np.where(unused, min_v[1:], np.inf)
+        j1 = int(np.argmin(candidates)) + 1
+        delta = candidates[j1 - 1]
+        u[match[used]] += delta
+        v[used] -= delta
+        min_v[~used] -= delta
+        j0 = j1
+        if match[j0] == 0:
+            break
+    # Flip the augmenting path
+    while j0:
+        j1 = way[j0]
+        match[j0] = match[j1]
+        j0 = j1
+    match[0] = 0
+
+
+class IncrementalAssignment:
+    """
+    Minimum-cost matching of keyed rows to keyed columns, re-solved from the previous call's
+    potentials and matching. Keys must be stable for the lifetime of what they name (e.g. robot and
+    package ids, not id() of objects that may be freed).
+    """
+
+    # Reduced costs below this count as zero (costs are path lengths, so exact in practice)
+    TOLERANCE = 1e-9
+
+    def __init__(self):
+        self._v: Dict[Hashable, float] = {}  # column key -> potential
+        self._match: Dict[Hashable, Hashable] = {}  # column key -> row key
+        # Rows that had to augment in the last solve (a measure of the work done)
+        self.augmented = 0
+
+    def solve(self, rows: Sequence[Hashable], cols: Sequence[Hashable], cost) -> Dict[Hashable, Hashable]:
+        """
+        Row key -> column key of a minimum-cost matching for the current costs (rows x cols).
+        Pairs of cost FORBIDDEN are left out, as are the rows that get no column.
+        """
+        cost = np.asarray(cost, dtype=np.float64).reshape(len(rows), len(cols))
+        n = len(rows)
+        if n == 0 or len(cols) == 0:
+            self._v, self._match = {}, {}
+            self.augmented = 0
+            return {}
+        cols = list(cols)
+        real = len(cols)
+        if n > real:
+            # Rows beyond the number of columns go to zero-cost placeholder columns (left unmatched)
+            cols += [(IncrementalAssignment, k) for k in range(n - real)]
+            cost = np.hstack([cost, np.zeros((n, n - real))])
+        m = len(cols)
+
+        row_index = {row: i + 1 for i, row in enumerate(rows)}
+        v = np.zeros(m + 1)
+        match = np.zeros(m + 1, dtype=np.int64)
+        for j, col in enumerate(cols, start=1):
+            row = self._match.get(col)
+            if row in row_index:
+                # Columns whose row is gone are freed with potential 0, like columns never matched
+                match[j] = row_index[row]
+                v[j] = self._v[col]
+
+        # Tightest feasible row potentials for the new costs; pairs that are no longer tight are
+        # unmatched, and freeing their columns (potential back to 0) can loosen other pairs in turn
+        u = np.zeros(n + 1)
+        while True:
+            u[1:] = (cost - v[1:]).min(axis=1)
+            matched = np.flatnonzero(match[1:]) + 1
+            slack = cost[match[matched] - 1, matched - 1] - u[match[matched]] - v[matched]
+            loose = matched[slack > self.TOLERANCE]
+            if len(loose) == 0:
+                break
+            match[loose] = 0
+            v[loose] = 0
+
+        unmatched = sorted(set(range(1, n + 1)) - set(match[1:].tolist()))
+        for i in unmatched:
+            _augment(cost, u, v, match, i)
+        self.augmented = len(unmatched)
+
+        self._v = {col: float(v[j]) for j, col in enumerate(cols, start=1)}
+        self._match = {col: rows[match[j] - 1] for j, col in enumerate(cols, start=1) if match[j]}
+        return {rows[match[j] - 1]: cols[j - 1] for j in range(1, real + 1)
+                if match[j] and cost[match[j] - 1, j - 1] < FORBIDDEN}
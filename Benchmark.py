@@ -0,0 +1,280 @@
+"""
+Throughput and scaling benchmarks for the warehouse simulation (Warehouse_Test.py).
+
+Runs WarehouseSimulation headless for every combination of robot count and grid size and reports,
+per scenario:
+    ticks_per_second        simulation speed
+    planner_calls_per_tick  path searches per tick (see WarehouseSimulation.planner_calls)
+    p50_tick_ms, p99_tick_ms  tick latency percentiles
+    peak_memory_bytes       peak Python allocation while building and running a short copy of the scenario
+    deliveries_per_10k_ticks  packages delivered, normalized to 10,000 ticks
+It also times raw find_path queries (BFS, A*, JPS, HPA*, coarse-to-fine) per grid size, so planner regressions show up on
+their own. Results are written as JSON; --baseline compares against a stored result file and exits
+with status 1 if any metric regressed by more than --tolerance. Each floor's Map_Format content hash
+is stored with the results, and scenarios whose floor changed since the baseline are not compared.
+
+The warehouse floors are rows of shelves with cross aisles (connected by construction) and delivery
+zones along the top wall, or with --layout generated, seeded Map_Generator maps (20% obstacles,
+scattered delivery zones). With --stack-deliveries delivered packages are set down in the delivery
+zones as obstacles until the next batch, so the floor changes while robots plan (the case the
+"incremental" planning mode repairs plans for). Robots and packages are drawn from a random.Random(seed) owned by the
+scenario, so runs are repeatable without touching the global random state. Robot counts that would
+fill more than half a floor's free cells are reported as skipped and listed under "skipped".
+
+Usage:
+    python Benchmark.py [--robots 2 10 100 1000] [--sizes 32 64 128] [--ticks 1000] [--output bench.json]
+                        [--layout shelves|generated] [--stack-deliveries] [--baseline bench.json] [--tolerance 0.1]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Warehouse_Test imports pygame; keep its banner out of the report
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import Warehouse_Test
+from Grid import FREE, Grid
+from Map_Format import content_hash
+from Map_Generator import generate_map
+from Grid_Pyramid import GridPyramid
+from Hierarchical_Planner import HierarchicalPlanner
+from Path_Planner import GridPlanner
+
+Metrics = Dict[str, float]
+
+# Whether a larger value of each metric is better, for the baseline comparison
+HIGHER_IS_BETTER = {
+    "ticks_per_second": True,
+    "planner_calls_per_tick": False,
+    "p50_tick_ms": False,
+    "p99_tick_ms": False,
+    "peak_memory_bytes": False,
+    "deliveries_per_10k_ticks": True,
+    "queries_per_second": True,
+}
+
+LAYOUTS = ("shelves", "generated")
+
+# Result groups that hold metrics (the others are "skipped" and "config")
+METRIC_GROUPS = ("simulation", "find_path")
+
+# Ticks run under tracemalloc, which slows allocation down too much for the timed run
+MEMORY_TICKS = 100
+
+
+def warehouse_floor(size: int) -> Tuple[Grid, List[Tuple[int, int, int, int]]]:
+    """
+    A size x size floor: shelf rows (every third row) broken by a cross aisle every sixth column, free
+    aisles in between, and 3x3 delivery zones along the top wall. Every free cell is connected.
+    """
+    grid = [[1 if r % 3 == 2 and c % 6 not in (0, 5) and 0 < r < size - 1 else 0 for c in range(size)]
+            for r in range(size)]
+    zones = []
+    for c in range(1, size - 3, max(4, size // 8)):
+        zone = (0, c, 2, c + 2)
+        for r in range(zone[0], zone[2] + 1):
+            for cc in range(zone[1], zone[3] + 1):
+                grid[r][cc] = 0
+        zones.append(zone)
+    return Grid.from_rows(grid), zones
+
+
+def generated_floor(size: int, seed: int) -> Tuple[Grid, List[Tuple[int, int, int, int]]]:
+    """A seeded size x size Map_Generator map with 20% obstacles and scattered 3x3 delivery zones."""
+    generated = generate_map(size, size, density=0.2, seed=seed, delivery_zones=max(1, min(8, size // 4)))
+    return generated.grid, generated.delivery_zones
+
+
+def floor(layout: str, size: int, seed: int) -> Tuple[Grid, List[Tuple[int, int, int, int]]]:
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}, expected one of {LAYOUTS}")
+    return generated_floor(size, seed) if layout == "generated" else warehouse_floor(size)
+
+
+def build_simulation(size: int, n_robots: int, seed: int, strategy: str, planning: str,
+                     layout: str = "shelves", stack_deliveries: bool = False) -> Warehouse_Test.WarehouseSimulation:
+    rng = random.Random(seed)
+    grid, zones = floor(layout, size, seed)
+    free = [(r, c) for r in range(size) for c in range(size) if grid[r][c] == 0]
+    robots = [Warehouse_Test.Robot(pos, zones[i % len(zones)]) for i, pos in enumerate(rng.sample(free, n_robots))]
+    packages = Warehouse_Test.generate_new_packages(grid, robots, n_robots, rng=rng)
+    return Warehouse_Test.WarehouseSimulation(grid, robots, packages, strategy=strategy, planning=planning,
+                                              stack_deliveries=stack_deliveries, batch_size=n_robots, rng=rng)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def run_scenario(size: int, n_robots: int, n_ticks: int, seed: int, strategy: str, planning: str,
+                 layout: str = "shelves", stack_deliveries: bool = False) -> Metrics:
+    """Time one scenario, then measure its peak memory in a separate short run."""
+    sim = build_simulation(size, n_robots, seed, strategy, planning, layout, stack_deliveries)
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(n_ticks):
+        tick_start = clock()
+        sim.step()
+        latencies.append(clock() - tick_start)
+    elapsed = clock() - start
+    latencies.sort()
+
+    tracemalloc.start()
+    memory_sim = build_simulation(size, n_robots, seed, strategy, planning, layout, stack_deliveries)
+    memory_sim.run(min(n_ticks, MEMORY_TICKS))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ticks_per_second": n_ticks / max(elapsed, 1e-9),
+        "planner_calls_per_tick": sim.planner_calls / n_ticks,
+        "p50_tick_ms": 1000 * percentile(latencies, 0.50),
+        "p99_tick_ms": 1000 * percentile(latencies, 0.99),
+        "peak_memory_bytes": peak,
+        "deliveries_per_10k_ticks": len(sim.delivered_packages) * 10000 / n_ticks,
+    }
+
+
+def run_path_queries(size: int, n_queries: int, seed: int, layout: str = "shelves") -> Dict[str, Metrics]:
+    """Random start/goal queries on the floor for find_path, each GridPlanner method, HPA* and the pyramid."""
+    rng = random.Random(seed)
+    grid, _ = floor(layout, size, seed)
+    free = [(r, c) for r in range(size) for c in range(size) if grid[r][c] == 0]
+    queries = [(rng.choice(free), rng.choice(free)) for _ in range(n_queries)]
+    results = {}
+    start = time.perf_counter()
+    for a, b in queries:
+        Warehouse_Test.find_path(grid, a, b)
+    results["bfs"] = {"queries_per_second": n_queries / max(time.perf_counter() - start, 1e-9)}
+    planner = GridPlanner(grid)
+    for method in ("astar", "jps"):
+        start = time.perf_counter()
+        for a, b in queries:
+            planner.find_path(a, b, method)
+        results[method] = {"queries_per_second": n_queries / max(time.perf_counter() - start, 1e-9)}
+    # Cluster edges are built on first use; warm the planner up on other queries before timing it
+    hierarchical = HierarchicalPlanner(grid)
+    for _ in range(n_queries):
+        hierarchical.find_path(rng.choice(free), rng.choice(free))
+    start = time.perf_counter()
+    for a, b in queries:
+        hierarchical.find_path(a, b)
+    results["hpa"] = {"queries_per_second": n_queries / max(time.perf_counter() - start, 1e-9)}
+    pyramid = GridPyramid(grid)
+    start = time.perf_counter()
+    for a, b in queries:
+        pyramid.find_path(a, b)
+    results["pyramid"] = {"queries_per_second": n_queries / max(time.perf_counter() - start, 1e-9)}
+    return results
+
+
+def run_benchmarks(robot_counts: List[int], sizes: List[int], n_ticks: int, seed: int, strategy: str,
+                   planning: str, n_queries: int, layout: str = "shelves",
+                   stack_deliveries: bool = False) -> Dict[str, Dict]:
+    """
+    Metrics per scenario under "simulation" and "find_path". Robot counts that would fill more than
+    half of a floor's free cells are not run; they are listed under "skipped" with the reason.
+    """
+    results: Dict[str, Dict] = {"simulation": {}, "find_path": {}, "skipped": {}}
+    for size in sizes:
+        for method, metrics in run_path_queries(size, n_queries, seed, layout).items():
+            results["find_path"][f"{method} {size}x{size}"] = metrics
+        free_cells = floor(layout, size, seed)[0].count(FREE)
+        for n_robots in robot_counts:
+            # Keep at least half the floor clear, or robots spend the run stuck behind each other
+            name = f"{n_robots} robots {size}x{size}"
+            if 2 * n_robots > free_cells:
+                reason = f"{n_robots} robots need at least {2 * n_robots} free cells, the floor has {free_cells}"
+                results["skipped"][name] = reason
+                print(f"  {name}: skipped, {reason}", flush=True)
+                continue
+            results["simulation"][name] = run_scenario(size, n_robots, n_ticks, seed, strategy, planning, layout,
+                                                          stack_deliveries)
+            print(f"  {name}: " + ", ".join(f"{k}={v:.3g}" for k, v in results["simulation"][name].items()),
+                  flush=True)
+    return results
+
+
+def map_hashes(sizes: List[int], seed: int, layout: str = "shelves") -> Dict[str, str]:
+    """Map_Format content hash of the floor benchmarked at each size, keyed like the scenario names."""
+    hashes = {}
+    for size in sizes:
+        grid, zones = floor(layout, size, seed)
+        hashes[f"{size}x{size}"] = content_hash(grid, delivery_zones=zones)
+    return hashes
+
+
+def compare(results: Dict[str, Dict[str, Metrics]], baseline: Dict[str, Dict[str, Metrics]],
+            tolerance: float, changed_maps: Iterable[str] = ()) -> List[str]:
+    """
+    Metrics that got worse than the baseline by more than tolerance (a fraction). Scenarios on the
+    maps in changed_maps (e.g. "64x64") are skipped: their numbers are not comparable.
+    """
+    regressions = []
+    for group, scenarios in results.items():
+        for name, metrics in scenarios.items():
+            base = baseline.get(group, {}).get(name)
+            if base is None or name.split()[-1] in changed_maps:
+                continue
+            for metric, value in metrics.items():
+                if metric not in base or not base[metric]:
+                    continue
+                change = (value - base[metric]) / abs(base[metric])
+                worse = -change if HIGHER_IS_BETTER[metric] else change
+                if worse > tolerance:
+                    regressions.append(f"{group}/{name}: {metric} {base[metric]:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark warehouse simulation throughput and scaling.")
+    parser.add_argument("--robots", type=int, nargs="+", default=[2, 10, 100, 1000])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 64, 128], help="grid side lengths")
+    parser.add_argument("--ticks", type=int, default=1000, help="ticks per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategy", choices=sorted(Warehouse_Test.TARGET_STRATEGIES), default="nearest")
+    parser.add_argument("--planning", choices=Warehouse_Test.PLANNING_MODES, default="independent")
+    parser.add_argument("--queries", type=int, default=50, help="find_path queries per grid size")
+    parser.add_argument("--layout", choices=LAYOUTS, default="shelves", help="warehouse floor layout")
+    parser.add_argument("--stack-deliveries", action="store_true",
+                        help="set delivered packages down in the delivery zones as obstacles")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a results file written by --output")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.robots, args.sizes, args.ticks, args.seed, args.strategy, args.planning,
+                             args.queries, args.layout, args.stack_deliveries)
+    results["config"] = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    results["config"]["maps"] = map_hashes(args.sizes, args.seed, args.layout)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        baseline_maps = baseline.get("config", {}).get("maps", {})
+        changed_maps = [name for name, digest in results["config"]["maps"].items()
+                        if baseline_maps.get(name, digest) != digest]
+        for name in changed_maps:
+            print(f"Skipping {name}: the floor differs from the baseline's")
+        regressions = compare({k: v for k, v in results.items() if k in METRIC_GROUPS},
+                              {k: v for k, v in baseline.items() if k in METRIC_GROUPS}, args.tolerance, changed_maps)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
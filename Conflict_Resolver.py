@@ -0,0 +1,55 @@
+"""
+Simultaneous-move conflict resolution.
+
+The game descriptions require every agent to move at the same time. Agents first propose a move from the
+same snapshot of positions; resolve_simultaneous_moves then settles all proposals in one pass:
+
+  - Vertex conflict: several agents propose the same cell. The lowest-index agent gets it, the rest wait.
+  - Occupied cell: an agent moving into a cell whose occupant waits (or stays put) must wait too.
+  - Swap conflict: two agents proposing to exchange cells both wait.
+
+Longer rotations (three or more agents moving in a cycle) are allowed, since no two agents ever share a
+cell or cross the same edge. Every agent is demoted to waiting at most once, so the cost is linear in the
+number of agents and the outcome does not depend on anything but agent order.
+"""
+
+from collections import deque
+from typing import List, Optional, Tuple
+
+
+def resolve_simultaneous_moves(current: List[Tuple[int, int]],
+                               proposed: List[Optional[Tuple[int, int]]]) -> List[Tuple[int, int]]:
+    """
+    Settle one simultaneous step and return the new position of every agent.
+    proposed[i] is the cell agent i wants to move to, or None to stay where it is.
+    """
+    n = len(current)
+    target = [current[i] if proposed[i] is None else proposed[i] for i in range(n)]
+    moving = [target[i] != current[i] for i in range(n)]
+    occupant = {pos: i for i, pos in enumerate(current)}
+
+    # Agents that stay put keep their cell with absolute priority
+    claim = {current[i]: i for i in range(n) if not moving[i]}
+    waiting = deque()
+    for i in range(n):
+        if not moving[i]:
+            continue
+        j = occupant.get(target[i])
+        swap = j is not None and moving[j] and target[j] == current[i]
+        if target[i] in claim or swap:
+            moving[i] = False
+            waiting.append(i)
+        else:
+            claim[target[i]] = i
+
+    # A waiting agent reclaims its own cell, bumping whoever planned to move in (which may cascade)
+    while waiting:
+        i = waiting.popleft()
+        cell = current[i]
+        j = claim.get(cell)
+        claim[cell] = i
+        if j is not None and j != i and moving[j]:
+            moving[j] = False
+            waiting.append(j)
+
+    return [target[i] if moving[i] else current[i] for i in range(n)]
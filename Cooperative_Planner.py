@@ -0,0 +1,200 @@
+"""
+Windowed cooperative path planning (WHCA*) for many robots on one grid.
+
+Each robot plans a path through space and time for the next `window` ticks and reserves the cells
+(and the moves between them) in a shared reservation table, so robots planned later route around
+robots planned earlier: no two robots are booked into the same cell at the same tick, and no two are
+booked to swap cells. Beyond the window a robot follows the true distance to its goal, read from a
+Distance_Fields.DistanceFieldCache.
+
+Plans persist between ticks. A robot only replans when its goal changes, its lookahead runs low, its
+next cell became blocked, or it could not make its reserved move; everyone else keeps their booking.
+As a final guarantee the proposed moves go through Conflict_Resolver.resolve_simultaneous_moves, and a
+robot that was held back there replans on the next tick.
+"""
+
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from Conflict_Resolver import resolve_simultaneous_moves
+from Distance_Fields import UNREACHABLE, DistanceFieldCache
+
+Cell = Tuple[int, int]
+
+# Wait in place, then up, down, left, right
+MOVES = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class ReservationTable:
+    """Space-time bookings: which robot occupies a cell at a tick, and which robot moves along an edge."""
+
+    def __init__(self):
+        self._cells: Dict[Tuple[int, Cell], int] = {}
+        self._edges: Dict[Tuple[int, Cell, Cell], int] = {}
+        self._owned: Dict[int, List[Tuple]] = defaultdict(list)
+
+    def reserve_path(self, agent: int, path: List[Cell], start_time: int) -> None:
+        """Book path[k] for tick start_time + k, and the move into it from path[k - 1]."""
+        owned = self._owned[agent]
+        for k, cell in enumerate(path):
+            key = (start_time + k, cell)
+            self._cells[key] = agent
+            owned.append(key)
+            if k and path[k - 1] != cell:
+                edge = (start_time + k - 1, path[k - 1], cell)
+                self._edges[edge] = agent
+                owned.append(edge)
+
+    def release(self, agent: int) -> None:
+        """Drop every booking of an agent."""
+        for key in self._owned.pop(agent, ()):
+            table = self._cells if len(key) == 2 else self._edges
+            if table.get(key) == agent:
+                del table[key]
+
+    def is_free(self, cell: Cell, time: int, agent: int) -> bool:
+        return self._cells.get((time, cell), agent) == agent
+
+    def can_move(self, source: Cell, target: Cell, time: int, agent: int) -> bool:
+        """Whether agent may move from source at tick time to target at tick time + 1."""
+        if not self.is_free(target, time + 1, agent):
+            return False
+        # Moving against someone else's booked move would swap the two robots
+        return source == target or self._edges.get((time, target, source), agent) == agent
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+
+class CooperativePlanner:
+    def __init__(self, grid: List[List[int]], window: int = 8,
+                 distance_fields: Optional[DistanceFieldCache] = None, max_expansions: int = 2000):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.distance_fields = distance_fields if distance_fields is not None else DistanceFieldCache(grid)
+        self.rows, self.cols = self.distance_fields.rows, self.distance_fields.cols
+        self.max_expansions = max_expansions
+        self.reservations = ReservationTable()
+        # agent -> (start tick, booked path from that tick, goal)
+        self.plans: Dict[int, Tuple[int, List[Cell], Cell]] = {}
+        self.time = 0
+        # Space-time searches run, in total and in the last step
+        self.replans = 0
+        self.last_replans = 0
+
+    def planned_path(self, agent: int) -> List[Cell]:
+        """The agent's booked cells from the current tick on."""
+        plan = self.plans.get(agent)
+        if plan is None:
+            return []
+        start, path, _ = plan
+        return path[self.time - start:]
+
+    def forget(self, agent: int) -> None:
+        """Drop an agent's plan and bookings, e.g. when it leaves the floor or its goal is reassigned."""
+        self.plans.pop(agent, None)
+        self.reservations.release(agent)
+
+    def _needs_replan(self, agent: int, pos: Cell, goal: Cell) -> bool:
+        plan = self.plans.get(agent)
+        if plan is None:
+            return True
+        start, path, planned_goal = plan
+        k = self.time - start
+        if planned_goal != goal or not 0 <= k < len(path) or path[k] != pos:
+            return True
+        # Keep at least half a window of lookahead so other robots still see where this one is going
+        if len(path) - 1 - k < max(1, self.window // 2) and pos != goal:
+            return True
+        if k + 1 < len(path):
+            r, c = path[k + 1]
+            return path[k + 1] != pos and not self.distance_fields.free[r * self.cols + c]
+        return False
+
+    def step(self, positions: List[Cell], goals: List[Cell]) -> List[Cell]:
+        """
+        Advance every agent one tick towards its goal; returns the new positions.
+        Agents are identified by their index in positions/goals.
+        """
+        replanned = 0
+        for agent, (pos, goal) in enumerate(zip(positions, goals)):
+            if self._needs_replan(agent, pos, goal):
+                self.forget(agent)
+                path = self._search(agent, pos, goal)
+                self.plans[agent] = (self.time, path, goal)
+                self.reservations.reserve_path(agent, path, self.time)
+                replanned += 1
+
+        proposals = []
+        for agent, pos in enumerate(positions):
+            start, path, _ = self.plans[agent]
+            k = self.time - start
+            proposals.append(path[k + 1] if k + 1 < len(path) else pos)
+        moves = resolve_simultaneous_moves(positions, proposals)
+        for agent, (move, proposal) in enumerate(zip(moves, proposals)):
+            if move != proposal:
+                # Held back: the booking no longer matches reality
+                self.forget(agent)
+
+        self.time += 1
+        self.replans += replanned
+        self.last_replans = replanned
+        return moves
+
+    def _search(self, agent: int, start: Cell, goal: Cell) -> List[Cell]:
+        """
+        Space-time A* over (cell, tick) for the next window ticks, avoiding other agents' bookings.
+        Waiting costs one tick except at the goal; the heuristic is the true distance to the goal.
+        Falls back to staying put when no booking-free path exists.
+        """
+        rows, cols, window = self.rows, self.cols, self.window
+        free = self.distance_fields.free
+        dist = self.distance_fields.field(goal)
+        reservations, t0 = self.reservations, self.time
+        start_h = self.distance_fields.distance(start, goal)
+        if start_h == UNREACHABLE:
+            start_h = 0
+
+        # Nodes are (cell, depth); parents map each reached node to its predecessor
+        parents: Dict[Tuple[Cell, int], Optional[Tuple[Cell, int]]] = {(start, 0): None}
+        best_g = {(start, 0): 0}
+        open_heap = [(start_h, 0, 0, start)]
+        expansions = 0
+        while open_heap and expansions < self.max_expansions:
+            _, neg_depth, g, cell = heapq.heappop(open_heap)
+            depth = -neg_depth
+            node = (cell, depth)
+            if best_g.get(node, g) < g:
+                continue
+            if depth == window:
+                path = []
+                while node is not None:
+                    path.append(node[0])
+                    node = parents[node]
+                path.reverse()
+                return path
+            expansions += 1
+            time = t0 + depth
+            for dr, dc in MOVES:
+                r, c = cell[0] + dr, cell[1] + dc
+                if not (0 <= r < rows and 0 <= c < cols):
+                    continue
+                target = (r, c)
+                if target != cell:
+                    h = dist[r * cols + c]
+                    if not free[r * cols + c] or h == UNREACHABLE:
+                        continue
+                else:
+                    h = dist[r * cols + c] if dist[r * cols + c] != UNREACHABLE else start_h
+                if not reservations.can_move(cell, target, time, agent):
+                    continue
+                ng = g + (0 if target == cell == goal else 1)
+                child = (target, depth + 1)
+                if ng < best_g.get(child, ng + 1):
+                    best_g[child] = ng
+                    parents[child] = node
+                    # Deeper nodes first among equal f, so the search commits to one path
+                    heapq.heappush(open_heap, (ng + h, -(depth + 1), ng, target))
+        return [start]
@@ -1,8 +1,17 @@
+import os
 import time
 import random
 import pygame
 import sys
-from typing import List, Tuple, Set
+import argparse
+from typing import List, Optional, Tuple, Set
+from Conflict_Resolver import resolve_simultaneous_moves
+from Grid import FREE, SAFETY_ZONE, Grid, as_grid
+from Map_Generator import GeneratedMap, generate_map
+from Grid_Pyramid import upsample
+from Grid_Renderer import GridRenderer
+from Scheduler import FixedTimestepScheduler
+from Trajectory_Recorder import TrajectoryReader, TrajectoryWriter, replay
 
 # --------------------------------------------------
 # Environment Setup (Cops and Robbers Maze)
@@ -30,8 +39,12 @@ pygame.display.set_caption("Cops and Robbers Maze")
 
 # Safety zone top-left coordinates (each safety zone is 2x2)
 SAFETY_ZONE_TOP_LEFTS = [(3, 3), (14, 14)]
+# The same zones as inclusive (top, left, bottom, right) rectangles, the form Map_Generator returns
+SAFETY_ZONES = [(r, c, r + 1, c + 1) for (r, c) in SAFETY_ZONE_TOP_LEFTS]
+N_COPS = 4
+N_ROBBERS = 4
 
-def generate_maze() -> List[List[int]]:
+def generate_maze() -> Grid:
     """
     Generate a maze layout with fixed obstacles.
     The obstacles come from a fixed 10x10 grid (0: free, 1: obstacle)
@@ -39,7 +52,7 @@ def generate_maze() -> List[List[int]]:
     Then, carve out 2x2 safety zones (cells set to 2) at specified locations.
     """
     # Fixed obstacle grid from Enviorment1.py (10x10)
-    fixed_grid = [
+    fixed_grid = Grid.from_rows([
         [0, 0, 1, 0, 0, 0, 1, 0, 0, 0],
         [0, 1, 1, 0, 0, 0, 0, 0, 1, 0],
         [0, 0, 0, 0, 1, 1, 0, 0, 0, 0],
@@ -50,110 +63,103 @@ def generate_maze() -> List[List[int]]:
         [0, 1, 0, 0, 0, 1, 0, 0, 1, 0],
         [0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
         [0, 0, 1, 0, 0, 0, 0, 0, 0, 0]
-    ]
+    ])
     
-    # Scale the fixed 10x10 grid to a 20x20 grid:
-    maze = []
-    for row in fixed_grid:
-        scaled_row = []
-        for cell in row:
-            # Duplicate each cell horizontally
-            scaled_row.extend([cell, cell])
-        # Duplicate each row vertically
-        maze.append(scaled_row)
-        maze.append(scaled_row.copy())
+    # Scale the fixed 10x10 grid to a 20x20 grid in one bulk repeat
+    maze = upsample(fixed_grid, GRID_SIZE // fixed_grid.rows)
     
-    # Carve out safety zones as 2x2 blocks with value 2 (override obstacles if any)
+    # Carve out safety zones as 2x2 blocks with value 2 (override obstacles if any);
+    # slicing clips blocks that run past the edge
+    cells = maze.array()
     for (r, c) in SAFETY_ZONE_TOP_LEFTS:
-        for i in range(2):
-            for j in range(2):
-                if 0 <= r + i < GRID_SIZE and 0 <= c + j < GRID_SIZE:
-                    maze[r + i][c + j] = 2
+        cells[r:r + 2, c:c + 2] = SAFETY_ZONE
     return maze
 
-def draw_maze(maze: List[List[int]], cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]]) -> None:
+def generate_random_maze(seed: Optional[int] = None) -> GeneratedMap:
+    """
+    Generate a new connected maze with 20% obstacles and 2x2 safety zones placed at random
+    (the same seed gives the same maze), with start cells for every cop and robber in its spawns.
+    Its safety zones are not at SAFETY_ZONE_TOP_LEFTS; read them from the result's safety_zones.
+    Spawns keep clear of the safety zones, so the first N_COPS of them are legal cop cells.
+    """
+    return generate_map(GRID_SIZE, GRID_SIZE, density=0.2, seed=seed, safety_zones=len(SAFETY_ZONE_TOP_LEFTS),
+                        safety_zone_size=2, spawns=N_COPS + N_ROBBERS)
+
+def layout_record_path(record_path: str, layout: int) -> str:
+    """File recording the given layout of a run: record_path itself, then run-1.bin, run-2.bin, ..."""
+    if layout == 0:
+        return record_path
+    stem, ext = os.path.splitext(record_path)
+    return f"{stem}-{layout}{ext}"
+
+# Renderer holding the cached background of the maze being drawn
+_renderer = None
+_renderer_maze = None
+
+def draw_maze(maze: Grid, cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]]) -> None:
     """
     Draw the maze, cops, robbers, and safety zones on the screen.
+    Obstacles, safety zones and grid lines are rendered once per maze; each frame only the cells
+    agents left or entered are repainted and pushed to the display.
     """
-    screen.fill(COLORS["background"])
-    
-    # Draw cells
-    for i in range(GRID_SIZE):
-        for j in range(GRID_SIZE):
-            cell = maze[i][j]
-            if cell == 1:
-                color = COLORS["obstacle"]
-            elif cell == 2:
-                color = COLORS["safety_zone"]
-            else:
-                continue  # free cell; no fill
-            pygame.draw.rect(screen, color, (j * CELL_SIZE, i * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+    global _renderer, _renderer_maze
+    if _renderer is None or _renderer_maze is not maze:
+        _renderer = GridRenderer(screen, GRID_SIZE, GRID_SIZE, CELL_SIZE, COLORS["background"], COLORS["grid_line"])
+        _renderer.paint_static(maze.layer_cells("obstacle"), COLORS["obstacle"])
+        _renderer.paint_static(maze.layer_cells("safety_zone"), COLORS["safety_zone"])
+        _renderer_maze = maze
     
-    # Draw cops
-    for cop_pos in cop_positions:
-        pygame.draw.rect(screen, COLORS["cop"], (cop_pos[1] * CELL_SIZE, cop_pos[0] * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-    
-    # Draw robbers
-    for robber_pos in robber_positions:
-        pygame.draw.rect(screen, COLORS["robber"], (robber_pos[1] * CELL_SIZE, robber_pos[0] * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-    
-    # Draw grid lines
-    for i in range(GRID_SIZE + 1):
-        pygame.draw.line(screen, COLORS["grid_line"], (i * CELL_SIZE, 0), (i * CELL_SIZE, WINDOW_SIZE))
-        pygame.draw.line(screen, COLORS["grid_line"], (0, i * CELL_SIZE), (WINDOW_SIZE, i * CELL_SIZE))
+    sprites = {pos: ("rect", COLORS["cop"]) for pos in cop_positions}
+    sprites.update({pos: ("rect", COLORS["robber"]) for pos in robber_positions})
+    _renderer.render(sprites)
 
-def get_valid_moves(pos: Tuple[int, int], maze: List[List[int]], allowed: Set[int]) -> List[Tuple[int, int]]:
+def get_valid_moves(pos: Tuple[int, int], maze: Grid, allowed: Set[int]) -> List[Tuple[int, int]]:
     """
     Return valid moves for an agent at position 'pos'.
     Allowed cells have values in the 'allowed' set.
     Moves are up, down, left, right.
     """
-    moves = []
-    row, col = pos
-    for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
-        nr, nc = row + dr, col + dc
-        if 0 <= nr < GRID_SIZE and 0 <= nc < GRID_SIZE:
-            if maze[nr][nc] in allowed:
-                moves.append((nr, nc))
-    return moves
+    return as_grid(maze).valid_moves(pos, allowed)
 
-def update_positions(maze: List[List[int]], cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]]) -> None:
+def update_positions(maze: Grid, cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]]) -> None:
     """
     Update positions for cops and robbers.
     Cops move only in free cells (maze value 0) while robbers can move in free cells or safety zones (0 or 2).
     Movement is random among available valid moves.
+    All agents propose a move from the same snapshot and move simultaneously; vertex and swap
+    conflicts are settled by resolve_simultaneous_moves (losers stay in place).
     """
-    # Update cops
-    new_cop_positions = []
+    proposals = []
+    # Cops
     for pos in cop_positions:
-        valid = get_valid_moves(pos, maze, allowed={0})
-        if valid:
-            new_pos = random.choice(valid)
-        else:
-            new_pos = pos
-        new_cop_positions.append(new_pos)
-    cop_positions[:] = new_cop_positions
+        valid = get_valid_moves(pos, maze, allowed={FREE})
+        proposals.append(random.choice(valid) if valid else None)
     
-    # Update robbers
-    new_robber_positions = []
+    # Robbers
+    cop_cells = set(cop_positions)
     for pos in robber_positions:
-        valid = get_valid_moves(pos, maze, allowed={0, 2})
+        valid = get_valid_moves(pos, maze, allowed={FREE, SAFETY_ZONE})
         # To avoid collision with cops, filter out moves that are occupied by a cop.
-        valid = [move for move in valid if move not in cop_positions]
-        if valid:
-            new_pos = random.choice(valid)
-        else:
-            new_pos = pos
-        new_robber_positions.append(new_pos)
-    robber_positions[:] = new_robber_positions
+        valid = [move for move in valid if move not in cop_cells]
+        proposals.append(random.choice(valid) if valid else None)
+    
+    new_positions = resolve_simultaneous_moves(cop_positions + robber_positions, proposals)
+    cop_positions[:] = new_positions[:len(cop_positions)]
+    robber_positions[:] = new_positions[len(cop_positions):]
 
-def run_environment():
+def run_environment(record_path: Optional[str] = None, seed: Optional[int] = None):
     """
     Main loop to run the Cops and Robbers Maze environment.
-    Press SPACE to regenerate the maze.
+    The run starts on the fixed maze; press SPACE to switch to a new seeded maze (generate_random_maze
+    with seed, seed + 1, ... or random seeds if seed is None), with the agents back on its spawns.
     Agents move every second.
+    If record_path is given, every agent's position is recorded there each tick. A recording holds one
+    layout (its header keeps the maze and safety zones), so each new maze starts a new file, see
+    layout_record_path.
     """
     maze = generate_maze()
+    safety_zones = SAFETY_ZONES
+    layout = 0
     
     # Updated initial positions:
     # Cops start in the four corners of the grid.
@@ -167,32 +173,86 @@ def run_environment():
         (GRID_SIZE // 2 + 4, GRID_SIZE // 2 + 4)
     ]
     
-    running = True
-    clock = pygame.time.Clock()
-    last_move_time = time.time()
+    recorder = None
+    tick_count = 0
+
+    def start_recording(maze_seed: Optional[int] = None):
+        nonlocal recorder
+        if recorder is not None:
+            recorder.close()
+        recorder = TrajectoryWriter(layout_record_path(record_path, layout),
+                                    ["cop"] * len(cop_positions) + ["robber"] * len(robber_positions),
+                                    metadata={"maze": maze.to_rows(), "safety_zones": safety_zones,
+                                              "seed": maze_seed})
+        recorder.record(0, cop_positions + robber_positions)
+
+    if record_path:
+        start_recording()
+
+    def tick():
+        nonlocal tick_count
+        update_positions(maze, cop_positions, robber_positions)
+        tick_count += 1
+        if recorder is not None:
+            recorder.record(tick_count, cop_positions + robber_positions)
+
     MOVE_INTERVAL = 1.0  # seconds
+    # Agents move once per MOVE_INTERVAL; frames are only drawn when something changed
+    scheduler = FixedTimestepScheduler(tick_rate=1.0 / MOVE_INTERVAL, render_rate=60)
     
-    while running:
+    def new_layout():
+        nonlocal maze, safety_zones, layout, tick_count
+        layout += 1
+        maze_seed = seed + layout - 1 if seed is not None else random.randrange(2 ** 32)
+        generated = generate_random_maze(maze_seed)
+        maze, safety_zones = generated.grid, generated.safety_zones
+        cop_positions[:] = generated.spawns[:N_COPS]
+        robber_positions[:] = generated.spawns[N_COPS:]
+        tick_count = 0
+        if record_path:
+            start_recording(maze_seed)
+
+    def poll():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                running = False
+                scheduler.stop()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    # Regenerate the maze (obstacles and safety zones are re-established)
-                    maze = generate_maze()
-        
-        current_time = time.time()
-        if current_time - last_move_time >= MOVE_INTERVAL:
-            update_positions(maze, cop_positions, robber_positions)
-            last_move_time = current_time
-        
-        draw_maze(maze, cop_positions, robber_positions)
-        pygame.display.flip()
-        clock.tick(60)
+                    new_layout()
+                    scheduler.request_render()
+            elif event.type == pygame.VIDEOEXPOSE and _renderer is not None:
+                _renderer.invalidate()
+                scheduler.request_render()
+    
+    scheduler.run(tick, lambda: draw_maze(maze, cop_positions, robber_positions), poll)
+    if recorder is not None:
+        recorder.close()
     
     pygame.quit()
     sys.exit()
 
+def replay_environment(path: str):
+    """Play back a recorded run of the maze, one recorded tick per second."""
+    with TrajectoryReader(path) as reader:
+        maze = Grid.from_rows(reader.header["maze"])
+        is_cop = [kind == "cop" for kind in reader.agent_kinds]
+
+        def draw_frame(frame):
+            cop_positions = [pos for pos, cop in zip(frame.positions, is_cop) if cop]
+            robber_positions = [pos for pos, cop in zip(frame.positions, is_cop) if not cop]
+            draw_maze(maze, cop_positions, robber_positions)
+
+        def poll(scheduler):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    scheduler.stop()
+                elif event.type == pygame.VIDEOEXPOSE and _renderer is not None:
+                    _renderer.invalidate()
+                    scheduler.request_render()
+
+        replay(reader, draw_frame, tick_rate=1.0, poll=poll)
+    pygame.quit()
+
 # --------------------------------------------------
 # Reactive Planning Manager (Cops and Robbers)
 # --------------------------------------------------
@@ -230,22 +290,27 @@ def initialize_status(num_groups: int) -> Tuple[List[bool], List[bool]]:
     dispatch_flags = [False] * num_groups
     return replan_flags, dispatch_flags
 
-def detect_input(cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]]) -> bool:
+def in_safety_zone(pos: Tuple[int, int], safety_zones: List[Tuple[int, int, int, int]] = SAFETY_ZONES) -> bool:
+    """Whether pos lies in one of the (top, left, bottom, right) safety zones, inclusive."""
+    return any(r0 <= pos[0] <= r1 and c0 <= pos[1] <= c1 for (r0, c0, r1, c1) in safety_zones)
+
+def detect_input(cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]],
+                 safety_zones: List[Tuple[int, int, int, int]] = SAFETY_ZONES) -> bool:
     """
-    Check if any robber is adjacent to a cop or in a safety zone.
+    Check if any robber is adjacent to a cop or in a safety zone (those of the fixed maze by default;
+    pass a generated maze's safety_zones for other layouts).
     """
     for robber_pos in robber_positions:
         for cop_pos in cop_positions:
             # Check if robber is adjacent to cop
             if abs(robber_pos[0] - cop_pos[0]) <= 1 and abs(robber_pos[1] - cop_pos[1]) <= 1:
                 return True
-        # Check if robber is in a safety zone (using top-lefts, compare against 2x2 block)
-        for (r, c) in SAFETY_ZONE_TOP_LEFTS:
-            if r <= robber_pos[0] < r + 2 and c <= robber_pos[1] < c + 2:
-                return True
+        if in_safety_zone(robber_pos, safety_zones):
+            return True
     return False
 
-def check_agent_status(agent_index: int, cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]]) -> bool:
+def check_agent_status(agent_index: int, cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]],
+                       safety_zones: List[Tuple[int, int, int, int]] = SAFETY_ZONES) -> bool:
     """
     Check if a robber is in a safety zone or adjacent to a cop.
     """
@@ -253,10 +318,7 @@ def check_agent_status(agent_index: int, cop_positions: List[Tuple[int, int]], r
     for cop_pos in cop_positions:
         if abs(robber_pos[0] - cop_pos[0]) <= 1 and abs(robber_pos[1] - cop_pos[1]) <= 1:
             return True
-    for (r, c) in SAFETY_ZONE_TOP_LEFTS:
-        if r <= robber_pos[0] < r + 2 and c <= robber_pos[1] < c + 2:
-            return True
-    return False
+    return in_safety_zone(robber_pos, safety_zones)
 
 def compute_planning_specification(current_constraints, status_parameters) -> str:
     """
@@ -290,7 +352,8 @@ def reset_group_constraint(group, original_group):
     return original_group
 
 def main_manager(transition_systems: List, ltl_constraints: List[str],
-                 cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]]) -> None:
+                 cop_positions: List[Tuple[int, int]], robber_positions: List[Tuple[int, int]],
+                 safety_zones: List[Tuple[int, int, int, int]] = SAFETY_ZONES) -> None:
     """
     Main manager function running continuously to update and replan agent trajectories.
     """
@@ -305,7 +368,8 @@ def main_manager(transition_systems: List, ltl_constraints: List[str],
             planning_free = True
             replan_flags[idx] = False
             
-            if detect_input(cop_positions, robber_positions) or check_agent_status(idx, cop_positions, robber_positions):
+            if detect_input(cop_positions, robber_positions, safety_zones) or \
+                    check_agent_status(idx, cop_positions, robber_positions, safety_zones):
                 planning_free = False
                 replan_flags[idx] = True
             
@@ -349,7 +413,15 @@ example_reactive_input = {
 # Main entry point for testing
 # --------------------------------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cops and robbers maze environment.")
+    parser.add_argument("--record", metavar="PATH", help="record the agents' trajectories to a binary file")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded run instead of simulating")
+    parser.add_argument("--seed", type=int, help="seed of the first maze SPACE generates")
+    args = parser.parse_args()
     try:
-        run_environment()
+        if args.replay:
+            replay_environment(args.replay)
+        else:
+            run_environment(args.record, args.seed)
     except Exception as e:
         print("Exiting environment loop:", e)
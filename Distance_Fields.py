@@ -0,0 +1,215 @@
+"""
+Multi-source distance fields on grid maps.
+
+A distance field holds, for every cell, the number of 4-connected steps to the nearest of a set of
+source cells, walking only through free cells (obstacles are respected, unlike Manhattan distance).
+One breadth-first search from all sources at once costs O(cells), however many sources there are,
+and the result can be shared by every agent that needs it during a tick.
+
+Fields are flat array('i') buffers indexed by row * cols + col; UNREACHABLE marks cells that cannot
+reach any source. They can be wrapped zero-copy by NumPy (np.frombuffer(field, dtype=np.int32)).
+
+DistanceFieldCache keeps single-goal fields between ticks for goal-directed agents (the warehouse
+robots): a field is computed once per goal and grid version, and robots read their next step from it.
+Its fields can be saved and loaded again in another process, keyed by the map's content hash.
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from Grid import as_grid
+
+UNREACHABLE = -1
+
+
+def free_mask(grid) -> bytearray:
+    """Flatten a Grid (or nested list of cell values) into a bytearray with 1 for free (value 0) cells."""
+    return as_grid(grid).free_mask()
+
+
+def distance_field(free, rows: int, cols: int, sources: Iterable[Tuple[int, int]]) -> array:
+    """
+    Breadth-first distances from the nearest source to every cell.
+    free is a flat bytes-like mask (non-zero = passable). Sources are always at distance 0,
+    but the search only expands into free cells.
+    """
+    dist = array('i', [UNREACHABLE]) * (rows * cols)
+    frontier = []
+    for r, c in sources:
+        if 0 <= r < rows and 0 <= c < cols:
+            i = r * cols + c
+            if dist[i] == UNREACHABLE:
+                dist[i] = 0
+                frontier.append(i)
+
+    d = 0
+    last_col = cols - 1
+    while frontier:
+        d += 1
+        next_frontier = []
+        append = next_frontier.append
+        for i in frontier:
+            c = i % cols
+            # Up, down, left, right
+            j = i - cols
+            if j >= 0 and free[j] and dist[j] == UNREACHABLE:
+                dist[j] = d
+                append(j)
+            j = i + cols
+            if j < rows * cols and free[j] and dist[j] == UNREACHABLE:
+                dist[j] = d
+                append(j)
+            if c > 0:
+                j = i - 1
+                if free[j] and dist[j] == UNREACHABLE:
+                    dist[j] = d
+                    append(j)
+            if c < last_col:
+                j = i + 1
+                if free[j] and dist[j] == UNREACHABLE:
+                    dist[j] = d
+                    append(j)
+        frontier = next_frontier
+    return dist
+
+
+class DistanceFieldCache:
+    """
+    Reverse-BFS distance fields towards goal cells, kept across ticks.
+
+    A field towards a goal answers "which way to the goal?" for every cell at once, so robots that
+    share a goal (or keep the same goal for many ticks) share one BFS instead of searching every tick.
+    The next step is read in O(1) by walking down the gradient. Fields are evicted least recently
+    used beyond max_entries, and a cell edit drops only the fields that edit can change.
+    Free cells are those with value 0, matching Warehouse_Test.find_path.
+    """
+
+    # Same neighbour order as Warehouse_Test.find_path
+    NEIGHBOURS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+    def __init__(self, grid: List[List[int]], max_entries: int = 32):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.free = free_mask(grid)
+        self.max_entries = max_entries
+        # Bumped by every edit; cached fields are always consistent with the current version
+        self.version = 0
+        self._fields: "OrderedDict[Tuple[int, int], array]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def field(self, goal: Tuple[int, int]) -> array:
+        """Distances to goal for every cell (UNREACHABLE where there is no path, everywhere if goal is blocked)."""
+        dist = self._fields.get(goal)
+        if dist is not None:
+            self.hits += 1
+            self._fields.move_to_end(goal)
+            return dist
+        self.misses += 1
+        r, c = goal
+        inside = 0 <= r < self.rows and 0 <= c < self.cols
+        dist = distance_field(self.free, self.rows, self.cols, [goal] if inside and self.free[r * self.cols + c] else [])
+        self._fields[goal] = dist
+        if len(self._fields) > self.max_entries:
+            self._fields.popitem(last=False)
+        return dist
+
+    def distance(self, start: Tuple[int, int], goal: Tuple[int, int]) -> int:
+        """Steps from start to goal (the start cell itself need not be free), or UNREACHABLE."""
+        if start == goal:
+            return 0
+        step = self.next_step(start, goal)
+        if step is None:
+            return UNREACHABLE
+        return self.field(goal)[step[0] * self.cols + step[1]] + 1
+
+    def next_step(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        The neighbour of start that is closest to goal, i.e. the second cell of a shortest path.
+        None if start is the goal or the goal cannot be reached.
+        """
+        if start == goal:
+            return None
+        dist = self.field(goal)
+        best, best_dist = None, UNREACHABLE
+        for dr, dc in self.NEIGHBOURS:
+            r, c = start[0] + dr, start[1] + dc
+            if 0 <= r < self.rows and 0 <= c < self.cols:
+                d = dist[r * self.cols + c]
+                if d != UNREACHABLE and (best is None or d < best_dist):
+                    best, best_dist = (r, c), d
+        return best
+
+    def path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """A shortest path from start to goal inclusive, [] if there is none (like Warehouse_Test.find_path)."""
+        path = [start]
+        current = start
+        while current != goal:
+            current = self.next_step(current, goal)
+            if current is None:
+                return []
+            path.append(current)
+        return path
+
+    def set_cell(self, cell: Tuple[int, int], value: int) -> None:
+        """Record a grid edit and drop the cached fields it can change."""
+        r, c = cell
+        i = r * self.cols + c
+        free = value == 0
+        if bool(self.free[i]) == free:
+            return
+        self.free[i] = free
+        self.version += 1
+        stale = []
+        for goal, dist in self._fields.items():
+            if free:
+                # A new free cell only matters if it touches the region connected to this goal
+                affected = goal == cell or any(
+                    0 <= r + dr < self.rows and 0 <= c + dc < self.cols
+                    and dist[(r + dr) * self.cols + c + dc] != UNREACHABLE
+                    for dr, dc in self.NEIGHBOURS)
+            else:
+                # A new obstacle only matters if paths to this goal could use the cell
+                affected = dist[i] != UNREACHABLE
+            if affected:
+                stale.append(goal)
+        for goal in stale:
+            del self._fields[goal]
+
+    def clear(self) -> None:
+        self._fields.clear()
+
+    def save(self, path: str) -> None:
+        """
+        Store the cached fields in an .npz file, e.g. under Map_Format.cache_path(map_hash, ...),
+        so another process working on the same map can load them instead of searching again.
+        """
+        goals = list(self._fields)
+        fields = np.frombuffer(b"".join(self._fields[goal].tobytes() for goal in goals), dtype=np.int32)
+        np.savez(path, free=np.frombuffer(self.free, dtype=np.uint8),
+                 goals=np.array(goals, dtype=np.int32).reshape(-1, 2),
+                 fields=fields.reshape(len(goals), self.rows * self.cols))
+
+    def load(self, path: str) -> int:
+        """
+        Add the fields stored by save, up to max_entries; returns how many were loaded (none if they
+        were computed for different free cells).
+        """
+        with np.load(path) as stored:
+            if stored["free"].tobytes() != bytes(self.free):
+                return 0
+            goals, fields = stored["goals"], stored["fields"]
+            for k in range(max(0, len(goals) - self.max_entries), len(goals)):
+                dist = array('i')
+                dist.frombytes(fields[k].tobytes())
+                self._fields[(int(goals[k][0]), int(goals[k][1]))] = dist
+        while len(self._fields) > self.max_entries:
+            self._fields.popitem(last=False)
+        return min(len(goals), self.max_entries)
@@ -1,10 +1,11 @@
 import pygame
 import random
 import sys
-from typing import List, Tuple
-
-# Initialize Pygame
-pygame.init()
+from typing import Optional
+from Grid_Renderer import GridRenderer
+from Grid import FREE, SAFETY_ZONE, Grid, as_grid
+from Connectivity import label_components
+from Map_Generator import generate_map
 
 # Constants
 GRID_SIZE = 10
@@ -14,51 +15,33 @@ BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 GRAY = (128, 128, 128)
 
-# Set up display
-screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
-pygame.display.set_caption("Connected Grid")
+# Display surface, created by init_display() so that importing this module (e.g. for the
+# grid layout in headless simulations) does not open a window
+screen = None
 
-def is_valid_grid(grid: List[List[int]]) -> bool:
-    """Check if all white cells are connected"""
-    def find_first_white() -> Tuple[int, int]:
-        for i in range(GRID_SIZE):
-            for j in range(GRID_SIZE):
-                if grid[i][j] == 0:  # 0 represents white
-                    return (i, j)
-        return (-1, -1)
-    
-    def flood_fill(x: int, y: int, visited: set) -> None:
-        if (x, y) in visited or x < 0 or y < 0 or x >= GRID_SIZE or y >= GRID_SIZE:
-            return
-        if grid[x][y] == 1:  # 1 represents black
-            return
-        
-        visited.add((x, y))
-        # Check all four directions
-        flood_fill(x+1, y, visited)
-        flood_fill(x-1, y, visited)
-        flood_fill(x, y+1, visited)
-        flood_fill(x, y-1, visited)
+def init_display() -> pygame.Surface:
+    """Initialize Pygame and open the window used by draw_grid"""
+    global screen
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
+        pygame.display.set_caption("Connected Grid")
+    return screen
 
-    # Find first white cell
-    start = find_first_white()
-    if start == (-1, -1):
+def is_valid_grid(grid: Grid) -> bool:
+    """Check if all white cells are connected (through any non-black cells)"""
+    grid = as_grid(grid)
+    # One labelling pass over the non-obstacle cells (0 represents white, 1 black)
+    labels, _ = label_components(grid, allowed=(FREE, SAFETY_ZONE))
+    white_labels = labels[grid.array() == FREE]
+    if white_labels.size == 0:
         return False
+    return bool((white_labels == white_labels[0]).all())
 
-    # Do flood fill from first white cell
-    visited = set()
-    flood_fill(start[0], start[1], visited)
-
-    # Count all white cells
-    white_count = sum(row.count(0) for row in grid)
-    
-    # Check if we visited all white cells
-    return len(visited) == white_count
-
-def generate_grid() -> List[List[int]]:
+def generate_grid() -> Grid:
     """Generate a fixed grid with 20% black squares"""
     # Define a fixed grid
-    grid = [
+    grid = Grid.from_rows([
         [0, 0, 1, 0, 0, 0, 1, 0, 0, 0],
         [0, 1, 1, 0, 0, 0, 0, 0, 1, 0],
         [0, 0, 0, 0, 1, 1, 0, 0, 0, 0],
@@ -69,32 +52,37 @@ def generate_grid() -> List[List[int]]:
         [0, 1, 0, 0, 0, 1, 0, 0, 1, 0],
         [0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
         [0, 0, 1, 0, 0, 0, 0, 0, 0, 0]
-    ]
+    ])
     return grid
 
-def draw_grid(grid: List[List[int]]) -> None:
-    """Draw the grid on the screen"""
-    screen.fill(WHITE)
-    
-    # Draw cells
-    for i in range(GRID_SIZE):
-        for j in range(GRID_SIZE):
-            if grid[i][j] == 1:
-                pygame.draw.rect(screen, BLACK, 
-                               (j * CELL_SIZE, i * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-    
-    # Draw grid lines
-    for i in range(GRID_SIZE + 1):
-        pygame.draw.line(screen, GRAY, 
-                        (i * CELL_SIZE, 0), 
-                        (i * CELL_SIZE, WINDOW_SIZE))
-        pygame.draw.line(screen, GRAY, 
-                        (0, i * CELL_SIZE), 
-                        (WINDOW_SIZE, i * CELL_SIZE))
+# Cached rendering of the last grid drawn (obstacles and grid lines), keyed by the grid object and its version
+_background = None
+_background_grid = None
+_background_version = None
+
+def generate_random_grid(seed: Optional[int] = None) -> Grid:
+    """Generate a new connected grid with 20% black squares (the same seed gives the same grid)"""
+    return generate_map(GRID_SIZE, GRID_SIZE, density=0.2, seed=seed).grid
+
+def draw_grid(grid: Grid) -> None:
+    """
+    Draw the grid on the screen (blits a cached rendering while the grid is unchanged).
+    The cache is checked against the grid object and Grid.version, so a frame costs the same
+    however large the grid is; a new grid (SPACE) or an edit through Grid.set repaints it.
+    """
+    global _background, _background_grid, _background_version
+    grid = as_grid(grid)
+    if grid is not _background_grid or grid.version != _background_version:
+        renderer = GridRenderer(screen, grid.rows, grid.cols, CELL_SIZE, WHITE, GRAY)
+        renderer.paint_static(grid.layer_cells("obstacle"), BLACK)
+        _background, _background_grid, _background_version = renderer.background, grid, grid.version
+    screen.blit(_background, (0, 0))
 
 def main():
+    init_display()
     grid = generate_grid()
     running = True
+    needs_redraw = True
     clock = pygame.time.Clock()
 
     while running:
@@ -103,10 +91,16 @@ def main():
                 running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    grid = generate_grid()  # Generate new grid on spacebar
+                    grid = generate_random_grid()  # Generate new grid on spacebar
+                    needs_redraw = True
+            elif event.type == pygame.VIDEOEXPOSE:
+                needs_redraw = True
 
-        draw_grid(grid)
-        pygame.display.flip()
+        # The grid is static between regenerations, so only repaint when it (or the window) changed
+        if needs_redraw:
+            draw_grid(grid)
+            pygame.display.flip()
+            needs_redraw = False
         clock.tick(60)
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+"""
+Indexed set of free, unoccupied grid cells with O(1) uniform sampling.
+
+Spawning items (warehouse packages, Game 3 boxes) needs a random cell that is neither an obstacle nor
+occupied. Drawing random cells and rejecting bad ones slows down as the grid fills up and can give up
+while space is still left; scanning every agent per draw costs O(agents). FreeCellIndex instead keeps
+the available cells in a dense list plus a slot table (cell -> position in the list), so adding or
+removing a cell is a swap with the last element and k distinct cells are drawn with a partial
+Fisher-Yates shuffle in O(k). It is kept up to date as agents move and obstacles change.
+
+Occupancy is counted, so several occupants (e.g. a robot standing on a package) can share a cell.
+"""
+
+import random
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from Grid import as_grid
+
+Cell = Tuple[int, int]
+
+
+class FreeCellIndex:
+    def __init__(self, grid: List[List[int]], region: Optional[Iterable[Cell]] = None,
+                 occupied: Iterable[Cell] = ()):
+        """
+        Index the free (value 0) cells of grid, restricted to region if given (e.g. spawn points),
+        minus the occupied cells.
+        """
+        grid = as_grid(grid)
+        self.rows, self.cols = grid.rows, grid.cols
+        size = self.rows * self.cols
+        self.free = grid.free_mask()
+        self.in_region = bytearray(size) if region is not None else bytearray(b"\x01") * size
+        if region is not None:
+            for r, c in region:
+                self.in_region[r * self.cols + c] = 1
+        self.occupants = array('H', bytes(2 * size))
+        for r, c in occupied:
+            self.occupants[r * self.cols + c] += 1
+        # Dense list of available flat indices, and each index's slot in it (-1 when absent)
+        self._cells = array('i')
+        self._slot = array('i', [-1]) * size
+        for i in range(size):
+            if self._available(i):
+                self._add(i)
+
+    def _available(self, i: int) -> bool:
+        return bool(self.free[i] and self.in_region[i] and not self.occupants[i])
+
+    def _add(self, i: int) -> None:
+        self._slot[i] = len(self._cells)
+        self._cells.append(i)
+
+    def _remove(self, i: int) -> None:
+        slot = self._slot[i]
+        last = self._cells.pop()
+        if last != i:
+            self._cells[slot] = last
+            self._slot[last] = slot
+        self._slot[i] = -1
+
+    def _refresh(self, i: int) -> None:
+        present = self._slot[i] != -1
+        available = self._available(i)
+        if available and not present:
+            self._add(i)
+        elif present and not available:
+            self._remove(i)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, cell: Cell) -> bool:
+        return self._slot[cell[0] * self.cols + cell[1]] != -1
+
+    def occupy(self, cell: Cell) -> None:
+        i = cell[0] * self.cols + cell[1]
+        self.occupants[i] += 1
+        self._refresh(i)
+
+    def vacate(self, cell: Cell) -> None:
+        i = cell[0] * self.cols + cell[1]
+        if self.occupants[i] == 0:
+            raise ValueError(f"Cell {cell} is not occupied")
+        self.occupants[i] -= 1
+        self._refresh(i)
+
+    def move(self, source: Cell, target: Cell) -> None:
+        """An occupant moved from source to target."""
+        if source != target:
+            self.vacate(source)
+            self.occupy(target)
+
+    def set_cell(self, cell: Cell, value: int) -> None:
+        """The grid cell changed (0 free, otherwise an obstacle)."""
+        i = cell[0] * self.cols + cell[1]
+        self.free[i] = value == 0
+        self._refresh(i)
+
+    def sample(self, k: int = 1, rng: random.Random = random) -> List[Cell]:
+        """
+        k distinct available cells, uniformly at random, in O(k).
+        Raises ValueError if fewer than k cells are available.
+        """
+        cells = self._cells
+        n = len(cells)
+        if k > n:
+            raise ValueError(f"Only {n} free cells available, {k} requested")
+        chosen = []
+        for taken in range(k):
+            # Partial Fisher-Yates: move a random pick into the tail of the list, out of later draws
+            j = rng.randrange(n - taken)
+            last = n - 1 - taken
+            a, b = cells[j], cells[last]
+            cells[j], cells[last] = b, a
+            self._slot[b], self._slot[a] = j, last
+            chosen.append(divmod(a, self.cols))
+        return chosen
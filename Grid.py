@@ -0,0 +1,226 @@
+"""
+Compact grid map shared by all environments.
+
+A Grid stores one byte per cell in a contiguous bytearray (row-major), instead of a nested list of
+Python ints. The byte is the cell type the environments already use:
+    FREE = 0, OBSTACLE = 1, SAFETY_ZONE = 2
+so existing code that reads grid[r][c] keeps working: grid[r] is a zero-copy memoryview of the row,
+which also supports assignment (grid[r][c] = OBSTACLE). Spawn points and delivery areas are kept as
+bit flags in a second byte layer, allocated only when one of them is used.
+
+Grid.version counts the edits made through set(), so caches of anything derived from the cells (a
+rendered background, say) can be keyed on the grid object and its version instead of on the cells
+themselves. Writes through grid[r][c] or array() views bypass the counter; they are for building a
+grid, not for editing one that is in use.
+
+Neighbours come from a precomputed table (four flat indices per cell, -1 off the map), so bounds
+and obstacle checks are table lookups. as_grid() accepts either a Grid or a nested list, so
+functions can take both (and a Tiled_Grid.TiledGrid for maps kept on disk).
+"""
+
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Cell = Tuple[int, int]
+
+# Cell types (the byte stored per cell)
+FREE = 0
+OBSTACLE = 1
+SAFETY_ZONE = 2
+
+# Bit flags of the optional flag layer
+SPAWN = 1
+DELIVERY = 2
+
+LAYERS = ("obstacle", "safety_zone", "spawn", "delivery")
+
+# Neighbour order: up, down, left, right
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# bytes.translate tables mapping matching bytes to 1 and all others to 0
+_FREE_TABLE = bytes(int(v == FREE) for v in range(256))
+_PASSABLE_TABLE = bytes(int(v != OBSTACLE) for v in range(256))
+_TYPE_TABLES = {
+    "obstacle": bytes(int(v == OBSTACLE) for v in range(256)),
+    "safety_zone": bytes(int(v == SAFETY_ZONE) for v in range(256)),
+}
+_FLAG_TABLES = {
+    "spawn": bytes(int(bool(v & SPAWN)) for v in range(256)),
+    "delivery": bytes(int(bool(v & DELIVERY)) for v in range(256)),
+}
+
+
+class Grid:
+    def __init__(self, rows: int, cols: int, cells: Optional[Union[bytes, bytearray]] = None):
+        if rows < 1 or cols < 1:
+            raise ValueError("A grid needs at least one row and one column")
+        self.rows, self.cols = rows, cols
+        if cells is None:
+            cells = bytearray(rows * cols)
+        elif len(cells) != rows * cols:
+            raise ValueError(f"Expected {rows * cols} cells, got {len(cells)}")
+        self.cells = cells if isinstance(cells, bytearray) else bytearray(cells)
+        self.flags: Optional[bytearray] = None
+        # Bumped by every set()
+        self.version = 0
+        self._view = memoryview(self.cells)
+        self._neighbours = None
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[int]]) -> "Grid":
+        """Build a grid from a nested list of cell types."""
+        return cls(len(rows), len(rows[0]), bytearray(cell for row in rows for cell in row))
+
+    def to_rows(self) -> List[List[int]]:
+        """The cell types as a nested list (e.g. for JSON)."""
+        return [list(self.cells[r * self.cols:(r + 1) * self.cols]) for r in range(self.rows)]
+
+    def copy(self) -> "Grid":
+        grid = Grid(self.rows, self.cols, bytearray(self.cells))
+        if self.flags is not None:
+            grid.flags = bytearray(self.flags)
+        return grid
+
+    # Nested-list compatibility: len(grid), grid[r][c], grid[r][c] = value, iteration over rows
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, r: int) -> memoryview:
+        if r < 0:
+            r += self.rows
+        if not 0 <= r < self.rows:
+            raise IndexError("grid row out of range")
+        return self._view[r * self.cols:(r + 1) * self.cols]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for r in range(self.rows):
+            yield self._view[r * self.cols:(r + 1) * self.cols]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Grid):
+            return NotImplemented
+        return (self.rows, self.cols, self.cells) == (other.rows, other.cols, other.cells)
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.array() if dtype is None else self.array().astype(dtype)
+
+    def array(self) -> np.ndarray:
+        """Zero-copy (rows, cols) uint8 NumPy view of the cell types."""
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.rows, self.cols)
+
+    def index(self, cell: Cell) -> int:
+        return cell[0] * self.cols + cell[1]
+
+    def in_bounds(self, cell: Cell) -> bool:
+        return 0 <= cell[0] < self.rows and 0 <= cell[1] < self.cols
+
+    def get(self, cell: Cell) -> int:
+        return self.cells[cell[0] * self.cols + cell[1]]
+
+    def set(self, cell: Cell, value: int) -> None:
+        self.cells[cell[0] * self.cols + cell[1]] = value
+        self.version += 1
+
+    def count(self, value: int) -> int:
+        return self.cells.count(value)
+
+    def is_valid_position(self, cell: Cell, allowed: Iterable[int] = (FREE,)) -> bool:
+        """In bounds and of an allowed cell type (free by default)."""
+        r, c = cell
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.cells[r * self.cols + c] in allowed
+
+    def free_mask(self) -> bytearray:
+        """Flat mask with 1 for FREE cells, built in one C-level pass."""
+        return bytearray(self.cells.translate(_FREE_TABLE))
+
+    def passable_mask(self) -> bytearray:
+        """Flat mask with 1 for every cell that is not an OBSTACLE (safety zones included)."""
+        return bytearray(self.cells.translate(_PASSABLE_TABLE))
+
+    @property
+    def neighbour_table(self) -> np.ndarray:
+        """(rows * cols, 4) int32 array of neighbour flat indices (up, down, left, right), -1 off the map."""
+        if self._neighbours is None:
+            rows, cols = self.rows, self.cols
+            index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+            table = np.full((rows, cols, 4), -1, dtype=np.int32)
+            table[1:, :, 0] = index[:-1]
+            table[:-1, :, 1] = index[1:]
+            table[:, 1:, 2] = index[:, :-1]
+            table[:, :-1, 3] = index[:, 1:]
+            self._neighbours = table.reshape(-1, 4)
+            # A flat list of Python ints as well, for fast scalar lookups
+            self._neighbour_list = self._neighbours.ravel().tolist()
+        return self._neighbours
+
+    def flat_neighbours(self) -> List[int]:
+        """The neighbour table as a flat list: entries 4 * i .. 4 * i + 3 belong to flat cell i."""
+        if self._neighbours is None:
+            self.neighbour_table
+        return self._neighbour_list
+
+    def _neighbour_slice(self, cell: Cell) -> List[int]:
+        base = 4 * (cell[0] * self.cols + cell[1])
+        return self.flat_neighbours()[base:base + 4]
+
+    def neighbours(self, cell: Cell) -> List[Cell]:
+        """In-bounds 4-neighbours of a cell."""
+        return [divmod(j, self.cols) for j in self._neighbour_slice(cell) if j >= 0]
+
+    def valid_moves(self, cell: Cell, allowed: Iterable[int] = (FREE,)) -> List[Cell]:
+        """Neighbours of cell whose type is allowed (up, down, left, right order)."""
+        cells, cols = self.cells, self.cols
+        return [divmod(j, cols) for j in self._neighbour_slice(cell) if j >= 0 and cells[j] in allowed]
+
+    # Layers: obstacle and safety_zone are cell types, spawn and delivery are flags
+    def layer(self, name: str) -> bytearray:
+        """Flat 0/1 mask of the cells in a layer."""
+        if name in _TYPE_TABLES:
+            return bytearray(self.cells.translate(_TYPE_TABLES[name]))
+        if name not in _FLAG_TABLES:
+            raise ValueError(f"Unknown layer {name!r}, expected one of {LAYERS}")
+        if self.flags is None:
+            return bytearray(self.rows * self.cols)
+        return bytearray(self.flags.translate(_FLAG_TABLES[name]))
+
+    def layer_cells(self, name: str) -> List[Cell]:
+        mask = self.layer(name)
+        return [divmod(i, self.cols) for i in range(len(mask)) if mask[i]]
+
+    def in_layer(self, name: str, cell: Cell) -> bool:
+        i = cell[0] * self.cols + cell[1]
+        if name == "obstacle":
+            return self.cells[i] == OBSTACLE
+        if name == "safety_zone":
+            return self.cells[i] == SAFETY_ZONE
+        return self.flags is not None and bool(self.flags[i] & _flag(name))
+
+    def mark(self, name: str, cells: Iterable[Cell], on: bool = True) -> None:
+        """Add cells to (or remove them from) the spawn or delivery layer."""
+        bit = _flag(name)
+        if self.flags is None:
+            if not on:
+                return
+            self.flags = bytearray(self.rows * self.cols)
+        for r, c in cells:
+            i = r * self.cols + c
+            self.flags[i] = self.flags[i] | bit if on else self.flags[i] & ~bit
+
+
+def _flag(name: str) -> int:
+    if name == "spawn":
+        return SPAWN
+    if name == "delivery":
+        return DELIVERY
+    raise ValueError(f"Unknown layer {name!r}, expected one of {LAYERS}")
+
+
+def as_grid(grid: Union["Grid", Sequence[Sequence[int]]]) -> Grid:
+    """
+    Pass a Grid through; convert a nested list of cell types to one. Grids with the same cell
+    accessors but other storage (Tiled_Grid.TiledGrid) pass through too.
+    """
+    return grid if isinstance(grid, Grid) or hasattr(grid, "valid_moves") else Grid.from_rows(grid)
@@ -0,0 +1,166 @@
+"""
+Multi-resolution grid pyramid for coarse-to-fine planning.
+
+Level 0 is the open-cell mask of a grid; level k + 1 merges each factor x factor block of level k
+into one cell, open if any cell of the block is open. The levels are built with reshape and any(),
+and upsample repeats cells in bulk the other way (e.g. to scale a hand-drawn layout up).
+
+Any path on the fine grid maps onto open coarse cells, so a coarse search is a cheap, optimistic
+look at the route: if the goal is unreachable on a coarse level it is unreachable on the grid.
+GridPyramid.find_path searches the coarsest level, widens the path found into a corridor (margin
+coarse cells either side), searches the next finer level only inside it, and so on down to the
+grid. A corridor that turns out too narrow is widened, doubling the margin, and in the end the
+whole level is searched, so the result is always a valid path, though not always a shortest one.
+corridor() returns the level-0 corridor as a flat mask, so Distance_Fields.distance_field can
+build a field that only covers the corridor.
+"""
+
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from Connectivity import open_mask
+from Distance_Fields import UNREACHABLE, distance_field
+from Grid import FREE, Grid
+
+Cell = Tuple[int, int]
+
+
+def downsample(mask: np.ndarray, factor: int = 2) -> np.ndarray:
+    """Boolean mask with one cell per factor x factor block, True if any cell of the block is."""
+    rows, cols = mask.shape
+    padded = np.zeros((-(-rows // factor) * factor, -(-cols // factor) * factor), dtype=bool)
+    padded[:rows, :cols] = mask
+    return padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor).any(axis=(1, 3))
+
+
+def upsample(cells: Union[Grid, np.ndarray], factor: int = 2) -> Union[Grid, np.ndarray]:
+    """Repeat every cell into a factor x factor block (a Grid gives a Grid)."""
+    array = cells.array() if isinstance(cells, Grid) else np.asarray(cells)
+    scaled = np.repeat(np.repeat(array, factor, axis=0), factor, axis=1)
+    if isinstance(cells, Grid):
+        return Grid(scaled.shape[0], scaled.shape[1], scaled.tobytes())
+    return scaled
+
+
+def descend(dist, rows: int, cols: int, start: Cell, goal: Cell) -> List[Cell]:
+    """
+    Follow a distance field towards its source from start (which need not be open) to goal,
+    inclusive; [] if start cannot reach it.
+    """
+    path = [start]
+    current = start
+    while current != goal:
+        r, c = current
+        best, best_dist = None, UNREACHABLE
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < rows and 0 <= nc < cols:
+                d = dist[nr * cols + nc]
+                if d != UNREACHABLE and (best is None or d < best_dist):
+                    best, best_dist = (nr, nc), d
+        if best is None or len(path) > rows * cols:
+            return []
+        path.append(best)
+        current = best
+    return path
+
+
+class GridPyramid:
+    def __init__(self, grid, factor: int = 2, min_size: int = 8, allowed: Iterable[int] = (FREE,)):
+        """
+        Levels of the cells whose type is allowed (free cells by default, as in Distance_Fields),
+        halved (for factor 2) until the coarsest level is at most min_size cells on its longer side.
+        """
+        if factor < 2:
+            raise ValueError("factor must be at least 2")
+        self.factor = factor
+        self.allowed = frozenset(allowed)
+        self.levels: List[np.ndarray] = [open_mask(grid, self.allowed)]
+        while max(self.levels[-1].shape) > min_size:
+            self.levels.append(downsample(self.levels[-1], factor))
+
+    def set_cell(self, cell: Cell, value: int) -> None:
+        """Record a grid edit; one cell per level is recomputed."""
+        r, c = cell
+        f = self.factor
+        self.levels[0][r, c] = value in self.allowed
+        for k in range(1, len(self.levels)):
+            r, c = r // f, c // f
+            self.levels[k][r, c] = self.levels[k - 1][r * f:(r + 1) * f, c * f:(c + 1) * f].any()
+
+    def _to_level(self, cell: Cell, k: int) -> Cell:
+        scale = self.factor ** k
+        return cell[0] // scale, cell[1] // scale
+
+    def _search(self, k: int, allowed: np.ndarray, start: Cell, goal: Cell) -> List[Cell]:
+        rows, cols = allowed.shape
+        free = allowed.tobytes()
+        dist = distance_field(free, rows, cols, [goal] if free[goal[0] * cols + goal[1]] else [])
+        return descend(dist, rows, cols, start, goal)
+
+    def _corridor(self, path: List[Cell], k: int, margin: int) -> np.ndarray:
+        """Open cells of level k under the level k + 1 path, widened by margin coarse cells."""
+        coarse = np.zeros(self.levels[k + 1].shape, dtype=bool)
+        rows, cols = zip(*path)
+        coarse[rows, cols] = True
+        widened = coarse.copy()
+        for shift in range(1, margin + 1):
+            widened[shift:] |= coarse[:-shift]
+            widened[:-shift] |= coarse[shift:]
+        band = widened.copy()
+        for shift in range(1, margin + 1):
+            band[:, shift:] |= widened[:, :-shift]
+            band[:, :-shift] |= widened[:, shift:]
+        level = self.levels[k]
+        return upsample(band, self.factor)[:level.shape[0], :level.shape[1]] & level
+
+    def _search_corridor(self, k: int, coarse_path: List[Cell], start: Cell, goal: Cell, margin: int) -> List[Cell]:
+        """Search level k along a level k + 1 path, doubling the margin while the corridor is too narrow."""
+        widest = max(self.levels[k + 1].shape)
+        while margin < widest:
+            path = self._search(k, self._corridor(coarse_path, k, margin), start, goal)
+            if path:
+                return path
+            margin *= 2
+        return self._search(k, self.levels[k], start, goal)
+
+    def _refine(self, start: Cell, goal: Cell, stop: int, margin: int) -> List[Cell]:
+        """Coarse-to-fine path from the top level down to level stop, in that level's cells."""
+        path: List[Cell] = []
+        for k in range(len(self.levels) - 1, stop - 1, -1):
+            s, g = self._to_level(start, k), self._to_level(goal, k)
+            if path:
+                path = self._search_corridor(k, path, s, g, margin)
+            else:
+                path = self._search(k, self.levels[k], s, g)
+            if not path:
+                return []
+        return path
+
+    def _check(self, start: Cell, goal: Cell) -> bool:
+        rows, cols = self.levels[0].shape
+        return 0 <= start[0] < rows and 0 <= start[1] < cols and 0 <= goal[0] < rows and 0 <= goal[1] < cols \
+            and bool(self.levels[0][goal])
+
+    def corridor(self, start: Cell, goal: Cell, margin: int = 1) -> Optional[bytearray]:
+        """
+        Flat level-0 mask of the open cells along the coarse route from start to goal, for
+        distance_field; None if the goal is off the map, blocked, or unreachable already on a
+        coarse level. (The coarse levels are optimistic: a corridor does not promise a path.)
+        """
+        if not self._check(start, goal):
+            return None
+        if len(self.levels) == 1:
+            return bytearray(self.levels[0].tobytes())
+        path = self._refine(start, goal, 1, margin)
+        if not path:
+            return None
+        return bytearray(self._corridor(path, 0, margin).tobytes())
+
+    def find_path(self, start: Cell, goal: Cell, margin: int = 1) -> List[Cell]:
+        """A path from start to goal inclusive (like Warehouse_Test.find_path), [] if there is none."""
+        if start == goal:
+            return [start]
+        if not self._check(start, goal):
+            return []
+        return self._refine(start, goal, 0, margin)
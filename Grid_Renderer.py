@@ -0,0 +1,128 @@
+"""
+Cached, dirty-rectangle renderer for the grid environments.
+
+Obstacles, safety zones and grid lines are painted once into a background surface. Each frame,
+render() compares the agents/items drawn last frame with the current ones and repaints only the
+cells that were left or entered, so the cost of a frame depends on how many agents moved rather
+than on the area of the grid.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import pygame
+
+Cell = Tuple[int, int]
+# What to draw in a cell: ("circle" | "rect", color)
+Sprite = Tuple[str, Tuple[int, ...]]
+
+
+class GridRenderer:
+    def __init__(self, screen: pygame.Surface, rows: int, cols: int, cell_size: int,
+                 background_color: Tuple[int, ...], grid_line_color: Tuple[int, ...]):
+        self.screen = screen
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.background_color = background_color
+        self.grid_line_color = grid_line_color
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(background_color)
+        # One translucent cell surface per color, instead of a new Surface for every cell
+        self._overlays: Dict[Tuple[int, ...], pygame.Surface] = {}
+        self._static: Dict[Cell, Tuple[int, ...]] = {}
+        self._sprites: Dict[Cell, Sprite] = {}
+        self._dirty_static = set()
+        self._full_redraw = True
+        self._draw_grid_lines()
+
+    def cell_rect(self, cell: Cell) -> pygame.Rect:
+        """Screen rectangle of a (row, col) cell, including its right and bottom grid lines."""
+        return pygame.Rect(cell[1] * self.cell_size, cell[0] * self.cell_size, self.cell_size + 1, self.cell_size + 1)
+
+    def paint_static(self, cells: Iterable[Cell], color: Tuple[int, ...]) -> None:
+        """Paint cells into the cached background (colors with an alpha channel are blended)."""
+        for cell in cells:
+            self._static[cell] = color
+            self._paint_background_cell(cell)
+        self._full_redraw = True
+
+    def set_static_cell(self, cell: Cell, color: Optional[Tuple[int, ...]]) -> None:
+        """Change one background cell (None clears it); only that cell is repainted next frame."""
+        if color is None:
+            self._static.pop(cell, None)
+        else:
+            self._static[cell] = color
+        self._paint_background_cell(cell)
+        self._dirty_static.add(cell)
+
+    def invalidate(self) -> None:
+        """Repaint the whole window on the next frame (e.g. after the window was exposed)."""
+        self._full_redraw = True
+
+    def render(self, sprites: Dict[Cell, Sprite]) -> None:
+        """Draw the given agents/items and push only the changed cells to the display."""
+        if self._full_redraw:
+            self.screen.blit(self.background, (0, 0))
+            for cell, sprite in sprites.items():
+                self._draw_sprite(cell, sprite)
+            pygame.display.flip()
+            self._full_redraw = False
+            self._dirty_static.clear()
+            self._sprites = dict(sprites)
+            return
+
+        dirty = set(self._dirty_static)
+        self._dirty_static.clear()
+        for cell, sprite in self._sprites.items():
+            if sprites.get(cell) != sprite:
+                dirty.add(cell)
+        for cell, sprite in sprites.items():
+            if self._sprites.get(cell) != sprite:
+                dirty.add(cell)
+
+        rects = []
+        for cell in dirty:
+            rect = self.cell_rect(cell)
+            self.screen.blit(self.background, rect, rect)
+            if cell in sprites:
+                self._draw_sprite(cell, sprites[cell])
+            rects.append(rect)
+        self._sprites = dict(sprites)
+        if rects:
+            pygame.display.update(rects)
+
+    def _overlay(self, color: Tuple[int, ...]) -> pygame.Surface:
+        surface = self._overlays.get(color)
+        if surface is None:
+            surface = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
+            surface.fill(color)
+            self._overlays[color] = surface
+        return surface
+
+    def _paint_background_cell(self, cell: Cell) -> None:
+        x, y = cell[1] * self.cell_size, cell[0] * self.cell_size
+        self.background.fill(self.background_color, (x, y, self.cell_size, self.cell_size))
+        color = self._static.get(cell)
+        if color is not None:
+            if len(color) == 4:
+                self.background.blit(self._overlay(color), (x, y))
+            else:
+                self.background.fill(color, (x, y, self.cell_size, self.cell_size))
+        pygame.draw.rect(self.background, self.grid_line_color, self.cell_rect(cell), 1)
+
+    def _draw_grid_lines(self) -> None:
+        width, height = self.cols * self.cell_size, self.rows * self.cell_size
+        for i in range(self.cols + 1):
+            pygame.draw.line(self.background, self.grid_line_color, (i * self.cell_size, 0), (i * self.cell_size, height))
+        for i in range(self.rows + 1):
+            pygame.draw.line(self.background, self.grid_line_color, (0, i * self.cell_size), (width, i * self.cell_size))
+
+    def _draw_sprite(self, cell: Cell, sprite: Sprite) -> None:
+        shape, color = sprite
+        x, y = cell[1] * self.cell_size, cell[0] * self.cell_size
+        if shape == "circle":
+            pygame.draw.circle(self.screen, color, (x + self.cell_size // 2, y + self.cell_size // 2), self.cell_size // 3)
+        else:
+            self.screen.fill(color, (x, y, self.cell_size, self.cell_size))
+            # Filled cells cover their grid lines; stroke them again as the full redraw did
+            pygame.draw.rect(self.screen, self.grid_line_color, self.cell_rect(cell), 1)
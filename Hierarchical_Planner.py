@@ -0,0 +1,336 @@
+"""
+Hierarchical path planning (HPA*) for very large 4-connected grid maps.
+
+The map is cut into square clusters. Wherever two neighbouring clusters share a run of cells that are
+open on both sides of their border, the run is an entrance, and one or two transitions across it (the
+middle of a short run, both ends of a long one) become nodes of an abstract graph. Nodes are joined by
+an edge of cost 1 across the border and, inside each cluster, by edges weighted with the length of the
+shortest path between them that stays in the cluster.
+
+A query links the start and goal to the nodes of their clusters with a local search, runs A* on the
+abstract graph, then refines each abstract edge into cells with a search confined to one cluster. Both
+the abstract and the local searches stay small however large the map is. Paths are near-shortest: they
+cross cluster borders only at transitions, and a query whose ends share a cluster returns the path
+inside the cluster when there is one.
+
+Entrances are found for the whole map at construction with NumPy. Intra-cluster edges are computed the
+first time a search enters a cluster and cached, as are refined paths between nodes. set_cell()
+rescans only the borders of the edited cluster and drops what was cached for that cluster, and for a
+neighbour only if their shared border changed, so an edit costs one cluster's worth of work.
+
+Reference: A. Botea, M. Mueller and J. Schaeffer, "Near Optimal Hierarchical Path-Finding",
+Journal of Game Development, 2004.
+"""
+
+import heapq
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from Grid import as_grid
+
+Cell = Tuple[int, int]
+Cluster = Tuple[int, int]
+# ("row", k, cc): the border above cluster row k in cluster column cc; ("col", cr, k) likewise left of column k
+Border = Tuple[str, int, int]
+
+# Entrances at least this wide get a transition at each end instead of one in the middle
+WIDE_ENTRANCE = 6
+
+
+class HierarchicalPlanner:
+    def __init__(self, grid, cluster_size: int = 16):
+        if cluster_size < 2:
+            raise ValueError("cluster_size must be at least 2")
+        grid = as_grid(grid)
+        self.rows, self.cols = grid.rows, grid.cols
+        # Obstacles are cells with value 1, as in find_path
+        self.free = grid.passable_mask()
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-self.rows // cluster_size)
+        self.cluster_cols = -(-self.cols // cluster_size)
+        # Transitions (pairs of flat indices, one on each side) per border, and each node's partners
+        self._transitions: Dict[Border, List[Tuple[int, int]]] = {}
+        self._inter: Dict[int, List[int]] = {}
+        self._nodes: Dict[Cluster, Set[int]] = {}
+        # Abstract edges (neighbour, cost) per node: intra-cluster edges weighted with the path length
+        # inside the cluster, plus the cost-1 crossings. Built per cluster on first use; _built holds
+        # the nodes each built cluster contributed, so they can be dropped together
+        self._edges: Dict[int, List[Tuple[int, int]]] = {}
+        self._built: Dict[Cluster, List[int]] = {}
+        # Refined node-to-node paths per cluster, filled in as queries use them
+        self._paths: Dict[Cluster, Dict[Tuple[int, int], List[int]]] = {}
+        # Abstract nodes expanded by the last query
+        self.expanded = 0
+        self._scan_all_borders()
+
+    # Abstraction
+    def cluster_of(self, cell: Cell) -> Cluster:
+        return cell[0] // self.cluster_size, cell[1] // self.cluster_size
+
+    def _bounds(self, cluster: Cluster) -> Tuple[int, int, int, int]:
+        """First and one-past-last row and column of a cluster."""
+        size = self.cluster_size
+        r0, c0 = cluster[0] * size, cluster[1] * size
+        return r0, min(r0 + size, self.rows), c0, min(c0 + size, self.cols)
+
+    def _borders_of(self, cluster: Cluster) -> List[Border]:
+        cr, cc = cluster
+        borders = []
+        if cr > 0:
+            borders.append(("row", cr, cc))
+        if cr + 1 < self.cluster_rows:
+            borders.append(("row", cr + 1, cc))
+        if cc > 0:
+            borders.append(("col", cr, cc))
+        if cc + 1 < self.cluster_cols:
+            borders.append(("col", cr, cc + 1))
+        return borders
+
+    def _scan_all_borders(self) -> None:
+        """Find the transitions of every border, one vectorized pass per border line."""
+        free = np.frombuffer(self.free, dtype=np.uint8).reshape(self.rows, self.cols).astype(bool)
+        size = self.cluster_size
+        for k in range(1, self.cluster_rows):
+            both = free[k * size - 1] & free[k * size]
+            for segment, offset in _transition_offsets(both, size):
+                c = segment * size + offset
+                self._add_transition(("row", k, segment), (k * size - 1) * self.cols + c, k * size * self.cols + c)
+        for k in range(1, self.cluster_cols):
+            both = free[:, k * size - 1] & free[:, k * size]
+            for segment, offset in _transition_offsets(both, size):
+                r = segment * size + offset
+                self._add_transition(("col", segment, k), r * self.cols + k * size - 1, r * self.cols + k * size)
+
+    def _scan_border(self, border: Border) -> List[Tuple[int, int]]:
+        """The transitions a single border should have given the current free mask."""
+        free = np.frombuffer(self.free, dtype=np.uint8).reshape(self.rows, self.cols)
+        kind, a, b = border
+        size, cols = self.cluster_size, self.cols
+        if kind == "row":
+            start = b * size
+            line = slice(start, min(start + size, cols))
+            both = (free[a * size - 1, line] & free[a * size, line]).astype(bool)
+            return [((a * size - 1) * cols + start + offset, a * size * cols + start + offset)
+                    for _, offset in _transition_offsets(both, size)]
+        start = a * size
+        line = slice(start, min(start + size, self.rows))
+        both = (free[line, b * size - 1] & free[line, b * size]).astype(bool)
+        return [((start + offset) * cols + b * size - 1, (start + offset) * cols + b * size)
+                for _, offset in _transition_offsets(both, size)]
+
+    def _cluster_of_index(self, i: int) -> Cluster:
+        r, c = divmod(i, self.cols)
+        return r // self.cluster_size, c // self.cluster_size
+
+    def _add_transition(self, border: Border, a: int, b: int) -> None:
+        self._transitions.setdefault(border, []).append((a, b))
+        for node, partner in ((a, b), (b, a)):
+            self._inter.setdefault(node, []).append(partner)
+            self._nodes.setdefault(self._cluster_of_index(node), set()).add(node)
+
+    def _remove_transition(self, border: Border, a: int, b: int) -> None:
+        self._transitions[border].remove((a, b))
+        for node, partner in ((a, b), (b, a)):
+            partners = self._inter[node]
+            partners.remove(partner)
+            if not partners:
+                del self._inter[node]
+                self._nodes[self._cluster_of_index(node)].discard(node)
+
+    def _adjacency(self, node: int) -> List[Tuple[int, int]]:
+        """Abstract edges of a cell, building its cluster's edges first if needed ([] for non-nodes)."""
+        edges = self._edges.get(node)
+        if edges is None:
+            cluster = self._cluster_of_index(node)
+            if cluster in self._built:
+                return []
+            nodes = list(self._nodes.get(cluster, ()))
+            for n in nodes:
+                distances, _ = self._local_search(n, cluster)
+                self._edges[n] = [(other, distances[other]) for other in nodes if other != n and other in distances] \
+                    + [(partner, 1) for partner in self._inter[n]]
+            self._built[cluster] = nodes
+            edges = self._edges.get(node, [])
+        return edges
+
+    def _invalidate(self, cluster: Cluster) -> None:
+        for node in self._built.pop(cluster, ()):
+            del self._edges[node]
+        self._paths.pop(cluster, None)
+
+    def set_cell(self, cell: Cell, value: int) -> None:
+        """Edit one cell (value 1 blocks it) and rebuild the abstraction around its cluster."""
+        i = cell[0] * self.cols + cell[1]
+        if self.free[i] == (value != 1):
+            return
+        self.free[i] = value != 1
+        cluster = self.cluster_of(cell)
+        self._invalidate(cluster)
+        for border in self._borders_of(cluster):
+            old = self._transitions.get(border, [])
+            new = self._scan_border(border)
+            if new == old:
+                continue
+            for a, b in list(old):
+                self._remove_transition(border, a, b)
+            for a, b in new:
+                self._add_transition(border, a, b)
+            # The cluster on the other side gained or lost nodes
+            for a, b in new + old:
+                self._invalidate(self._cluster_of_index(a))
+                self._invalidate(self._cluster_of_index(b))
+
+    # Searches
+    def _local_search(self, source: int, cluster: Cluster,
+                      target: Optional[int] = None) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """BFS from source confined to cluster: distances and parents, stopping early at target."""
+        r0, r1, c0, c1 = self._bounds(cluster)
+        free, cols = self.free, self.cols
+        distance = {source: 0}
+        parent = {source: -1}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                break
+            r, c = divmod(current, cols)
+            step = distance[current] + 1
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if r0 <= nr < r1 and c0 <= nc < c1:
+                    n = nr * cols + nc
+                    if free[n] and n not in distance:
+                        distance[n] = step
+                        parent[n] = current
+                        queue.append(n)
+        return distance, parent
+
+    def _local_path(self, source: int, target: int) -> List[int]:
+        """Flat indices of a shortest path inside source's cluster, source excluded; [] if none."""
+        _, parent = self._local_search(source, self._cluster_of_index(source), target)
+        if target not in parent:
+            return []
+        path = []
+        while target != source:
+            path.append(target)
+            target = parent[target]
+        path.reverse()
+        return path
+
+    def _abstract_search(self, start: int, goal: int, start_edges: Dict[int, int],
+                         goal_edges: Dict[int, int]) -> List[int]:
+        """A* over the abstract graph plus the start and goal; the node sequence, [] if unreachable."""
+        cols = self.cols
+        gr, gc = divmod(goal, cols)
+        sr, sc = divmod(start, cols)
+        g_score = {start: 0}
+        parent = {start: -1}
+        # Ties on f go to the deeper entry (larger g), which keeps A* from fanning out on open floors
+        heap = [(abs(sr - gr) + abs(sc - gc), 0, start)]
+        self.expanded = 0
+        while heap:
+            _, g, node = heapq.heappop(heap)
+            g = -g
+            if g > g_score[node]:
+                continue
+            if node == goal:
+                path = []
+                while node != -1:
+                    path.append(node)
+                    node = parent[node]
+                path.reverse()
+                return path
+            self.expanded += 1
+            edges: List[Iterable[Tuple[int, int]]] = [self._adjacency(node)]
+            if node == start:
+                edges.append(start_edges.items())
+            if node in goal_edges:
+                edges.append(((goal, goal_edges[node]),))
+            for group in edges:
+                for neighbour, cost in group:
+                    new_g = g + cost
+                    if new_g < g_score.get(neighbour, new_g + 1):
+                        g_score[neighbour] = new_g
+                        parent[neighbour] = node
+                        r, c = divmod(neighbour, cols)
+                        heapq.heappush(heap, (new_g + abs(r - gr) + abs(c - gc), -new_g, neighbour))
+        return []
+
+    def find_path(self, start: Cell, goal: Cell) -> List[Cell]:
+        """
+        A near-shortest path from start to goal inclusive (same format as Warehouse_Test.find_path),
+        [] if the goal is unreachable, off the map or blocked.
+        """
+        if start == goal:
+            return [start]
+        if not (0 <= start[0] < self.rows and 0 <= start[1] < self.cols):
+            return []
+        if not (0 <= goal[0] < self.rows and 0 <= goal[1] < self.cols):
+            return []
+        cols = self.cols
+        s, t = start[0] * cols + start[1], goal[0] * cols + goal[1]
+        if not self.free[t]:
+            return []
+        if not self.free[s]:
+            # A blocked start (e.g. a robot on a cell that just filled up) can only leave through a free
+            # neighbour, which may lie in another cluster: plan from each and keep the shortest
+            exits = [(r, c) for r, c in ((start[0] - 1, start[1]), (start[0] + 1, start[1]),
+                                         (start[0], start[1] - 1), (start[0], start[1] + 1))
+                     if 0 <= r < self.rows and 0 <= c < cols and self.free[r * cols + c]]
+            paths = [path for path in (self.find_path(cell, goal) for cell in exits) if path]
+            return [start] + min(paths, key=len) if paths else []
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+        if start_cluster == goal_cluster:
+            local = self._local_path(s, t)
+            if local:
+                return [start] + [divmod(i, cols) for i in local]
+
+        start_distances, _ = self._local_search(s, start_cluster)
+        start_edges = {node: start_distances[node] for node in self._nodes.get(start_cluster, ())
+                       if node in start_distances}
+        goal_distances, _ = self._local_search(t, goal_cluster)
+        goal_edges = {node: goal_distances[node] for node in self._nodes.get(goal_cluster, ())
+                      if node in goal_distances}
+        nodes = self._abstract_search(s, t, start_edges, goal_edges)
+        if not nodes:
+            return []
+
+        # Refine: steps across borders are single moves, everything else stays inside one cluster
+        path = [s]
+        for a, b in zip(nodes, nodes[1:]):
+            if a == b:
+                continue
+            cluster = self._cluster_of_index(a)
+            if cluster != self._cluster_of_index(b):
+                path.append(b)
+            elif a == s or b == t:
+                path.extend(self._local_path(a, b))
+            else:
+                cache = self._paths.setdefault(cluster, {})
+                if (a, b) not in cache:
+                    cache[(a, b)] = self._local_path(a, b)
+                path.extend(cache[(a, b)])
+        return [divmod(i, cols) for i in path]
+
+
+def _transition_offsets(both: np.ndarray, size: int) -> List[Tuple[int, int]]:
+    """
+    Transitions along one border line: both[i] is True where the cells on both sides of the border are
+    open. The line is split into segments of size cells (one per cluster pair); returns (segment, offset
+    within the segment) for the middle of each short entrance and both ends of each wide one.
+    """
+    n_segments = -(-len(both) // size)
+    line = np.zeros(n_segments * size, dtype=np.int8)
+    line[:len(both)] = both
+    # Closed padding at both ends of every segment, so runs never span two segments
+    padded = np.zeros((n_segments, size + 2), dtype=np.int8)
+    padded[:, 1:-1] = line.reshape(n_segments, size)
+    change = np.diff(padded.ravel())
+    first = np.flatnonzero(change == 1) + 1  # first open cell of each run (padded coordinates)
+    last = np.flatnonzero(change == -1)  # last open cell of each run
+    width = last - first + 1
+    wide = width >= WIDE_ENTRANCE
+    positions = np.concatenate([first[~wide] + (width[~wide] - 1) // 2, first[wide], last[wide]])
+    positions.sort()
+    return [(int(p) // (size + 2), int(p) % (size + 2) - 1) for p in positions]
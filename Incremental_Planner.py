@@ -0,0 +1,199 @@
+"""
+Incremental replanning with D* Lite for robots on a grid whose cells flip between free and blocked.
+
+A DStarLite instance belongs to one robot and one goal. It searches backwards from the goal, so as the
+robot moves only the heuristic offset changes, and when cells flip (e.g. a delivered package becomes an
+obstacle, or a cleared one frees its cell) only the cells whose distance to the goal actually changed are
+re-expanded. A replan therefore costs roughly the size of the change rather than the size of the map.
+
+The planner reads a flat free mask (non-zero = passable, as built by Distance_Fields.free_mask) shared
+with its owner: edit the mask, then pass the edited cells to cells_changed().
+
+A robot keeps one instance and re-roots it with reset() when its goal changes. Given the goal's
+distance field (e.g. from a Distance_Fields.DistanceFieldCache shared by all robots), the search
+starts out already solved: the field is exactly the g and rhs values D* Lite would compute, so it is
+used as read-only base values and only cells repaired since then are stored. Without a field the
+first query searches from the goal as usual.
+
+Reference: S. Koenig and M. Likhachev, "D* Lite", AAAI 2002 (the optimized version, without
+the key comparisons of the basic version).
+"""
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from Distance_Fields import UNREACHABLE
+
+Cell = Tuple[int, int]
+INF = math.inf
+
+# Up, down, left, right (the neighbour order used by Warehouse_Test.find_path)
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class DStarLite:
+    def __init__(self, free, rows: int, cols: int, start: Cell, goal: Cell, field: Optional[Sequence[int]] = None):
+        self.free = free
+        self.rows, self.cols = rows, cols
+        # Cells expanded since construction (a measure of planning work)
+        self.expanded = 0
+        self.reset(start, goal, field)
+
+    def reset(self, start: Cell, goal: Cell, field: Optional[Sequence[int]] = None) -> None:
+        """
+        Re-root the search at a new goal. field, if given, holds every cell's distance to goal in the
+        current free mask (UNREACHABLE where there is none); it is read, never modified.
+        """
+        self.goal = goal
+        self.start = start
+        self._last = start
+        self._km = 0
+        self._base = field
+        # Values that differ from the base (all of them without a field)
+        self._g: Dict[Cell, float] = {}
+        self._rhs: Dict[Cell, float] = {goal: 0}
+        # Lazy-deletion heap: an entry is current only if it matches _open[cell]
+        self._heap: List[Tuple[Tuple[float, float], Cell]] = []
+        self._open: Dict[Cell, Tuple[float, float]] = {}
+        if self._g_of(goal) != 0:
+            self._push(goal)
+
+    def _base_value(self, cell: Cell) -> float:
+        if self._base is None:
+            return INF
+        d = self._base[cell[0] * self.cols + cell[1]]
+        return INF if d == UNREACHABLE else d
+
+    def _g_of(self, cell: Cell) -> float:
+        g = self._g.get(cell)
+        return self._base_value(cell) if g is None else g
+
+    def _rhs_of(self, cell: Cell) -> float:
+        rhs = self._rhs.get(cell)
+        return self._base_value(cell) if rhs is None else rhs
+
+    def _h(self, cell: Cell) -> int:
+        return abs(cell[0] - self.start[0]) + abs(cell[1] - self.start[1])
+
+    def _key(self, cell: Cell) -> Tuple[float, float]:
+        m = min(self._g_of(cell), self._rhs_of(cell))
+        return (m + self._h(cell) + self._km, m)
+
+    def _push(self, cell: Cell) -> None:
+        key = self._key(cell)
+        self._open[cell] = key
+        heapq.heappush(self._heap, (key, cell))
+
+    def _neighbours(self, cell: Cell) -> Iterable[Cell]:
+        for dr, dc in DIRECTIONS:
+            r, c = cell[0] + dr, cell[1] + dc
+            if 0 <= r < self.rows and 0 <= c < self.cols:
+                yield r, c
+
+    def _cost_to_goal(self, cell: Cell) -> float:
+        """Cheapest one-step lookahead: enter a free neighbour, then follow its g value."""
+        best = INF
+        free, cols = self.free, self.cols
+        for n in self._neighbours(cell):
+            if free[n[0] * cols + n[1]]:
+                best = min(best, 1 + self._g_of(n))
+        return best
+
+    def _update(self, cell: Cell) -> None:
+        if cell != self.goal:
+            self._rhs[cell] = self._cost_to_goal(cell)
+        self._open.pop(cell, None)
+        if self._g_of(cell) != self._rhs_of(cell):
+            self._push(cell)
+
+    def _top(self) -> Optional[Tuple[Tuple[float, float], Cell]]:
+        heap = self._heap
+        while heap and self._open.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _compute(self) -> None:
+        start = self.start
+        while True:
+            top = self._top()
+            if top is None:
+                return
+            key, cell = top
+            if key >= self._key(start) and self._rhs_of(start) == self._g_of(start):
+                return
+            new_key = self._key(cell)
+            if key < new_key:
+                self._push(cell)
+                continue
+            heapq.heappop(self._heap)
+            del self._open[cell]
+            self.expanded += 1
+            g, rhs = self._g_of(cell), self._rhs_of(cell)
+            if g > rhs:
+                self._g[cell] = rhs
+                for n in self._neighbours(cell):
+                    self._update(n)
+            else:
+                self._g[cell] = INF
+                self._update(cell)
+                for n in self._neighbours(cell):
+                    self._update(n)
+
+    def move_to(self, pos: Cell) -> None:
+        """Tell the planner where the robot is now."""
+        if pos != self.start:
+            self._km += abs(pos[0] - self._last[0]) + abs(pos[1] - self._last[1])
+            self._last = pos
+            self.start = pos
+
+    def cells_changed(self, cells: Iterable[Cell]) -> None:
+        """Cells whose free/blocked state changed in the shared mask; repaired on the next query."""
+        for cell in cells:
+            # Entering the cell got cheaper or dearer, which changes its neighbours' lookahead;
+            # the cell's own value is rechecked too (a base field leaves blocked cells unsolved)
+            self._update(cell)
+            for n in self._neighbours(cell):
+                self._update(n)
+
+    def distance(self) -> float:
+        """Steps from the robot's position to the goal (math.inf if unreachable)."""
+        if self.start == self.goal:
+            return 0
+        self._compute()
+        return self._cost_to_goal(self.start)
+
+    def next_step(self) -> Optional[Cell]:
+        """The next cell on a shortest path from the robot to the goal; None at the goal or if unreachable."""
+        if self.start == self.goal:
+            return None
+        self._compute()
+        best, best_cost = None, INF
+        free, cols = self.free, self.cols
+        for n in self._neighbours(self.start):
+            if free[n[0] * cols + n[1]]:
+                cost = 1 + self._g_of(n)
+                if cost < best_cost:
+                    best, best_cost = n, cost
+        return best
+
+    def path(self) -> List[Cell]:
+        """A shortest path from the robot's position to the goal inclusive, [] if there is none."""
+        if self.start == self.goal:
+            return [self.start]
+        self._compute()
+        path = [self.start]
+        current = self.start
+        free, cols = self.free, self.cols
+        while current != self.goal:
+            best, best_cost = None, INF
+            for n in self._neighbours(current):
+                if free[n[0] * cols + n[1]]:
+                    cost = 1 + self._g_of(n)
+                    if cost < best_cost:
+                        best, best_cost = n, cost
+            if best is None or len(path) > self.rows * self.cols:
+                return []
+            path.append(best)
+            current = best
+        return path
@@ -1,10 +1,19 @@
 import pygame
 import sys
 import random
-from typing import List, Tuple, Set
+from typing import List, Tuple, Set, Optional
 from dataclasses import dataclass
 from enum import Enum
 import time
+import argparse
+from array import array
+import numpy as np
+import Movement_Kernel
+from Grid_Renderer import GridRenderer
+from Scheduler import FixedTimestepScheduler
+from Conflict_Resolver import resolve_simultaneous_moves
+from Grid import FREE, Grid
+from Trajectory_Recorder import TrajectoryReader, TrajectoryWriter, replay
 
 # Game Constants
 GRID_SIZE = 10
@@ -14,6 +23,8 @@ NUM_COPS = 4
 NUM_ROBBERS = 4
 MAX_SAFETY_ZONE_STEPS = 2
 MOVE_INTERVAL = 1.0  # Time between moves in seconds
+# Zone lookup tables carry a one-cell border so neighbours of edge cells can be looked up without bounds checks
+PADDED_SIZE = GRID_SIZE + 2
 
 # Colors
 COLORS = {
@@ -37,24 +48,31 @@ class Agent:
     safety_zone_steps: int = 0
 
 class CopsAndRobbersGame:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
-        pygame.display.set_caption("Cops and Robbers Game")
+    def __init__(self, headless: bool = False, cop_strategy: str = "chase", robber_strategy: str = "escape"):
+        # Headless games never touch the display, so they can be stepped as fast as the CPU allows
+        self.headless = headless
+        if not headless:
+            pygame.init()
+            self.screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
+            pygame.display.set_caption("Cops and Robbers Game")
         
+        # Named movement strategies, see Movement_Kernel.COP_STRATEGIES / ROBBER_STRATEGIES
+        self.cop_strategy = cop_strategy
+        self.robber_strategy = robber_strategy
         self.grid = self.generate_grid()
+        self.free_grid = self.grid.array() == FREE
         self.safety_zones = self.generate_safety_zones()
         # Initialize cops first so that robbers can be placed safely (not adjacent to any cop)
         self.cops = self.initialize_agents(NUM_COPS, AgentType.COP)
         self.robbers = self.initialize_agents(NUM_ROBBERS, AgentType.ROBBER)
         
-        self.clock = pygame.time.Clock()
+        self.tick = 0
+        self.recorder = None
         self.running = True
-        self.last_move_time = time.time()
 
-    def generate_grid(self) -> List[List[int]]:
+    def generate_grid(self) -> Grid:
         """Generate the game grid with obstacles"""
-        return [
+        return Grid.from_rows([
             [0, 0, 1, 0, 0, 0, 1, 0, 0, 0],
             [0, 1, 1, 0, 0, 0, 0, 0, 1, 0],
             [0, 0, 0, 0, 1, 1, 0, 0, 0, 0],
@@ -65,7 +83,7 @@ class CopsAndRobbersGame:
             [0, 1, 0, 0, 0, 1, 0, 0, 1, 0],
             [0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
             [0, 0, 1, 0, 0, 0, 0, 0, 0, 0]
-        ]
+        ])
 
     def generate_safety_zones(self) -> List[Set[Tuple[int, int]]]:
         """Generate two 2x2 safety zones"""
@@ -79,54 +97,73 @@ class CopsAndRobbersGame:
 
     def initialize_agents(self, num_agents: int, agent_type: AgentType) -> List[Agent]:
         """Initialize agents at random valid positions.
-           For robbers, ensure that they are not adjacent to any cop.
+           Positions are sampled directly from the admissible cells: free cells that are not in or
+           adjacent to a safety zone and, for robbers, not adjacent to any cop (initial safety condition).
+           Raises ValueError right away if there are fewer admissible cells than agents.
         """
-        agents = []
-        occupied_positions = set()
-        attempts = 0
-        
-        while len(agents) < num_agents:
-            attempts += 1
-            if attempts > 1000:
-                raise Exception("Too many attempts to place agents. Adjust grid or constraints.")
-            x = random.randint(0, GRID_SIZE - 1)
-            y = random.randint(0, GRID_SIZE - 1)
-            pos = (x, y)
-            if not self.is_valid_position(pos) or pos in occupied_positions:
-                continue
-            if self.is_in_or_adjacent_to_safety_zone(pos):
-                continue
-            # For robbers, also ensure they are not adjacent to any cop (satisfies initial safety condition)
-            if agent_type == AgentType.ROBBER:
-                if any(abs(x - cop.pos[0]) <= 1 and abs(y - cop.pos[1]) <= 1 for cop in self.cops):
-                    continue
-            agents.append(Agent(pos, agent_type))
-            occupied_positions.add(pos)
-                    
-        return agents
+        admissible = self.free_grid & ~self.cop_forbidden_grid
+        if agent_type == AgentType.ROBBER:
+            cop_positions = np.array([cop.pos for cop in self.cops], dtype=np.int64).reshape(-1, 2)
+            admissible &= ~Movement_Kernel.agent_halo(cop_positions, admissible.shape)
+        cells = np.flatnonzero(admissible)
+        if len(cells) < num_agents:
+            raise ValueError(f"Cannot place {num_agents} {agent_type.value}s: only {len(cells)} admissible cells. "
+                             "Adjust grid or constraints.")
+        # Sampling indices from a range keeps this O(num_agents) after the mask is built
+        chosen = cells[random.sample(range(len(cells)), num_agents)]
+        return [Agent((int(i) // GRID_SIZE, int(i) % GRID_SIZE), agent_type) for i in chosen]
 
     def is_valid_position(self, pos: Tuple[int, int]) -> bool:
         """Check if position is within bounds and not an obstacle"""
-        x, y = pos
-        return (0 <= x < GRID_SIZE and 
-                0 <= y < GRID_SIZE and 
-                self.grid[x][y] == 0)
+        return self.grid.is_valid_position(pos)
+
+    @property
+    def safety_zones(self) -> List[Set[Tuple[int, int]]]:
+        return self._safety_zones
+
+    @safety_zones.setter
+    def safety_zones(self, zones: List[Set[Tuple[int, int]]]) -> None:
+        """Replace the safety zones and rebuild the zone lookup tables.
+           Assign a new list to change the zones; mutating the sets in place does not refresh the tables.
+        """
+        self._safety_zones = zones
+        self.build_zone_masks()
+        # The cached background shows the zones, so rebuild it on the next draw
+        self.renderer = None
+
+    def build_zone_masks(self) -> None:
+        """Precompute flat lookup tables for the current safety zones:
+           zone_index holds the zone index of each cell (-1 outside all zones),
+           cop_forbidden marks cells in or adjacent to any zone.
+        """
+        self.zone_index = array('i', [-1]) * (PADDED_SIZE * PADDED_SIZE)
+        self.cop_forbidden = bytearray(PADDED_SIZE * PADDED_SIZE)
+        # Reverse order so the first zone wins where zones overlap
+        for i in range(len(self._safety_zones) - 1, -1, -1):
+            for zx, zy in self._safety_zones[i]:
+                if not (0 <= zx < GRID_SIZE and 0 <= zy < GRID_SIZE):
+                    continue
+                self.zone_index[(zx + 1) * PADDED_SIZE + zy + 1] = i
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        self.cop_forbidden[(zx + 1 + dx) * PADDED_SIZE + zy + 1 + dy] = 1
+        # Zero-copy array views of the tables (without the border) for the batched movement kernel
+        self.zone_index_grid = np.frombuffer(self.zone_index, dtype=np.int32).reshape(PADDED_SIZE, PADDED_SIZE)[1:-1, 1:-1]
+        self.cop_forbidden_grid = np.frombuffer(self.cop_forbidden, dtype=np.uint8).reshape(PADDED_SIZE, PADDED_SIZE)[1:-1, 1:-1] != 0
 
     def is_in_safety_zone(self, pos: Tuple[int, int]) -> int:
         """Return safety zone index if position is in a safety zone, -1 otherwise"""
-        for i, zone in enumerate(self.safety_zones):
-            if pos in zone:
-                return i
-        return -1
+        x, y = pos
+        if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+            return -1
+        return self.zone_index[(x + 1) * PADDED_SIZE + y + 1]
 
     def is_in_or_adjacent_to_safety_zone(self, pos: Tuple[int, int]) -> bool:
         """Check if position is in or adjacent to any safety zone"""
         x, y = pos
-        for zone in self.safety_zones:
-            for zx, zy in zone:
-                if abs(x - zx) <= 1 and abs(y - zy) <= 1:
-                    return True
-        return False
+        if not (-1 <= x <= GRID_SIZE and -1 <= y <= GRID_SIZE):
+            return False
+        return self.cop_forbidden[(x + 1) * PADDED_SIZE + y + 1] == 1
 
     def get_valid_moves(self, agent: Agent) -> List[Tuple[int, int]]:
         """Get all valid moves for an agent.
@@ -153,120 +190,144 @@ class CopsAndRobbersGame:
         return valid_moves
 
     def move_agents(self):
-        """Move all agents according to game rules"""
-        # Build set of occupied positions
-        current_positions = {agent.pos for agent in self.cops + self.robbers}
-        
-        # Move cops (simple chase algorithm)
-        for cop in self.cops:
-            valid_moves = self.get_valid_moves(cop)
-            # Exclude positions already occupied by another agent
-            valid_moves = [move for move in valid_moves if move not in current_positions]
-            if valid_moves:
-                # Move towards the nearest robber
-                nearest_robber = min(self.robbers, 
-                                     key=lambda r: abs(r.pos[0] - cop.pos[0]) + abs(r.pos[1] - cop.pos[1]))
-                best_move = min(valid_moves, 
-                                key=lambda m: abs(m[0] - nearest_robber.pos[0]) + abs(m[1] - nearest_robber.pos[1]))
-                current_positions.remove(cop.pos)
-                cop.pos = best_move
-                current_positions.add(cop.pos)
-
-        # Move robbers (escape algorithm with bias towards safety zones)
-        for robber in self.robbers:
-            valid_moves = self.get_valid_moves(robber)
-            valid_moves = [move for move in valid_moves if move not in current_positions]
-            if valid_moves:
-                # If there is at least one move that leads into a safety zone, prefer it
-                safety_moves = [m for m in valid_moves if self.is_in_safety_zone(m) != -1]
-                if safety_moves:
-                    chosen_move = random.choice(safety_moves)
-                    new_zone = self.is_in_safety_zone(chosen_move)
-                    # If entering a different safety zone, record it as a visit
-                    if new_zone != robber.last_safety_zone:
-                        robber.last_safety_zone = new_zone
-                    # Increment steps in safety zone; if too many, force leaving
-                    robber.safety_zone_steps += 1
-                    if robber.safety_zone_steps >= MAX_SAFETY_ZONE_STEPS:
-                        non_safety_moves = [m for m in valid_moves if self.is_in_safety_zone(m) == -1]
-                        if non_safety_moves:
-                            chosen_move = random.choice(non_safety_moves)
-                            robber.safety_zone_steps = 0
-                else:
-                    # If no safety move is available, choose the move that maximizes distance from cops
-                    chosen_move = max(valid_moves, 
-                                      key=lambda m: min(abs(m[0] - cop.pos[0]) + abs(m[1] - cop.pos[1]) for cop in self.cops))
-                    robber.safety_zone_steps = 0  # Reset if leaving safety zone
-                current_positions.remove(robber.pos)
-                robber.pos = chosen_move
-                current_positions.add(robber.pos)
+        """Move all agents simultaneously according to game rules.
+           Cops chase the nearest robber; robbers escape, with a bias towards safety zones.
+           Every agent proposes a move from the same snapshot (scored in bulk by Movement_Kernel),
+           then vertex and swap conflicts are settled in one pass by Conflict_Resolver.
+        """
+        agents = self.cops + self.robbers
+        proposals, updates = Movement_Kernel.propose_moves(self.free_grid, self.zone_index_grid,
+                                                           self.cop_forbidden_grid, self.cops, self.robbers,
+                                                           MAX_SAFETY_ZONE_STEPS, self.cop_strategy,
+                                                           self.robber_strategy)
+        new_positions = resolve_simultaneous_moves([agent.pos for agent in agents], proposals)
+        # Safety-zone counters only change for robbers whose move the resolver accepted
+        Movement_Kernel.apply_updates(agents, proposals, updates, new_positions)
 
-    def draw(self):
-        """Draw the game state"""
-        self.screen.fill(COLORS["background"])
-        
-        # Draw grid and obstacles
-        for i in range(GRID_SIZE):
-            for j in range(GRID_SIZE):
-                if self.grid[i][j] == 1:
-                    pygame.draw.rect(self.screen, COLORS["obstacle"],
-                                     (j * CELL_SIZE, i * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-
-        # Draw safety zones
+    def step(self):
+        """Advance the game by exactly one move, independent of wall-clock time"""
+        self.move_agents()
+        self.tick += 1
+        if self.recorder is not None:
+            self.record_tick()
+
+    def start_recording(self, path: str) -> None:
+        """Record every agent's position and safety-zone step count from now on.
+           The grid and safety zones go into the file header so the game can be replayed without it.
+        """
+        agents = self.cops + self.robbers
+        self.recorder = TrajectoryWriter(
+            path, [agent.agent_type.value for agent in agents],
+            metadata={"grid": self.grid.to_rows(), "safety_zones": [sorted(zone) for zone in self.safety_zones]})
+        self.record_tick()
+
+    def record_tick(self) -> None:
+        agents = self.cops + self.robbers
+        self.recorder.record(self.tick, [agent.pos for agent in agents],
+                             [min(agent.safety_zone_steps, 255) for agent in agents])
+
+    def stop_recording(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def build_renderer(self) -> GridRenderer:
+        """Pre-render obstacles, safety zones and grid lines into the renderer's cached background"""
+        renderer = GridRenderer(self.screen, GRID_SIZE, GRID_SIZE, CELL_SIZE,
+                                COLORS["background"], COLORS["grid_line"])
+        renderer.paint_static(self.grid.layer_cells("obstacle"), COLORS["obstacle"])
         for zone in self.safety_zones:
-            for x, y in zone:
-                surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                pygame.draw.rect(surface, COLORS["safety_zone"],
-                                 (0, 0, CELL_SIZE, CELL_SIZE))
-                self.screen.blit(surface, (y * CELL_SIZE, x * CELL_SIZE))
-
-        # Draw agents
-        for cop in self.cops:
-            pygame.draw.circle(self.screen, COLORS["cop"],
-                               (cop.pos[1] * CELL_SIZE + CELL_SIZE//2,
-                                cop.pos[0] * CELL_SIZE + CELL_SIZE//2),
-                               CELL_SIZE//3)
-
-        for robber in self.robbers:
-            pygame.draw.circle(self.screen, COLORS["robber"],
-                               (robber.pos[1] * CELL_SIZE + CELL_SIZE//2,
-                                robber.pos[0] * CELL_SIZE + CELL_SIZE//2),
-                               CELL_SIZE//3)
-
-        # Draw grid lines
-        for i in range(GRID_SIZE + 1):
-            pygame.draw.line(self.screen, COLORS["grid_line"],
-                             (i * CELL_SIZE, 0),
-                             (i * CELL_SIZE, WINDOW_SIZE))
-            pygame.draw.line(self.screen, COLORS["grid_line"],
-                             (0, i * CELL_SIZE),
-                             (WINDOW_SIZE, i * CELL_SIZE))
-
-        pygame.display.flip()
-
-    def run(self):
-        """Main game loop"""
-        while self.running:
-            current_time = time.time()
-            
+            renderer.paint_static(zone, COLORS["safety_zone"])
+        return renderer
+
+    def draw(self):
+        """Draw the game state, repainting only the cells agents left or entered"""
+        if self.renderer is None:
+            self.renderer = self.build_renderer()
+        sprites = {cop.pos: ("circle", COLORS["cop"]) for cop in self.cops}
+        sprites.update({robber.pos: ("circle", COLORS["robber"]) for robber in self.robbers})
+        self.renderer.render(sprites)
+
+    def run(self, n_steps: Optional[int] = None):
+        """Main game loop.
+           In headless mode, advance n_steps ticks back to back and return instead.
+        """
+        if self.headless:
+            if n_steps is None:
+                raise ValueError("Headless runs need an explicit number of steps")
+            for _ in range(n_steps):
+                self.step()
+            return
+
+        # Agents move once per MOVE_INTERVAL; frames are only drawn when something changed
+        scheduler = FixedTimestepScheduler(tick_rate=1.0 / MOVE_INTERVAL, render_rate=60)
+
+        def poll():
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    self.running = False
+                    scheduler.stop()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
-                        self.running = False
-
-            # Move agents automatically based on time interval
-            if current_time - self.last_move_time >= MOVE_INTERVAL:
-                self.move_agents()
-                self.last_move_time = current_time
+                        scheduler.stop()
+                elif event.type == pygame.VIDEOEXPOSE and self.renderer is not None:
+                    self.renderer.invalidate()
+                    scheduler.request_render()
 
-            self.draw()
-            self.clock.tick(60)
+        scheduler.run(self.step, self.draw, poll)
+        self.running = False
+        self.stop_recording()
 
         pygame.quit()
         sys.exit()
 
+    def replay(self, path: str):
+        """Play back a recorded game in the window, one recorded tick per MOVE_INTERVAL"""
+        with TrajectoryReader(path) as reader:
+            self.grid = Grid.from_rows(reader.header["grid"])
+            self.free_grid = self.grid.array() == FREE
+            self.safety_zones = [set(map(tuple, zone)) for zone in reader.header["safety_zones"]]
+            self.cops = [Agent((0, 0), AgentType.COP) for kind in reader.agent_kinds if kind == AgentType.COP.value]
+            self.robbers = [Agent((0, 0), AgentType.ROBBER) for kind in reader.agent_kinds if kind == AgentType.ROBBER.value]
+
+            def draw_frame(frame):
+                for agent, pos, steps in zip(self.cops + self.robbers, frame.positions, frame.states):
+                    agent.pos = pos
+                    agent.safety_zone_steps = steps
+                self.tick = frame.tick
+                self.draw()
+
+            def poll(scheduler):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                        scheduler.stop()
+                    elif event.type == pygame.VIDEOEXPOSE and self.renderer is not None:
+                        self.renderer.invalidate()
+                        scheduler.request_render()
+
+            replay(reader, draw_frame, tick_rate=1.0 / MOVE_INTERVAL, poll=poll)
+
 if __name__ == "__main__":
-    game = CopsAndRobbersGame()
-    game.run()
+    parser = argparse.ArgumentParser(description="Cops and robbers on a grid.")
+    parser.add_argument("--headless", type=int, metavar="N",
+                        help="simulate N ticks without a window and report the tick rate")
+    parser.add_argument("--record", metavar="PATH", help="record the agents' trajectories to a binary file")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded game instead of simulating")
+    args = parser.parse_args()
+
+    if args.replay:
+        CopsAndRobbersGame().replay(args.replay)
+        pygame.quit()
+    elif args.headless is not None:
+        game = CopsAndRobbersGame(headless=True)
+        if args.record:
+            game.start_recording(args.record)
+        start = time.perf_counter()
+        game.run(args.headless)
+        elapsed = time.perf_counter() - start
+        game.stop_recording()
+        print(f"Simulated {args.headless} ticks in {elapsed:.2f}s ({args.headless / max(elapsed, 1e-9):.0f} ticks/s)")
+    else:
+        game = CopsAndRobbersGame()
+        if args.record:
+            game.start_recording(args.record)
+        game.run()
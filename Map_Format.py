@@ -0,0 +1,192 @@
+"""
+Binary map files with a stable content hash, so layouts can be shared and used as cache keys.
+
+File layout (little-endian, like Trajectory_Recorder's files):
+    b"MAP1"                    magic
+    uint32                     length of the JSON header
+    JSON header                {"rows", "cols", "safety_zones", "delivery_zones", "spawns", "hash", ...metadata}
+    cells                      rows * cols bytes, one cell type per byte, row-major (the bytes of a Grid)
+
+Zones are [top, left, bottom, right] rectangles, inclusive, as produced by Map_Generator; spawns are
+[row, col] cells. MapFile memory-maps a file: its cells and array() are zero-copy views of the
+payload, and grid() copies them into an editable Grid once, with the spawn and delivery layers set.
+
+content_hash is a SHA-256 over the cells and the zones and spawns in canonical JSON; free-form
+metadata (names, descriptions) is left out, so it changes exactly when the map does. The hash is
+stored in the header, so reading the cache key of a stored map does not touch the payload.
+Distance tables, controllers and benchmark results computed for a map can be stored under
+cache_path(hash, name) and reused across processes and runs.
+
+Usage:
+    python Map_Format.py info MAP
+    python Map_Format.py generate MAP --rows 64 --cols 64 [--density 0.2] [--seed 0] [--delivery-zones 4] ...
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Grid import Grid, as_grid
+from Map_Generator import generate_map
+
+MAGIC = b"MAP1"
+_PREFIX = struct.Struct("<4sI")
+
+# Directory for per-map cached results, overridable with the GRID_MAP_CACHE environment variable
+DEFAULT_CACHE_DIR = os.environ.get("GRID_MAP_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "grid_maps"))
+
+Cell = Tuple[int, int]
+Zone = Tuple[int, int, int, int]
+
+# Header keys that describe the map itself (and so go into the hash)
+_CONTENT_KEYS = ("rows", "cols", "safety_zones", "delivery_zones", "spawns")
+
+
+def _content(grid: Grid, safety_zones: Iterable[Zone], delivery_zones: Iterable[Zone],
+             spawns: Iterable[Cell]) -> Dict:
+    return {
+        "rows": grid.rows,
+        "cols": grid.cols,
+        "safety_zones": [[int(v) for v in zone] for zone in safety_zones],
+        "delivery_zones": [[int(v) for v in zone] for zone in delivery_zones],
+        "spawns": [[int(v) for v in cell] for cell in spawns],
+    }
+
+
+def _hash(content: Dict, cells) -> str:
+    digest = hashlib.sha256(MAGIC)
+    digest.update(json.dumps([content[key] for key in _CONTENT_KEYS], separators=(",", ":")).encode("utf-8"))
+    digest.update(cells)
+    return digest.hexdigest()
+
+
+def content_hash(grid, safety_zones: Iterable[Zone] = (), delivery_zones: Iterable[Zone] = (),
+                 spawns: Iterable[Cell] = ()) -> str:
+    """Hex SHA-256 of a map: the hash save_map would store for it."""
+    grid = as_grid(grid)
+    return _hash(_content(grid, safety_zones, delivery_zones, spawns), grid.cells)
+
+
+def save_map(path: str, grid, safety_zones: Iterable[Zone] = (), delivery_zones: Iterable[Zone] = (),
+             spawns: Iterable[Cell] = (), metadata: Optional[Dict] = None) -> str:
+    """Write a map file and return its content hash."""
+    grid = as_grid(grid)
+    content = _content(grid, safety_zones, delivery_zones, spawns)
+    header = dict(metadata or {})
+    header.update(content)
+    header["hash"] = _hash(content, grid.cells)
+    encoded = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        f.write(grid.cells)
+    return header["hash"]
+
+
+class MapFile:
+    """Memory-mapped map file; the cells are read from the page cache, not copied."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_length = _PREFIX.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a map file")
+        self.header = json.loads(self._mm[_PREFIX.size:_PREFIX.size + header_length].decode("utf-8"))
+        self.rows: int = self.header["rows"]
+        self.cols: int = self.header["cols"]
+        self.hash: str = self.header["hash"]
+        self.safety_zones: List[Zone] = [tuple(zone) for zone in self.header["safety_zones"]]
+        self.delivery_zones: List[Zone] = [tuple(zone) for zone in self.header["delivery_zones"]]
+        self.spawns: List[Cell] = [tuple(cell) for cell in self.header["spawns"]]
+        self._offset = _PREFIX.size + header_length
+        if len(self._mm) - self._offset != self.rows * self.cols:
+            raise ValueError(f"{path} holds {len(self._mm) - self._offset} cells, expected {self.rows * self.cols}")
+
+    @property
+    def cells(self) -> memoryview:
+        """Zero-copy, read-only view of the cell bytes (row-major)."""
+        return memoryview(self._mm)[self._offset:]
+
+    def array(self) -> np.ndarray:
+        """Zero-copy, read-only (rows, cols) uint8 NumPy view of the cell types."""
+        return np.frombuffer(self._mm, dtype=np.uint8, count=self.rows * self.cols,
+                             offset=self._offset).reshape(self.rows, self.cols)
+
+    def grid(self) -> Grid:
+        """An editable Grid of the map, with the spawn and delivery layers marked."""
+        grid = Grid(self.rows, self.cols, self._mm[self._offset:])
+        grid.mark("spawn", self.spawns)
+        for r0, c0, r1, c1 in self.delivery_zones:
+            grid.mark("delivery", [(r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)])
+        return grid
+
+    def verify(self) -> bool:
+        """Recompute the content hash from the payload and compare it with the stored one."""
+        return _hash({key: self.header[key] for key in _CONTENT_KEYS}, self.cells) == self.hash
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "MapFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def load_map(path: str) -> MapFile:
+    return MapFile(path)
+
+
+def cache_path(map_hash: str, name: str, cache_dir: Optional[str] = None) -> str:
+    """Where to keep a result called name (e.g. "distances.npz") computed for the map with this hash."""
+    directory = os.path.join(cache_dir or DEFAULT_CACHE_DIR, map_hash)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Inspect or generate binary map files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="print a map file's header")
+    info.add_argument("path")
+    info.add_argument("--verify", action="store_true", help="recompute the content hash")
+    generate = commands.add_parser("generate", help="write a seeded Map_Generator map")
+    generate.add_argument("path")
+    generate.add_argument("--rows", type=int, required=True)
+    generate.add_argument("--cols", type=int, required=True)
+    generate.add_argument("--density", type=float, default=0.2)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--safety-zones", type=int, default=0)
+    generate.add_argument("--delivery-zones", type=int, default=0)
+    generate.add_argument("--spawns", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        with MapFile(args.path) as map_file:
+            print(json.dumps({key: value for key, value in map_file.header.items()
+                              if key not in ("safety_zones", "delivery_zones", "spawns")}, indent=2))
+            print(f"{len(map_file.safety_zones)} safety zones, {len(map_file.delivery_zones)} delivery zones, "
+                  f"{len(map_file.spawns)} spawns")
+            if args.verify and not map_file.verify():
+                raise SystemExit(f"{args.path}: content hash mismatch")
+    else:
+        generated = generate_map(args.rows, args.cols, density=args.density, seed=args.seed,
+                                 safety_zones=args.safety_zones, delivery_zones=args.delivery_zones,
+                                 spawns=args.spawns)
+        digest = save_map(args.path, generated.grid, generated.safety_zones, generated.delivery_zones,
+                          generated.spawns, metadata={"generator": "Map_Generator", "seed": args.seed,
+                                                      "density": args.density})
+        print(digest)
+
+
+if __name__ == "__main__":
+    main()
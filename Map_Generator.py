@@ -0,0 +1,177 @@
+"""
+Seeded procedural maps that are connected by construction.
+
+generate_map builds a Grid of any size in a few NumPy passes and never has to validate and retry:
+    1. A perfect maze: open cells on the even lattice, each joined to its north or west neighbour by
+       opening the wall cell between them (a binary-tree maze, so every open cell reaches (0, 0)).
+       A trailing odd row or column is left open. Obstacles make up about half of the map.
+    2. Zones are carved: each safety or delivery zone is a rectangle cleared to FREE with a one-cell
+       FREE ring around it, then safety zone interiors are set to SAFETY_ZONE. A cleared rectangle
+       of two or more cells joins the open cells it touches, and the ring lets every path that
+       crossed a safety zone go around it, so FREE cells alone stay connected too.
+    3. Randomly chosen obstacles are opened until the requested density is reached. Walls always
+       border an open lattice cell; a pillar (odd row and column) that ends up with no open
+       neighbour gets the wall above it opened too, so the density can come out slightly lower.
+Spawn points are then drawn from the free cells and flagged in the grid's "spawn" layer; delivery
+zone cells are flagged in its "delivery" layer. Zones and spawn points keep at least clearance cells
+between each other, and none of them covers a cell listed in keep_free (which is always left FREE).
+They are not placed by trial and error: each one is drawn directly from a mask of the positions
+still allowed, and the footprint of every placement (grown by clearance) is cleared from the mask, so
+generation only fails when no allowed position is left.
+
+The same seed and arguments always give the same map.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from Grid import FREE, OBSTACLE, SAFETY_ZONE, Grid
+
+Cell = Tuple[int, int]
+# (top row, left col, bottom row, right col), inclusive, like the warehouse delivery zones
+Zone = Tuple[int, int, int, int]
+
+class GeneratedMap(NamedTuple):
+    grid: Grid
+    safety_zones: List[Zone]
+    delivery_zones: List[Zone]
+    spawns: List[Cell]
+
+
+def generate_map(rows: int, cols: int, density: float = 0.2, seed: Optional[int] = None,
+                 safety_zones: int = 0, safety_zone_size: int = 2, delivery_zones: int = 0,
+                 delivery_zone_size: int = 3, spawns: int = 0, clearance: int = 1,
+                 keep_free: Iterable[Cell] = ()) -> GeneratedMap:
+    """
+    A rows x cols map whose FREE cells (and FREE plus SAFETY_ZONE cells) are all connected.
+    density is the fraction of cells that are obstacles, at most about one half (a perfect maze);
+    higher values give the maze as is. Raises ValueError if the zones or spawn points do not fit.
+    """
+    if rows < 1 or cols < 1:
+        raise ValueError("A map needs at least one row and one column")
+    if not 0 <= density < 1:
+        raise ValueError("density must be in [0, 1)")
+    if safety_zones and (clearance < 1 or safety_zone_size >= min(rows, cols)):
+        # Paths must be able to go around every safety zone through the ring
+        raise ValueError("Safety zones need a clearance of at least 1 and must be narrower than the map")
+    rng = np.random.default_rng(seed)
+    cells = _binary_tree_maze(rows, cols, rng)
+    keep_free = [tuple(cell) for cell in keep_free]
+    for r, c in keep_free:
+        cells[r, c] = FREE
+
+    # keep_free cells count as placed features, so zones and spawn points keep clear of them
+    placed: List[Zone] = [(r, c, r, c) for r, c in keep_free]
+    safety = _place_rectangles(rows, cols, safety_zones, safety_zone_size, clearance, placed, rng)
+    delivery = _place_rectangles(rows, cols, delivery_zones, delivery_zone_size, clearance, placed, rng)
+    for r0, c0, r1, c1 in safety:
+        cells[max(r0 - 1, 0):r1 + 2, max(c0 - 1, 0):c1 + 2] = FREE
+    for r0, c0, r1, c1 in delivery:
+        cells[r0:r1 + 1, c0:c1 + 1] = FREE
+    for r0, c0, r1, c1 in safety:
+        cells[r0:r1 + 1, c0:c1 + 1] = SAFETY_ZONE
+
+    obstacles = np.flatnonzero(cells == OBSTACLE)
+    excess = len(obstacles) - int(round(density * rows * cols))
+    if excess > 0:
+        cells.ravel()[rng.choice(obstacles, excess, replace=False)] = FREE
+    _join_isolated(cells)
+
+    grid = Grid(rows, cols, cells.tobytes())
+    for r0, c0, r1, c1 in delivery:
+        grid.mark("delivery", [(r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)])
+    spawn_cells = _place_spawns(cells, spawns, clearance, placed, rng)
+    grid.mark("spawn", spawn_cells)
+    return GeneratedMap(grid, safety, delivery, spawn_cells)
+
+
+def _binary_tree_maze(rows: int, cols: int, rng: np.random.Generator) -> np.ndarray:
+    """(rows, cols) uint8 cell types of a perfect maze, every open cell connected to (0, 0)."""
+    cells = np.full((rows, cols), OBSTACLE, dtype=np.uint8)
+    lattice_rows, lattice_cols = (rows + 1) // 2, (cols + 1) // 2
+    cells[0::2, 0::2] = FREE
+    # Each lattice cell opens the wall to its north or west neighbour; the first row can only go
+    # west and the first column only north, and (0, 0) is the root
+    north = rng.random((lattice_rows, lattice_cols)) < 0.5
+    north[0, :] = False
+    north[1:, 0] = True
+    west = ~north
+    west[:, 0] = False
+    cells[1:2 * lattice_rows - 1:2, 0::2][north[1:]] = FREE
+    cells[0::2, 1:2 * lattice_cols - 1:2][west[:, 1:]] = FREE
+    # A trailing odd row or column borders open lattice cells all along, so opening it is safe
+    cells[2 * lattice_rows - 1:, :] = FREE
+    cells[:, 2 * lattice_cols - 1:] = FREE
+    return cells
+
+
+def _join_isolated(cells: np.ndarray) -> None:
+    """
+    Connect FREE cells that have no FREE neighbour. Only maze pillars (odd row, odd column) can be
+    left like that by opening obstacles; the wall cell above a pillar always borders a lattice cell.
+    """
+    free = np.pad(cells == FREE, 1)
+    lonely = free[1:-1, 1:-1] & ~(free[:-2, 1:-1] | free[2:, 1:-1] | free[1:-1, :-2] | free[1:-1, 2:])
+    lonely[0, :] = False  # only (0, 0) of a 1-cell-high map, which is alone anyway
+    rows, cols = np.nonzero(lonely)
+    cells[rows - 1, cols] = FREE
+
+
+def _exclude(allowed: np.ndarray, zone: Zone, size: int, clearance: int) -> None:
+    """
+    Clear the top-left positions of size x size rectangles that would come closer than clearance
+    cells to zone (overlapping it included) from a mask of allowed top-left positions.
+    """
+    r0, c0, r1, c1 = zone
+    reach = size + clearance - 1
+    allowed[max(r0 - reach, 0):max(r1 + clearance + 1, 0), max(c0 - reach, 0):max(c1 + clearance + 1, 0)] = False
+
+
+def _draw(allowed: np.ndarray, rng: np.random.Generator) -> Optional[Cell]:
+    """A uniformly random allowed position, None if there is none."""
+    candidates = np.flatnonzero(allowed)
+    if len(candidates) == 0:
+        return None
+    return divmod(int(rng.choice(candidates)), allowed.shape[1])
+
+
+def _place_rectangles(rows: int, cols: int, count: int, size: int, clearance: int, placed: List[Zone],
+                      rng: np.random.Generator) -> List[Zone]:
+    """Random size x size zones, at least clearance cells from everything placed so far."""
+    if not count:
+        return []
+    if size > rows or size > cols:
+        raise ValueError(f"A {size}x{size} zone does not fit on a {rows}x{cols} map")
+    allowed = np.ones((rows - size + 1, cols - size + 1), dtype=bool)
+    for other in placed:
+        _exclude(allowed, other, size, clearance)
+    zones = []
+    for _ in range(count):
+        spot = _draw(allowed, rng)
+        if spot is None:
+            raise ValueError(f"Could not place {count} zones of size {size} with clearance {clearance}")
+        zone = (spot[0], spot[1], spot[0] + size - 1, spot[1] + size - 1)
+        _exclude(allowed, zone, size, clearance)
+        placed.append(zone)
+        zones.append(zone)
+    return zones
+
+
+def _place_spawns(cells: np.ndarray, count: int, clearance: int, placed: List[Zone],
+                  rng: np.random.Generator) -> List[Cell]:
+    """Random FREE cells, at least clearance cells from every zone and from each other."""
+    if not count:
+        return []
+    allowed = cells == FREE
+    for other in placed:
+        _exclude(allowed, other, 1, clearance)
+    spawns = []
+    for _ in range(count):
+        spot = _draw(allowed, rng)
+        if spot is None:
+            raise ValueError(f"Could not place {count} spawn points with clearance {clearance}")
+        _exclude(allowed, (spot[0], spot[1], spot[0], spot[1]), 1, clearance)
+        placed.append((spot[0], spot[1], spot[0], spot[1]))
+        spawns.append(spot)
+    return spawns
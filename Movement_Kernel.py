@@ -0,0 +1,227 @@
+"""
+Batched movement kernel for the Cops and Robbers game (Main.py).
+
+Candidate moves, legality masks and chase/escape scores are computed for all agents at once with NumPy,
+from a single snapshot of positions. Chase and escape scores are true maze distances, read from one
+multi-source distance field per side and tick (from all robbers for the cops, from all cops for the
+robbers), so their cost does not grow with the number of agents. The kernel only proposes moves; Conflict_Resolver settles them so
+that all agents move simultaneously, as the game description requires.
+
+Because cops move in the same tick, robbers keep clear of the cells next to both the cops' current cells
+and the cells the cops propose to move to. Robber strategies also return the safety-zone bookkeeping each
+move implies (RobberUpdate); apply_updates commits it only for the moves the resolver accepted.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Distance_Fields import UNREACHABLE, distance_field
+
+# Same order as CopsAndRobbersGame.get_valid_moves, so ties are broken the same way
+MOVE_DELTAS = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)], dtype=np.int64)
+
+def dilate(mask: np.ndarray) -> np.ndarray:
+    """Grow a boolean grid mask by one cell in all 8 directions"""
+    rows = mask.copy()
+    rows[1:] |= mask[:-1]
+    rows[:-1] |= mask[1:]
+    out = rows.copy()
+    out[:, 1:] |= rows[:, :-1]
+    out[:, :-1] |= rows[:, 1:]
+    return out
+
+
+def agent_halo(positions: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    """Boolean grid of the cells in or adjacent (8-neighbourhood) to any of the given positions"""
+    occupied = np.zeros(shape, dtype=bool)
+    if len(positions):
+        occupied[positions[:, 0], positions[:, 1]] = True
+    return dilate(occupied)
+
+
+def candidate_moves(positions: np.ndarray, free: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the (n, 4, 2) candidate moves of every agent and the mask of in-bounds, obstacle-free ones"""
+    candidates = positions[:, None, :] + MOVE_DELTAS[None, :, :]
+    rows, cols = free.shape
+    in_bounds = ((candidates[..., 0] >= 0) & (candidates[..., 0] < rows) &
+                 (candidates[..., 1] >= 0) & (candidates[..., 1] < cols))
+    # Clip so out-of-bounds candidates can still be used as indices; they are masked out anyway
+    clipped = np.stack([np.clip(candidates[..., 0], 0, rows - 1), np.clip(candidates[..., 1], 0, cols - 1)], axis=-1)
+    legal = in_bounds & free[clipped[..., 0], clipped[..., 1]]
+    return clipped, legal
+
+
+def maze_distance_grid(free: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """Maze distance from every cell to the nearest source (one multi-source BFS, see Distance_Fields)"""
+    rows, cols = free.shape
+    field = distance_field(free.tobytes(), rows, cols, sources.tolist())
+    return np.frombuffer(field, dtype=np.int32).reshape(rows, cols)
+
+
+class RobberUpdate(NamedTuple):
+    """Safety-zone counters a robber takes on if its proposed move goes through"""
+    last_safety_zone: int
+    safety_zone_steps: int
+
+
+Move = Optional[Tuple[int, int]]
+
+
+def _positions(agents) -> np.ndarray:
+    return np.array([agent.pos for agent in agents], dtype=np.int64).reshape(-1, 2)
+
+
+@dataclass
+class Board:
+    """Snapshot of the grid-shaped lookup arrays and agent positions a strategy scores moves against"""
+    free: np.ndarray           # obstacle-free cells
+    zone_index: np.ndarray     # safety zone index per cell, -1 outside all zones
+    cop_forbidden: np.ndarray  # cells in or adjacent to a safety zone
+    occupied: np.ndarray       # cells holding an agent at the start of the tick
+    cop_pos: np.ndarray
+    robber_pos: np.ndarray
+    max_safety_zone_steps: int
+    cop_targets: Optional[np.ndarray] = None  # cells the cops propose to move to this tick, once known
+
+
+def legal_cop_moves(board: Board) -> Tuple[np.ndarray, np.ndarray]:
+    """Candidate moves of every cop, and which of them are legal"""
+    candidates, legal = candidate_moves(board.cop_pos, board.free)
+    legal &= ~board.cop_forbidden[candidates[..., 0], candidates[..., 1]]
+    legal &= ~board.occupied[candidates[..., 0], candidates[..., 1]]
+    return candidates, legal
+
+
+def legal_robber_moves(board: Board) -> Tuple[np.ndarray, np.ndarray]:
+    """Candidate moves of every robber, and which of them are legal"""
+    candidates, legal = candidate_moves(board.robber_pos, board.free)
+    # A cop may end the tick where it is or where it proposed to go; keep clear of both
+    cops = board.cop_pos if board.cop_targets is None else np.concatenate([board.cop_pos, board.cop_targets])
+    legal &= ~agent_halo(cops, board.free.shape)[candidates[..., 0], candidates[..., 1]]
+    legal &= ~board.occupied[candidates[..., 0], candidates[..., 1]]
+    return candidates, legal
+
+
+def _pick(candidates: np.ndarray, legal: np.ndarray, choice: np.ndarray) -> List[Optional[Tuple[int, int]]]:
+    """Turn a per-agent candidate index into a list of moves (None for agents without a legal move)"""
+    moves = candidates[np.arange(len(candidates)), choice].tolist()
+    return [tuple(move) if ok else None for move, ok in zip(moves, legal.any(axis=1).tolist())]
+
+
+def chase_moves(board: Board, cops, robbers) -> List[Optional[Tuple[int, int]]]:
+    """Cops chase the nearest robber by maze distance, staying out of and away from the safety zones"""
+    candidates, legal = legal_cop_moves(board)
+    chase_scores = maze_distance_grid(board.free, board.robber_pos)[candidates[..., 0], candidates[..., 1]]
+    # Legal moves from which no robber can be reached score worse than any other legal move, and
+    # illegal moves worse still, so argmin only lands on an illegal move when there is no legal one;
+    # argmin keeps the first best move, like min()
+    worst = np.iinfo(np.int32).max
+    chase_scores = np.where(legal, np.where(chase_scores == UNREACHABLE, worst - 1, chase_scores), worst)
+    return _pick(candidates, legal, chase_scores.argmin(axis=1))
+
+
+def escape_moves(board: Board, cops, robbers) -> Tuple[List[Move], List[Optional[RobberUpdate]]]:
+    """
+    Robbers avoid the cops' neighbourhoods, head for safety zones and otherwise flee by maze distance.
+    Returns the proposed moves and the safety-zone counters each robber takes on if its move is accepted.
+    """
+    candidates, legal = legal_robber_moves(board)
+    zones = np.where(legal, board.zone_index[candidates[..., 0], candidates[..., 1]], -1)
+    escape_scores = maze_distance_grid(board.free, board.cop_pos)[candidates[..., 0], candidates[..., 1]]
+    # Cells no cop can reach are the safest of all
+    escape_scores = np.where(escape_scores == UNREACHABLE, np.iinfo(np.int32).max, escape_scores)
+    # No safety move available: maximise the maze distance to the nearest cop (first move on ties, like max())
+    escape = candidates[np.arange(len(robbers)), np.where(legal, escape_scores, -1).argmax(axis=1)]
+    proposals: List[Move] = []
+    updates: List[Optional[RobberUpdate]] = []
+    rows = zip(robbers, legal.any(axis=1).tolist(), (zones != -1).any(axis=1).tolist(), escape.tolist(),
+               candidates.tolist(), legal.tolist(), zones.tolist())
+    for robber, has_move, has_safety_move, escape_move, moves, legal_row, zone_row in rows:
+        if not has_move:
+            proposals.append(None)
+            updates.append(None)
+            continue
+        if not has_safety_move:
+            proposals.append(tuple(escape_move))
+            updates.append(RobberUpdate(robber.last_safety_zone, 0))  # Reset if leaving safety zone
+            continue
+        safety_moves = [(tuple(move), zone) for move, zone in zip(moves, zone_row) if zone != -1]
+        chosen_move, new_zone = random.choice(safety_moves)
+        # Entering a different safety zone records it as a visit; steps in a zone are counted and,
+        # if too many, the robber is forced to leave
+        update = RobberUpdate(new_zone, robber.safety_zone_steps + 1)
+        if update.safety_zone_steps >= board.max_safety_zone_steps:
+            non_safety_moves = [tuple(move) for move, ok, zone in zip(moves, legal_row, zone_row) if ok and zone == -1]
+            if non_safety_moves:
+                chosen_move = random.choice(non_safety_moves)
+                update = RobberUpdate(robber.last_safety_zone, 0)
+        proposals.append(chosen_move)
+        updates.append(update)
+    return proposals, updates
+
+
+def _random_legal(candidates: np.ndarray, legal: np.ndarray) -> List[Optional[Tuple[int, int]]]:
+    """Pick a uniformly random legal move for every agent"""
+    # Random keys on legal moves only; argmax then selects one of them uniformly
+    keys = np.where(legal, np.array([random.random() for _ in range(legal.size)]).reshape(legal.shape), -1.0)
+    return _pick(candidates, legal, keys.argmax(axis=1))
+
+
+def random_cop_moves(board: Board, cops, robbers) -> List[Optional[Tuple[int, int]]]:
+    """Baseline cop strategy: a random legal move"""
+    return _random_legal(*legal_cop_moves(board))
+
+
+def random_robber_moves(board: Board, cops, robbers) -> Tuple[List[Move], List[Optional[RobberUpdate]]]:
+    """Baseline robber strategy: a random legal move (no safety-zone bookkeeping)"""
+    return _random_legal(*legal_robber_moves(board)), [None] * len(robbers)
+
+
+# Strategies by name; each maps a Board snapshot to one proposed move per agent of its side
+# (robber strategies also return one Optional[RobberUpdate] per robber)
+COP_STRATEGIES = {
+    "chase": chase_moves,
+    "random": random_cop_moves,
+}
+ROBBER_STRATEGIES = {
+    "escape": escape_moves,
+    "random": random_robber_moves,
+}
+
+
+def propose_moves(free: np.ndarray, zone_index: np.ndarray, cop_forbidden: np.ndarray, cops, robbers,
+                  max_safety_zone_steps: int, cop_strategy: str = "chase",
+                  robber_strategy: str = "escape") -> Tuple[List[Move], List[Optional[RobberUpdate]]]:
+    """Propose one move for every cop, then every robber, according to the game rules of Main.py.
+       All proposals are made from the same snapshot of positions (agents move simultaneously); cells
+       occupied at the start of the tick are never proposed. None means the agent has no legal move.
+       Cops propose first; since they move in the same tick, robbers must keep clear of the cells next
+       to each cop's current cell and next to the cell it proposed (it ends the tick on one of the two).
+       Returns the proposals and, per agent, the counters to set if its move is accepted (see
+       apply_updates); agents never change state here.
+       free marks obstacle-free cells; zone_index and cop_forbidden are the game's precomputed zone lookup
+       tables. All three are grid-shaped arrays.
+    """
+    cop_pos = _positions(cops)
+    robber_pos = _positions(robbers)
+    occupied = np.zeros(free.shape, dtype=bool)
+    for positions in (cop_pos, robber_pos):
+        if len(positions):
+            occupied[positions[:, 0], positions[:, 1]] = True
+    board = Board(free, zone_index, cop_forbidden, occupied, cop_pos, robber_pos, max_safety_zone_steps)
+    cop_moves = COP_STRATEGIES[cop_strategy](board, cops, robbers)
+    board.cop_targets = np.array([move for move in cop_moves if move is not None], dtype=np.int64).reshape(-1, 2)
+    robber_moves, robber_updates = ROBBER_STRATEGIES[robber_strategy](board, cops, robbers)
+    return cop_moves + robber_moves, [None] * len(cop_moves) + robber_updates
+
+
+def apply_updates(agents, proposals: Sequence[Move], updates: Sequence[Optional[RobberUpdate]],
+                  new_positions: Sequence[Tuple[int, int]]) -> None:
+    """Move the agents to their resolved cells and commit the counters of the moves that went through"""
+    for agent, proposal, update, pos in zip(agents, proposals, updates, new_positions):
+        agent.pos = pos
+        if update is not None and proposal == pos:
+            agent.last_safety_zone, agent.safety_zone_steps = update
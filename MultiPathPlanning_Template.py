@@ -16,6 +16,7 @@ import time
 import pygame
 import sys
 from typing import List, Tuple
+from Grid import Grid
 
 # --------------------------------------------------
 # Environment Setup (Generic Grid)
@@ -38,14 +39,14 @@ pygame.init()
 screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
 pygame.display.set_caption("Generic Grid Environment")
 
-def generate_generic_grid() -> List[List[int]]:
+def generate_generic_grid() -> Grid:
     """
     Generate a grid layout for the environment.
     Modify this function to create your specific environment layout.
     Here, 0 represents a free (white) cell and 1 represents an obstacle.
     """
     # Example fixed grid layout (customize as needed)
-    grid = [
+    grid = Grid.from_rows([
         [0, 0, 1, 0, 0, 0, 1, 0, 0, 0],
         [0, 1, 1, 0, 0, 0, 0, 0, 1, 0],
         [0, 0, 0, 0, 1, 1, 0, 0, 0, 0],
@@ -56,20 +57,18 @@ def generate_generic_grid() -> List[List[int]]:
         [0, 1, 0, 0, 0, 1, 0, 0, 1, 0],
         [0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
         [0, 0, 1, 0, 0, 0, 0, 0, 0, 0]
-    ]
+    ])
     return grid
 
-def draw_generic_grid(grid: List[List[int]]) -> None:
+def draw_generic_grid(grid: Grid) -> None:
     """
     Draw the grid on the screen using the defined COLORS.
     """
     screen.fill(COLORS["background"])
     # Draw obstacles
-    for i in range(GRID_SIZE):
-        for j in range(GRID_SIZE):
-            if grid[i][j] == 1:
-                pygame.draw.rect(screen, COLORS["obstacle"],
-                                 (j * CELL_SIZE, i * CELL_SIZE, CELL_SIZE, CELL_SIZE))
+    for i, j in grid.layer_cells("obstacle"):
+        pygame.draw.rect(screen, COLORS["obstacle"],
+                         (j * CELL_SIZE, i * CELL_SIZE, CELL_SIZE, CELL_SIZE))
     # Draw grid lines
     for i in range(GRID_SIZE + 1):
         pygame.draw.line(screen, COLORS["grid_line"],
@@ -0,0 +1,346 @@
+"""
+Best-first path planners for large 4-connected grid maps.
+
+GridPlanner flattens a grid once and answers many queries against it:
+    "astar": A* with an admissible heuristic, over uniform or weighted cells
+    "jps":   Jump Point Search, for uniform-cost grids only; it jumps along straight corridors and only
+             pushes the cells where the path may turn, so open areas cost a handful of heap operations
+Both return the same path format as Warehouse_Test.find_path (start and goal inclusive, [] if unreachable)
+and touch only the cells around the corridor they search, instead of the whole reachable area as BFS does.
+
+Node storage is array-backed and indexed by row * cols + col. Jumps along rows are byte searches over
+precomputed turn flags, so their cost does not grow with the length of the corridor in Python steps. Arrays are stamped with a search number,
+so a query never pays to reset state left behind by the previous one. The open list is a binary heap.
+
+Weights are the cost of entering a cell (>= 1); cells without weights cost 1.
+
+planner_for(grid) keeps the planners of the last few Grids it was asked about (LRU, keyed on the
+grid object and held through a weak reference), so one-off calls such as Warehouse_Test.find_path
+share a planner per map. On each call the grid's passable mask is compared with the planner's and
+only the cells that changed since are re-applied with set_cell.
+"""
+
+import heapq
+import weakref
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Grid import FREE, OBSTACLE, Grid, as_grid
+
+Cell = Tuple[int, int]
+
+# Up, down, left, right (the neighbour order used by Warehouse_Test.find_path)
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Grids whose planners planner_for keeps
+MAX_CACHED_PLANNERS = 4
+
+
+def manhattan(dr: int, dc: int) -> int:
+    return abs(dr) + abs(dc)
+
+
+def zero(dr: int, dc: int) -> int:
+    """No guidance: A* degrades to Dijkstra's algorithm."""
+    return 0
+
+
+# Admissible heuristics for 4-connected moves, scaled by the cheapest cell cost
+HEURISTICS: Dict[str, Callable[[int, int], int]] = {
+    "manhattan": manhattan,
+    "zero": zero,
+}
+
+
+class GridPlanner:
+    def __init__(self, grid: List[List[int]], weights: Optional[Sequence[Sequence[float]]] = None):
+        grid = as_grid(grid)
+        self.rows, self.cols = grid.rows, grid.cols
+        # Obstacles are cells with value 1, as in find_path
+        self.free = grid.passable_mask()
+        if weights is None:
+            self.cost = None
+            self.min_cost = 1
+        else:
+            self.cost = array('d', (float(w) for row in weights for w in row))
+            if min(self.cost) < 1:
+                raise ValueError("Cell weights must be at least 1")
+            self.min_cost = min(self.cost)
+        size = self.rows * self.cols
+        self._g = array('d', bytes(8 * size))
+        self._parent = array('i', bytes(4 * size))
+        # _stamp[i] == _search means node i was reached in the current search, _closed likewise
+        self._stamp = array('I', bytes(4 * size))
+        self._closed = array('I', bytes(4 * size))
+        self._search = 0
+        # Nodes expanded by the last query (useful to compare planners)
+        self.expanded = 0
+        self._build_turns()
+
+    def set_cell(self, cell: Cell, value: int, weight: Optional[float] = None) -> None:
+        """Edit one cell (value 1 blocks it) and optionally its weight."""
+        i = cell[0] * self.cols + cell[1]
+        if self.free[i] != (value != 1):
+            self.free[i] = value != 1
+            self._update_turns(*cell)
+        if weight is not None:
+            if self.cost is None:
+                raise ValueError("This planner was built without cell weights")
+            if weight < 1:
+                raise ValueError("Cell weights must be at least 1")
+            self.cost[i] = weight
+            self.min_cost = min(self.min_cost, weight)
+
+    def find_path(self, start: Cell, goal: Cell, method: str = "astar") -> List[Cell]:
+        if method not in PLANNERS:
+            raise ValueError(f"Unknown planner {method!r}, expected one of {sorted(PLANNERS)}")
+        return PLANNERS[method](self, start, goal)
+
+    def _begin(self, start: Cell, goal: Cell) -> Optional[Tuple[int, int]]:
+        """Start a new search; None if the goal is off the map or blocked (the start may be anywhere on the map)."""
+        self.expanded = 0
+        if not (0 <= start[0] < self.rows and 0 <= start[1] < self.cols):
+            return None
+        if not (0 <= goal[0] < self.rows and 0 <= goal[1] < self.cols):
+            return None
+        g = goal[0] * self.cols + goal[1]
+        if not self.free[g]:
+            return None
+        self._search += 1
+        if self._search == 0xFFFFFFFF:
+            # Stamp counter wrapped: reset once every four billion searches
+            self._stamp = array('I', bytes(len(self._stamp) * 4))
+            self._closed = array('I', bytes(len(self._closed) * 4))
+            self._search = 1
+        return start[0] * self.cols + start[1], g
+
+    def _reconstruct(self, start: int, goal: int) -> List[Cell]:
+        """Follow parents from goal to start, filling in the straight segments between jump points."""
+        cols = self.cols
+        nodes = [goal]
+        while nodes[-1] != start:
+            nodes.append(self._parent[nodes[-1]])
+        nodes.reverse()
+        path = [divmod(start, cols)]
+        for a, b in zip(nodes, nodes[1:]):
+            ar, ac = divmod(a, cols)
+            br, bc = divmod(b, cols)
+            dr, dc = (br > ar) - (br < ar), (bc > ac) - (bc < ac)
+            while (ar, ac) != (br, bc):
+                ar, ac = ar + dr, ac + dc
+                path.append((ar, ac))
+        return path
+
+    def astar(self, start: Cell, goal: Cell, heuristic: str = "manhattan") -> List[Cell]:
+        """A* search; with the default heuristic this returns a least-cost path."""
+        if start == goal:
+            return [start]
+        ends = self._begin(start, goal)
+        if ends is None:
+            return []
+        s, t = ends
+        h = HEURISTICS[heuristic]
+        scale = self.min_cost
+        rows, cols = self.rows, self.cols
+        free, cost = self.free, self.cost
+        g_score, parent, stamp, closed, search = self._g, self._parent, self._stamp, self._closed, self._search
+        gr, gc = goal
+
+        g_score[s] = 0.0
+        parent[s] = s
+        stamp[s] = search
+        # (f, -g, node): among equal f prefer deeper nodes, which finishes ties along one path
+        open_heap = [(scale * h(gr - start[0], gc - start[1]), 0.0, s)]
+        while open_heap:
+            _, neg_g, i = heapq.heappop(open_heap)
+            if closed[i] == search:
+                continue
+            if i == t:
+                return self._reconstruct(s, t)
+            closed[i] = search
+            self.expanded += 1
+            g = -neg_g
+            r, c = divmod(i, cols)
+            for dr, dc in DIRECTIONS:
+                nr, nc = r + dr, c + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+                j = nr * cols + nc
+                if not free[j] or closed[j] == search:
+                    continue
+                ng = g + (cost[j] if cost is not None else 1.0)
+                if stamp[j] != search or ng < g_score[j]:
+                    stamp[j] = search
+                    g_score[j] = ng
+                    parent[j] = i
+                    heapq.heappush(open_heap, (ng + scale * h(gr - nr, gc - nc), -ng, j))
+        return []
+
+    def _build_turns(self) -> None:
+        """
+        Precompute where horizontal jumps must stop: _turn_right[i] is set when a walk moving right
+        reaches cell i and the cell above or below it is free while the one above or below its left
+        neighbour is not (so an optimal path may turn there); _turn_left mirrors it.
+        """
+        free = np.frombuffer(self.free, dtype=np.uint8).reshape(self.rows, self.cols).astype(bool)
+        # Free cells above and below each cell; off the map counts as blocked
+        above = np.zeros_like(free)
+        above[1:] = free[:-1]
+        below = np.zeros_like(free)
+        below[:-1] = free[1:]
+        right = np.zeros_like(free)
+        left = np.zeros_like(free)
+        for side in (above, below):
+            right[:, 1:] |= side[:, 1:] & ~side[:, :-1]
+            left[:, :-1] |= side[:, :-1] & ~side[:, 1:]
+        self._turn_right = bytearray(right.astype(np.uint8).tobytes())
+        self._turn_left = bytearray(left.astype(np.uint8).tobytes())
+
+    def _update_turns(self, r: int, c: int) -> None:
+        """Refresh the turn flags that depend on cell (r, c) after it was edited."""
+        rows, cols, free = self.rows, self.cols, self.free
+
+        def is_free(row: int, col: int) -> bool:
+            return 0 <= row < rows and 0 <= col < cols and bool(free[row * cols + col])
+
+        for row in (r - 1, r + 1):
+            if not 0 <= row < rows:
+                continue
+            for col in (c - 1, c, c + 1):
+                if not 0 <= col < cols:
+                    continue
+                sides = (row - 1, row + 1)
+                i = row * cols + col
+                self._turn_right[i] = col > 0 and any(is_free(s, col) and not is_free(s, col - 1) for s in sides)
+                self._turn_left[i] = col < cols - 1 and any(is_free(s, col) and not is_free(s, col + 1) for s in sides)
+
+    def _jump_horizontal(self, r: int, c: int, dc: int, gr: int, gc: int) -> Optional[Cell]:
+        """
+        Walk from (r, c) left or right until reaching the goal or a cell where an optimal path may turn;
+        None if the walk hits an obstacle or the edge first. The walk is a pair of byte searches.
+        """
+        cols = self.cols
+        row_start = r * cols
+        i = row_start + c
+        if dc > 0:
+            end = self.free.find(0, i + 1, row_start + cols)
+            if end == -1:
+                end = row_start + cols
+            stop = self._turn_right.find(1, i + 1, end)
+            if gr == r and c < gc and row_start + gc < end and (stop == -1 or row_start + gc < stop):
+                stop = row_start + gc
+        else:
+            begin = self.free.rfind(0, row_start, i) + 1
+            if begin == 0:
+                begin = row_start
+            stop = self._turn_left.rfind(1, begin, i)
+            if gr == r and gc < c and row_start + gc >= begin and row_start + gc > stop:
+                stop = row_start + gc
+        if stop == -1:
+            return None
+        return r, stop - row_start
+
+    def _jump(self, r: int, c: int, dr: int, dc: int, gr: int, gc: int) -> Optional[Cell]:
+        """
+        Walk from (r, c) in direction (dr, dc) until reaching the goal or a cell where an optimal path may
+        turn; None if the walk hits an obstacle or the edge first. Vertical walks look sideways at every
+        step, horizontal walks stop where a cell above or below opens up.
+        """
+        if dr == 0:
+            return self._jump_horizontal(r, c, dc, gr, gc)
+        rows, cols, free = self.rows, self.cols, self.free
+        while True:
+            pr = r
+            r += dr
+            if not 0 <= r < rows or not free[r * cols + c]:
+                return None
+            if r == gr and c == gc:
+                return r, c
+            for sc in (c - 1, c + 1):
+                if 0 <= sc < cols and free[r * cols + sc] and not free[pr * cols + sc]:
+                    return r, c
+            if (self._jump_horizontal(r, c, -1, gr, gc) is not None
+                    or self._jump_horizontal(r, c, 1, gr, gc) is not None):
+                return r, c
+
+    def jps(self, start: Cell, goal: Cell) -> List[Cell]:
+        """Jump Point Search (4-connected); a shortest path on uniform-cost grids."""
+        if self.cost is not None:
+            raise ValueError("Jump Point Search needs uniform cell costs; use A* on weighted grids")
+        if start == goal:
+            return [start]
+        ends = self._begin(start, goal)
+        if ends is None:
+            return []
+        s, t = ends
+        cols = self.cols
+        g_score, parent, stamp, closed, search = self._g, self._parent, self._stamp, self._closed, self._search
+        gr, gc = goal
+
+        g_score[s] = 0.0
+        parent[s] = s
+        stamp[s] = search
+        open_heap = [(float(manhattan(gr - start[0], gc - start[1])), 0.0, s)]
+        while open_heap:
+            _, neg_g, i = heapq.heappop(open_heap)
+            if closed[i] == search:
+                continue
+            if i == t:
+                return self._reconstruct(s, t)
+            closed[i] = search
+            self.expanded += 1
+            g = -neg_g
+            r, c = divmod(i, cols)
+            pr, pc = divmod(parent[i], cols)
+            for dr, dc in DIRECTIONS:
+                # Never jump back towards the parent
+                if i != s and (dr, dc) == ((pr > r) - (pr < r), (pc > c) - (pc < c)):
+                    continue
+                point = self._jump(r, c, dr, dc, gr, gc)
+                if point is None:
+                    continue
+                j = point[0] * cols + point[1]
+                if closed[j] == search:
+                    continue
+                ng = g + abs(point[0] - r) + abs(point[1] - c)
+                if stamp[j] != search or ng < g_score[j]:
+                    stamp[j] = search
+                    g_score[j] = ng
+                    parent[j] = i
+                    heapq.heappush(open_heap, (ng + manhattan(gr - point[0], gc - point[1]), -ng, j))
+        return []
+
+
+# Planners by name, as accepted by GridPlanner.find_path and Warehouse_Test.find_path
+PLANNERS: Dict[str, Callable[[GridPlanner, Cell, Cell], List[Cell]]] = {
+    "astar": GridPlanner.astar,
+    "jps": GridPlanner.jps,
+}
+
+
+# id(grid) -> (weak reference to the grid, its planner), in LRU order
+_planners: "OrderedDict[int, Tuple[weakref.ref, GridPlanner]]" = OrderedDict()
+
+
+def planner_for(grid: Grid) -> GridPlanner:
+    """A uniform-cost GridPlanner for grid, reused across calls and brought up to date with its edits."""
+    key = id(grid)
+    entry = _planners.get(key)
+    # A dead reference means the id was recycled by a new grid
+    if entry is None or entry[0]() is not grid:
+        planner = GridPlanner(grid)
+        _planners[key] = (weakref.ref(grid), planner)
+        if len(_planners) > MAX_CACHED_PLANNERS:
+            _planners.popitem(last=False)
+        return planner
+    _planners.move_to_end(key)
+    planner = entry[1]
+    free = grid.passable_mask()
+    if free != planner.free:
+        changed = np.flatnonzero(np.frombuffer(free, dtype=np.uint8) != np.frombuffer(planner.free, dtype=np.uint8))
+        for i in changed.tolist():
+            planner.set_cell(divmod(i, grid.cols), FREE if free[i] else OBSTACLE)
+    return planner
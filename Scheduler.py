@@ -0,0 +1,102 @@
+"""
+Fixed-timestep scheduler that decouples simulation ticks from rendering.
+
+The simulation advances at a fixed tick rate; frames are drawn at most at the render rate and only
+when something changed (a tick ran or a repaint was requested). Between events the loop sleeps instead
+of spinning, waking at the poll rate to keep input handling responsive, so a visualized simulation that
+moves once per second costs almost no CPU.
+
+Catch-up policies, for when ticks fall behind wall-clock time (e.g. a slow frame or a suspended process):
+    "burst": run up to max_catch_up_ticks missed ticks back to back, then drop whatever is left
+    "drop":  never run more than one tick per loop; missed ticks are dropped
+While catching up, up to max_frame_skip consecutive frames are skipped so the simulation can recover.
+"""
+
+import time
+from typing import Callable, Optional
+
+CATCH_UP_POLICIES = ("burst", "drop")
+
+
+class FixedTimestepScheduler:
+    def __init__(self, tick_rate: float, render_rate: float = 60.0, poll_rate: float = 30.0,
+                 catch_up: str = "burst", max_catch_up_ticks: int = 5, max_frame_skip: int = 5,
+                 clock: Callable[[], float] = time.perf_counter, sleep: Callable[[float], None] = time.sleep):
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy {catch_up!r}, expected one of {CATCH_UP_POLICIES}")
+        self.tick_interval = 1.0 / tick_rate
+        self.render_interval = 1.0 / render_rate
+        self.poll_interval = 1.0 / poll_rate
+        self.catch_up = catch_up
+        self.max_catch_up_ticks = max_catch_up_ticks
+        self.max_frame_skip = max_frame_skip
+        self.clock = clock
+        self.sleep = sleep
+        self.running = False
+        self.needs_render = True
+        # Counters, useful to check the loop keeps up
+        self.ticks = 0
+        self.frames = 0
+        self.dropped_ticks = 0
+        self.skipped_frames = 0
+
+    def stop(self) -> None:
+        """Leave run() after the current iteration."""
+        self.running = False
+
+    def request_render(self) -> None:
+        """Draw a frame at the next opportunity even if no tick ran (e.g. after input or a window expose)."""
+        self.needs_render = True
+
+    def run(self, tick: Callable[[], None], render: Callable[[], None],
+            poll: Optional[Callable[[], None]] = None) -> None:
+        """
+        Drive the loop until stop() is called.
+        tick advances the simulation by one step, render draws a frame, and poll handles input
+        (it may call stop() or request_render()).
+        """
+        self.running = True
+        now = self.clock()
+        next_tick = now + self.tick_interval
+        next_render = now
+        frames_skipped = 0
+        while self.running:
+            if poll is not None:
+                poll()
+                if not self.running:
+                    break
+
+            now = self.clock()
+            ticks_run = 0
+            while now >= next_tick and ticks_run < self.max_catch_up_ticks:
+                tick()
+                self.ticks += 1
+                ticks_run += 1
+                next_tick += self.tick_interval
+                self.needs_render = True
+                if self.catch_up == "drop":
+                    break
+            if now >= next_tick:
+                # Too far behind to catch up: drop the missed ticks and resynchronise with the clock
+                missed = int((now - next_tick) / self.tick_interval) + 1
+                self.dropped_ticks += missed
+                next_tick += missed * self.tick_interval
+
+            if self.needs_render and now >= next_render:
+                if ticks_run > 1 and frames_skipped < self.max_frame_skip:
+                    frames_skipped += 1
+                    self.skipped_frames += 1
+                else:
+                    render()
+                    self.frames += 1
+                    self.needs_render = False
+                    frames_skipped = 0
+                    next_render = now + self.render_interval
+
+            # Sleep until the next tick, pending frame or input poll, whichever comes first
+            wake = min(next_tick, now + self.poll_interval)
+            if self.needs_render:
+                wake = min(wake, max(next_render, now))
+            delay = wake - self.clock()
+            if delay > 0:
+                self.sleep(delay)
@@ -0,0 +1,255 @@
+"""
+Chunked grid maps stored in a memory-mapped file, for maps larger than memory.
+
+A TiledGrid has the cell accessors of a Grid (get, set, in_bounds, is_valid_position, valid_moves,
+neighbours, grid[r][c]) so the environments' is_valid_position, is_valid_move and get_valid_moves
+work on it unchanged, but its cells live in a file instead of a bytearray. The file holds the map
+as square tiles of tile_size x tile_size cells, one byte per cell as in Grid, each tile stored
+contiguously (tile-major, tiles row by row; edge tiles are padded). A cell lookup only touches the
+pages of its own tile.
+
+Tiles are paged in on demand: the file is mapped with mmap and a tile becomes resident when an
+agent or planner first reads or writes one of its cells. Resident tiles are tracked in LRU order
+(an OrderedDict, as in Distance_Fields.DistanceFieldCache); once more than max_tiles are resident
+the least recently used one is evicted and its pages are handed back to the OS with
+madvise(MADV_DONTNEED), so the resident footprint stays around max_tiles tiles however large the
+map is. Writes go straight to the shared mapping, so an evicted tile never loses edits.
+
+Whole-map operations (masks, NumPy views, neighbour tables) are deliberately missing; window()
+copies a region into an ordinary Grid for planners that need one.
+"""
+
+import mmap
+import os
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional
+
+from Grid import DIRECTIONS, FREE, Cell, Grid, as_grid
+
+DEFAULT_TILE_SIZE = 256
+DEFAULT_MAX_TILES = 64
+
+
+class TiledGrid:
+    def __init__(self, path: str, rows: int, cols: int, tile_size: int = DEFAULT_TILE_SIZE,
+                 max_tiles: int = DEFAULT_MAX_TILES, writable: bool = True):
+        """Open an existing tile file (see create and from_grid) of a rows x cols map."""
+        if rows < 1 or cols < 1:
+            raise ValueError("A grid needs at least one row and one column")
+        if tile_size < 1 or max_tiles < 1:
+            raise ValueError("tile_size and max_tiles must be positive")
+        self.rows, self.cols = rows, cols
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.tile_rows = -(-rows // tile_size)
+        self.tile_cols = -(-cols // tile_size)
+        self.tile_bytes = tile_size * tile_size
+        size = self.tile_rows * self.tile_cols * self.tile_bytes
+        if os.path.getsize(path) != size:
+            raise ValueError(f"{path} holds {os.path.getsize(path)} bytes, expected {size} "
+                             f"for a {rows}x{cols} map in {tile_size}x{tile_size} tiles")
+        self.path = path
+        with open(path, "r+b" if writable else "rb") as f:
+            self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        # Resident tiles (tile number -> memoryview of its bytes in the mapping), in LRU order
+        self._tiles: "OrderedDict[int, memoryview]" = OrderedDict()
+        self._last_number = -1
+        self._last_tile: Optional[memoryview] = None
+        self.loads = 0
+        self.evictions = 0
+
+    @classmethod
+    def create(cls, path: str, rows: int, cols: int, tile_size: int = DEFAULT_TILE_SIZE,
+               max_tiles: int = DEFAULT_MAX_TILES) -> "TiledGrid":
+        """A new all-FREE map; the file is sparse, so untouched tiles take no disk space either."""
+        size = -(-rows // tile_size) * -(-cols // tile_size) * tile_size * tile_size
+        with open(path, "wb") as f:
+            f.truncate(size)
+        return cls(path, rows, cols, tile_size, max_tiles)
+
+    @classmethod
+    def from_grid(cls, grid, path: str, tile_size: int = DEFAULT_TILE_SIZE,
+                  max_tiles: int = DEFAULT_MAX_TILES) -> "TiledGrid":
+        """Write a Grid (or nested list) to a tile file and open it."""
+        grid = as_grid(grid)
+        tiled = cls.create(path, grid.rows, grid.cols, tile_size, max_tiles)
+        cells = grid.array()
+        for tr in range(0, grid.rows, tile_size):
+            for tc in range(0, grid.cols, tile_size):
+                tiled.paste(cells[tr:tr + tile_size, tc:tc + tile_size].tobytes(), (tr, tc),
+                            min(tile_size, grid.cols - tc))
+        return tiled
+
+    def close(self) -> None:
+        """Flush and unmap the file."""
+        if self._map.closed:
+            return
+        for view in self._tiles.values():
+            view.release()
+        self._tiles.clear()
+        self._last_number, self._last_tile = -1, None
+        self.flush()
+        self._map.close()
+
+    def flush(self) -> None:
+        """Write edits through to the file."""
+        if not self._map.closed:
+            self._map.flush()
+
+    def __enter__(self) -> "TiledGrid":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def resident_tiles(self) -> int:
+        return len(self._tiles)
+
+    def _tile(self, r: int, c: int) -> memoryview:
+        """The tile holding cell (r, c), paged in (and the LRU tile evicted) if needed."""
+        ts = self.tile_size
+        number = (r // ts) * self.tile_cols + c // ts
+        if number == self._last_number:
+            return self._last_tile
+        tile = self._tiles.get(number)
+        if tile is None:
+            start = number * self.tile_bytes
+            tile = memoryview(self._map)[start:start + self.tile_bytes]
+            self._tiles[number] = tile
+            self.loads += 1
+            if len(self._tiles) > self.max_tiles:
+                self._evict(*self._tiles.popitem(last=False))
+        else:
+            self._tiles.move_to_end(number)
+        self._last_number, self._last_tile = number, tile
+        return tile
+
+    def _evict(self, number: int, view: memoryview) -> None:
+        view.release()
+        self.evictions += 1
+        start = number * self.tile_bytes
+        # madvise needs page-aligned ranges; tiles of 64x64 cells or more always are
+        if hasattr(mmap, "MADV_DONTNEED") and start % mmap.PAGESIZE == 0 and self.tile_bytes % mmap.PAGESIZE == 0:
+            self._map.madvise(mmap.MADV_DONTNEED, start, self.tile_bytes)
+
+    # Grid-compatible cell access
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, r: int) -> "_TiledRow":
+        if r < 0:
+            r += self.rows
+        if not 0 <= r < self.rows:
+            raise IndexError("grid row out of range")
+        return _TiledRow(self, r)
+
+    def __iter__(self) -> Iterator["_TiledRow"]:
+        for r in range(self.rows):
+            yield _TiledRow(self, r)
+
+    def in_bounds(self, cell: Cell) -> bool:
+        return 0 <= cell[0] < self.rows and 0 <= cell[1] < self.cols
+
+    def get(self, cell: Cell) -> int:
+        r, c = cell
+        ts = self.tile_size
+        return self._tile(r, c)[(r % ts) * ts + c % ts]
+
+    def set(self, cell: Cell, value: int) -> None:
+        r, c = cell
+        ts = self.tile_size
+        self._tile(r, c)[(r % ts) * ts + c % ts] = value
+
+    def is_valid_position(self, cell: Cell, allowed: Iterable[int] = (FREE,)) -> bool:
+        """In bounds and of an allowed cell type (free by default)."""
+        r, c = cell
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.get(cell) in allowed
+
+    def neighbours(self, cell: Cell) -> List[Cell]:
+        """In-bounds 4-neighbours of a cell (up, down, left, right order)."""
+        r, c = cell
+        return [(r + dr, c + dc) for dr, dc in DIRECTIONS if 0 <= r + dr < self.rows and 0 <= c + dc < self.cols]
+
+    def valid_moves(self, cell: Cell, allowed: Iterable[int] = (FREE,)) -> List[Cell]:
+        """Neighbours of cell whose type is allowed (up, down, left, right order)."""
+        return [n for n in self.neighbours(cell) if self.get(n) in allowed]
+
+    def count(self, value: int) -> int:
+        """Cells of a type, streamed one tile at a time (padding excluded)."""
+        total = 0
+        for top in range(0, self.rows, self.tile_size):
+            for left in range(0, self.cols, self.tile_size):
+                total += self._block(top, left).count(value)
+        return total
+
+    def _block(self, top: int, left: int) -> bytes:
+        """The cells of the tile at (top, left) without padding, row-major."""
+        ts = self.tile_size
+        tile = self._tile(top, left)
+        height, width = min(ts, self.rows - top), min(ts, self.cols - left)
+        if width == ts:
+            return tile[:height * ts].tobytes()
+        return b"".join(tile[i * ts:i * ts + width] for i in range(height))
+
+    def paste(self, cells: bytes, at: Cell, width: int) -> None:
+        """Write a row-major block of cells, width cells wide, with its top-left corner at cell at."""
+        top, left = at
+        if len(cells) % width:
+            raise ValueError("cells must hold whole rows of the given width")
+        height = len(cells) // width
+        if not (self.in_bounds(at) and top + height <= self.rows and left + width <= self.cols):
+            raise ValueError(f"A {height}x{width} block at {at} does not fit on the map")
+        ts = self.tile_size
+        for r in range(top, top + height):
+            row = cells[(r - top) * width:(r - top + 1) * width]
+            c = left
+            while c < left + width:
+                span = min(ts - c % ts, left + width - c)
+                start = (r % ts) * ts + c % ts
+                self._tile(r, c)[start:start + span] = row[c - left:c - left + span]
+                c += span
+
+    def window(self, top: int, left: int, rows: int, cols: int) -> Grid:
+        """A copy of a region (clipped to the map) as an ordinary Grid, e.g. to plan inside it."""
+        top, left = max(top, 0), max(left, 0)
+        rows, cols = min(rows, self.rows - top), min(cols, self.cols - left)
+        if rows < 1 or cols < 1:
+            raise ValueError("The window does not overlap the map")
+        ts = self.tile_size
+        cells = bytearray(rows * cols)
+        for r in range(top, top + rows):
+            c = left
+            while c < left + cols:
+                span = min(ts - c % ts, left + cols - c)
+                start = (r % ts) * ts + c % ts
+                i = (r - top) * cols + c - left
+                cells[i:i + span] = self._tile(r, c)[start:start + span]
+                c += span
+        return Grid(rows, cols, cells)
+
+
+class _TiledRow:
+    """One row of a TiledGrid, for grid[r][c] reads and writes."""
+
+    __slots__ = ("grid", "r")
+
+    def __init__(self, grid: TiledGrid, r: int):
+        self.grid, self.r = grid, r
+
+    def __len__(self) -> int:
+        return self.grid.cols
+
+    def __getitem__(self, c: int) -> int:
+        if c < 0:
+            c += self.grid.cols
+        if not 0 <= c < self.grid.cols:
+            raise IndexError("grid column out of range")
+        return self.grid.get((self.r, c))
+
+    def __setitem__(self, c: int, value: int) -> None:
+        if c < 0:
+            c += self.grid.cols
+        if not 0 <= c < self.grid.cols:
+            raise IndexError("grid column out of range")
+        self.grid.set((self.r, c), value)
@@ -0,0 +1,181 @@
+"""
+Monte Carlo tournament runner for game strategies.
+
+Runs N seeds x M strategy pairings of the cops-and-robbers game (Main.py) and the warehouse game
+(Warehouse_Test.py) headless on a process pool, collects per-run metrics and merges them into
+aggregate statistics per pairing. Warehouse pairings are a target strategy, a planning mode and a
+delivery mode: "flat" clears delivered packages away, "stacked" sets them down in the delivery zone as
+obstacles, so the floor changes under the robots' plans.
+
+Usage:
+    python Tournament.py --seeds 100 --ticks 1000 [--game cops_and_robbers|warehouse] [--processes N] [--output results.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from itertools import product
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Tuple
+
+# Workers import Main/Warehouse_Test, which import pygame; keep its banner out of the output
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+import Main
+import Movement_Kernel
+import Warehouse_Test
+
+Metrics = Dict[str, float]
+
+
+def run_cops_and_robbers(seed: int, pairing: Tuple[str, ...], n_ticks: int) -> Metrics:
+    """Play one seeded headless cops-and-robbers game and measure it."""
+    cop_strategy, robber_strategy = pairing
+    random.seed(seed)
+    game = Main.CopsAndRobbersGame(headless=True, cop_strategy=cop_strategy, robber_strategy=robber_strategy)
+    min_cop_distance = math.inf
+    zone_visits = 0
+    violations = 0
+    last_zone = [robber.last_safety_zone for robber in game.robbers]
+    current_zone = [game.is_in_safety_zone(robber.pos) for robber in game.robbers]
+    for _ in range(n_ticks):
+        game.step()
+        cops = np.array([cop.pos for cop in game.cops]).reshape(-1, 2)
+        robbers = np.array([robber.pos for robber in game.robbers]).reshape(-1, 2)
+        if len(cops) and len(robbers):
+            gaps = np.abs(cops[:, None, :] - robbers[None, :, :])
+            min_cop_distance = min(min_cop_distance, int(gaps.sum(axis=-1).min()))
+            # Safety: robbers never adjacent to (or on) a cop
+            violations += int((gaps.max(axis=-1) <= 1).sum())
+        # Safety: cops never in or adjacent to a safety zone
+        violations += sum(game.is_in_or_adjacent_to_safety_zone(cop.pos) for cop in game.cops)
+        for i, robber in enumerate(game.robbers):
+            zone = game.is_in_safety_zone(robber.pos)
+            # A visit is an entry into a safety zone other than the one most recently occupied
+            if zone != -1 and zone != current_zone[i] and zone != last_zone[i]:
+                zone_visits += 1
+                last_zone[i] = zone
+            current_zone[i] = zone
+    return {
+        "min_cop_distance": min_cop_distance,
+        "safety_zone_visits": zone_visits,
+        "constraint_violations": violations,
+    }
+
+
+def run_warehouse(seed: int, pairing: Tuple[str, ...], n_ticks: int) -> Metrics:
+    """Play one seeded headless warehouse game and measure it."""
+    strategy, planning, delivery = pairing
+    random.seed(seed)
+    grid = Warehouse_Test.generate_grid()
+    robots = Warehouse_Test.default_robots(len(grid))
+    # Seeded package layout, so each seed exercises a different delivery schedule
+    packages = Warehouse_Test.generate_new_packages(grid, robots)
+    sim = Warehouse_Test.WarehouseSimulation(grid, robots, packages, strategy=strategy, planning=planning,
+                                             stack_deliveries=DELIVERY_MODES[delivery])
+    violations = 0
+    for _ in range(n_ticks):
+        sim.step()
+        positions = [robot.pos for robot in sim.robots]
+        # Safety: robots never share a cell or stand on an obstacle
+        violations += len(positions) - len(set(positions))
+        violations += sum(not Warehouse_Test.is_valid_move(sim.grid, pos) for pos in positions)
+    return {
+        "deliveries": len(sim.delivered_packages),
+        "planner_calls": sim.planner_calls,
+        "constraint_violations": violations,
+    }
+
+
+# Warehouse delivery modes: whether delivered packages are stacked in the delivery zone as obstacles
+DELIVERY_MODES = {
+    "flat": False,
+    "stacked": True,
+}
+
+GAMES = {
+    "cops_and_robbers": run_cops_and_robbers,
+    "warehouse": run_warehouse,
+}
+
+# Every combination of the registered strategies for each side of each game
+PAIRINGS = {
+    "cops_and_robbers": list(product(Movement_Kernel.COP_STRATEGIES, Movement_Kernel.ROBBER_STRATEGIES)),
+    "warehouse": list(product(Warehouse_Test.TARGET_STRATEGIES, Warehouse_Test.PLANNING_MODES, DELIVERY_MODES)),
+}
+
+
+def _run_job(job: Tuple[str, Tuple[str, ...], int, int]) -> Tuple[str, Tuple[str, ...], int, Metrics]:
+    game, pairing, seed, n_ticks = job
+    return game, pairing, seed, GAMES[game](seed, pairing, n_ticks)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Aggregate one metric over all runs of a pairing."""
+    finite = [v for v in values if math.isfinite(v)]
+    if not finite:
+        return {"runs": len(values), "mean": math.nan, "std": math.nan, "min": math.nan, "max": math.nan}
+    mean = sum(finite) / len(finite)
+    std = math.sqrt(sum((v - mean) ** 2 for v in finite) / len(finite))
+    return {"runs": len(values), "mean": mean, "std": std, "min": min(finite), "max": max(finite)}
+
+
+def run_tournament(games: List[str], seeds: List[int], n_ticks: int,
+                   processes: Optional[int] = None) -> Dict[str, Dict[str, Dict[str, Dict[str, float]]]]:
+    """
+    Run every (game, pairing, seed) combination on a process pool (one worker per core by default)
+    and return {game: {"cop_strategy vs robber_strategy": {metric: summary}}}.
+    """
+    jobs = [(game, pairing, seed, n_ticks) for game in games for pairing in PAIRINGS[game] for seed in seeds]
+    collected: Dict[Tuple[str, Tuple[str, ...]], Dict[str, List[float]]] = {}
+    processes = processes or os.cpu_count() or 1
+    with Pool(processes=processes) as pool:
+        # Results arrive in completion order; seeds make each run reproducible regardless
+        chunksize = max(1, len(jobs) // (4 * processes))
+        for game, pairing, seed, metrics in pool.imap_unordered(_run_job, jobs, chunksize=chunksize):
+            runs = collected.setdefault((game, pairing), {})
+            for name, value in metrics.items():
+                runs.setdefault(name, []).append(value)
+
+    results: Dict[str, Dict[str, Dict[str, Dict[str, float]]]] = {}
+    for (game, pairing), runs in sorted(collected.items()):
+        results.setdefault(game, {})[" vs ".join(pairing)] = {name: summarize(values) for name, values in runs.items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a seeded Monte Carlo tournament of game strategies.")
+    parser.add_argument("--game", choices=sorted(GAMES), action="append",
+                        help="game to run (repeatable, default: all games)")
+    parser.add_argument("--seeds", type=int, default=100, help="number of seeds per pairing")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=1000, help="ticks per game")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", help="write the aggregate statistics to this JSON file")
+    args = parser.parse_args()
+
+    games = args.game or sorted(GAMES)
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    start = time.perf_counter()
+    results = run_tournament(games, seeds, args.ticks, args.processes)
+    elapsed = time.perf_counter() - start
+
+    for game, pairings in results.items():
+        print(f"== {game} ==")
+        for pairing, metrics in pairings.items():
+            summary = ", ".join(f"{name}={stats['mean']:.2f}±{stats['std']:.2f}" for name, stats in metrics.items())
+            print(f"  {pairing}: {summary}")
+    print(f"{len(seeds)} seeds per pairing in {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
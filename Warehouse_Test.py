@@ -2,9 +2,26 @@ import time
 import pygame
 import sys
 import random
+import argparse
 from collections import deque
-from typing import List, Tuple
-from Enviorment1 import generate_grid, draw_grid  # Import the environment layout
+from itertools import count
+from typing import List, Optional, Tuple
+import numpy as np
+import Enviorment1
+from Enviorment1 import generate_grid  # Import the environment layout
+from Grid_Renderer import GridRenderer
+from Scheduler import FixedTimestepScheduler
+from Distance_Fields import UNREACHABLE, DistanceFieldCache
+from Connectivity import separates
+from Path_Planner import GridPlanner, planner_for
+from Hierarchical_Planner import HierarchicalPlanner
+from Grid_Pyramid import GridPyramid
+from Cooperative_Planner import CooperativePlanner
+from Incremental_Planner import DStarLite
+from Assignment import FORBIDDEN, IncrementalAssignment
+from Free_Cells import FreeCellIndex
+from Grid import FREE, SAFETY_ZONE, Grid, as_grid
+from Trajectory_Recorder import TrajectoryReader, TrajectoryWriter, replay
 
 # --------------------------------------------------
 # Environment Setup (Warehouse Grid using Enviorment1 layout)
@@ -23,21 +40,40 @@ COLORS = {
     "grid_line": (128, 128, 128)
 }
 
-# Initialize Pygame (the Enviorment1.py file should not reinitialize display)
-pygame.init()
-screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
-pygame.display.set_caption("Warehouse Package Delivery")
+# Display surface, created by init_display() so the simulation logic can be imported and run headless
+screen = None
+
+def init_display() -> pygame.Surface:
+    """Initialize Pygame and open the window (shared with Enviorment1)"""
+    global screen
+    screen = Enviorment1.init_display()
+    pygame.display.set_caption("Warehouse Package Delivery")
+    return screen
+
+# Robot states in the order they are numbered in trajectory recordings
+ROBOT_STATES = ("navigating", "carrying")
 
 class Robot:
+    # Stable identifiers (unlike id(), never reused), e.g. for keying cached assignments
+    _ids = count()
+
     def __init__(self, initial_pos, delivery_zone):
+        self.id = next(Robot._ids)
         self.pos = initial_pos  # (row, col)
         self.delivery_zone = delivery_zone  # (row_min, col_min, row_max, col_max)
         self.state = "navigating"  # or "carrying"
         self.package = None  # Reference to the package object if carrying
         self.plan = []  # List of positions computed by the planner
+        self.plan_index = 0  # Cursor into plan: the robot stands on plan[plan_index]
+        self.plan_target = None  # Target the plan leads to; None once the plan is invalidated
+        self.plan_version = -1  # Grid version an empty (no path) plan was computed at
+        self.search = None  # Incremental (D* Lite) search state kept between ticks
 
 class Package:
+    _ids = count()
+
     def __init__(self, pos, delivery_zone):
+        self.id = next(Package._ids)
         self.pos = pos  # (row, col)
         self.delivery_zone = delivery_zone  # (row_min, col_min, row_max, col_max)
 
@@ -45,152 +81,479 @@ def get_drop_off_point(zone: Tuple[int, int, int, int]) -> Tuple[int, int]:
     """Compute the drop-off point (center) of a delivery zone."""
     return ((zone[0] + zone[2]) // 2, (zone[1] + zone[3]) // 2)
 
-def draw_warehouse_grid(grid: List[List[int]], robots: List[Robot],
+# Renderer holding the cached background of the grid being drawn
+_renderer = None
+_renderer_grid = None
+_renderer_version = None
+
+def draw_warehouse_grid(grid: Grid, robots: List[Robot],
                           packages: List[Package], delivered_packages: List[Tuple[int, int]]) -> None:
     """
     Draw the environment layout (from Enviorment1.py) and then overlay robots, packages,
-    and delivered packages.
+    and delivered packages. The layout and grid lines are rendered once; each frame only the
+    cells whose overlay changed are repainted and pushed to the display. The layout is rendered
+    again after edits through Grid.set (stacked deliveries), detected by Grid.version.
     """
-    # Draw the base grid from the environment layout
-    draw_grid(grid)
-    
-    # Overlay robots
-    for robot in robots:
-        pygame.draw.rect(screen, COLORS["robot"],
-                         (robot.pos[1] * CELL_SIZE, robot.pos[0] * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-    # Overlay packages
-    for package in packages:
-        pygame.draw.rect(screen, COLORS["package"],
-                         (package.pos[1] * CELL_SIZE, package.pos[0] * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-    # Overlay delivered packages
-    for pos in delivered_packages:
-        pygame.draw.rect(screen, COLORS["delivered_package"],
-                         (pos[1] * CELL_SIZE, pos[0] * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-    # Draw grid lines (to ensure clarity)
-    for i in range(GRID_SIZE + 1):
-        pygame.draw.line(screen, COLORS["grid_line"],
-                         (i * CELL_SIZE, 0), (i * CELL_SIZE, WINDOW_SIZE))
-        pygame.draw.line(screen, COLORS["grid_line"],
-                         (0, i * CELL_SIZE), (WINDOW_SIZE, i * CELL_SIZE))
-
-def is_valid_move(grid: List[List[int]], pos: Tuple[int, int]) -> bool:
+    global _renderer, _renderer_grid, _renderer_version
+    if _renderer is None or _renderer_grid is not grid or _renderer_version != grid.version:
+        _renderer = GridRenderer(screen, grid.rows, grid.cols, CELL_SIZE, Enviorment1.WHITE, COLORS["grid_line"])
+        _renderer.paint_static(grid.layer_cells("obstacle"), Enviorment1.BLACK)
+        _renderer_grid, _renderer_version = grid, grid.version
+
+    # Later overlays win where cells coincide, matching the original drawing order
+    sprites = {robot.pos: ("rect", COLORS["robot"]) for robot in robots}
+    sprites.update({package.pos: ("rect", COLORS["package"]) for package in packages})
+    sprites.update({pos: ("rect", COLORS["delivered_package"]) for pos in delivered_packages})
+    _renderer.render(sprites)
+
+def is_valid_move(grid: Grid, pos: Tuple[int, int]) -> bool:
     """Check if a move to the given position is valid (non-obstacle)."""
-    r, c = pos
-    if r < 0 or r >= GRID_SIZE or c < 0 or c >= GRID_SIZE:
-        return False
     # In the imported grid, 0 represents free (white) and 1 represents obstacles (black)
-    return grid[r][c] == 0
+    return as_grid(grid).is_valid_position(pos)
+
+def nearest_package(robot: Robot, packages: List[Package]) -> Package:
+    """Target the Manhattan-nearest package."""
+    return min(packages, key=lambda p: abs(p.pos[0] - robot.pos[0]) + abs(p.pos[1] - robot.pos[1]))
+
+def first_package(robot: Robot, packages: List[Package]) -> Package:
+    """Target packages in the order they were generated."""
+    return packages[0]
+
+# Package selection strategies by name (used by WarehouseSimulation and Tournament.py).
+# "optimal" has no per-robot rule: WarehouseSimulation.assign_packages matches all robots to packages at once.
+TARGET_STRATEGIES = {
+    "nearest": nearest_package,
+    "fifo": first_package,
+    "optimal": None,
+}
 
-def run_environment():
-    """Main loop to run the warehouse package delivery environment."""
-    global global_grid, global_robots, global_packages
-    # Use the environment layout from Enviorment1.py
-    global_grid = generate_grid()
-    # Create two robots with fixed delivery zones
-    global_robots = [
+# How robots plan: each on its own from cached distance fields (robots may collide), each on its own
+# with a D* Lite search kept between ticks and repaired when cells change, or booking cells in a shared
+# space-time reservation table so no two robots share a cell or swap places
+PLANNING_MODES = ("independent", "incremental", "cooperative")
+
+def default_robots(grid_size: int = GRID_SIZE) -> List[Robot]:
+    """Two robots with fixed delivery zones, as in the original layout."""
+    return [
         Robot((1, 1), (2, 2, 5, 5)),
-        Robot((GRID_SIZE - 2, GRID_SIZE - 2), (2, GRID_SIZE - 5, 5, GRID_SIZE - 2))
+        Robot((grid_size - 2, grid_size - 2), (2, grid_size - 5, 5, grid_size - 2))
     ]
-    global_packages = [
+
+def default_packages(grid_size: int = GRID_SIZE) -> List[Package]:
+    return [
         Package((4, 4), (2, 2, 5, 5)),
-        Package((4, GRID_SIZE - 5), (2, GRID_SIZE - 5, 5, GRID_SIZE - 2))
+        Package((4, grid_size - 5), (2, grid_size - 5, 5, grid_size - 2))
     ]
-    delivered_packages = []
-    running = True
-    clock = pygame.time.Clock()
 
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-        # Simple reactive behavior for each robot
-        for robot in global_robots:
-            if robot.state == "navigating":
-                # Plan a path to the nearest package
-                if global_packages:
-                    target = min(global_packages, key=lambda p: abs(p.pos[0] - robot.pos[0]) + abs(p.pos[1] - robot.pos[1])).pos
-                    robot.plan = find_path(global_grid, robot.pos, target)
-                    if robot.plan and len(robot.plan) > 1:
-                        robot.pos = robot.plan[1]
-            elif robot.state == "carrying":
-                # Plan a path to the designated drop-off point
-                drop_off = get_drop_off_point(robot.delivery_zone)
-                robot.plan = find_path(global_grid, robot.pos, drop_off)
-                if robot.plan and len(robot.plan) > 1:
-                    robot.pos = robot.plan[1]
+class WarehouseSimulation:
+    """
+    The warehouse package delivery rules without any drawing, so they can run headless
+    (run_environment draws one of these every frame).
+    """
+    def __init__(self, grid: Optional[Grid] = None, robots: Optional[List[Robot]] = None,
+                 packages: Optional[List[Package]] = None, strategy: str = "nearest", planning: str = "independent",
+                 stack_deliveries: bool = False, batch_size: int = 2, rng: random.Random = random):
+        if planning not in PLANNING_MODES:
+            raise ValueError(f"Unknown planning mode {planning!r}, expected one of {PLANNING_MODES}")
+        self.grid = as_grid(grid) if grid is not None else generate_grid()
+        self.robots = robots if robots is not None else default_robots(len(self.grid))
+        self.packages = packages if packages is not None else default_packages(len(self.grid))
+        self.delivered_packages = []
+        self.choose_package = TARGET_STRATEGIES[strategy]
+        # robot -> package from the last batched assignment, what it was solved for, and the solver
+        # state (potentials and matching) the next assignment starts from
+        self.assignment = {}
+        self.assignment_key = None
+        self.assigner = IncrementalAssignment()
+        # Distance fields towards package and drop-off cells, shared by all robots and reused across ticks
+        self.distance_fields = DistanceFieldCache(self.grid)
+        self.cooperative = CooperativePlanner(self.grid, distance_fields=self.distance_fields) \
+            if planning == "cooperative" else None
+        # In "incremental" mode each robot keeps one D* Lite search, re-rooted when its target changes
+        self.incremental = planning == "incremental"
+        # Delivered packages are set down in the delivery zone as obstacles and cleared with the next batch
+        self.stack_deliveries = stack_deliveries
+        # Packages spawned per batch, drawn from rng (pass a seeded random.Random for repeatable runs)
+        self.batch_size = batch_size
+        self.rng = rng
+        # Free spawn points, kept current as robots move, packages come and go and cells flip
+        self.free_cells = FreeCellIndex(self.grid, spawn_region(self.grid),
+                                        [robot.pos for robot in self.robots] + [package.pos for package in self.packages])
+        self.stacked = []
+        # Robots whose stored plan crosses each cell, so an edit invalidates exactly those plans
+        self.path_users = {}
+        # Path searches run so far (plans computed, D* Lite searches started, space-time searches)
+        self.planner_calls = 0
+        self.tick = 0
+        self.recorder = None
+
+    def package_target(self, robot: Robot) -> Optional[Tuple[int, int]]:
+        """Position of the package a navigating robot heads for (None if it has nothing to fetch)."""
+        if not self.packages:
+            return None
+        if self.choose_package is not None:
+            return self.choose_package(robot, self.packages).pos
+        self.assign_packages()
+        package = self.assignment.get(robot)
+        return package.pos if package is not None else None
+
+    def assign_packages(self) -> None:
+        """
+        Match navigating robots to packages so the total walking distance (true path length, walls
+        included) is minimal and no two robots chase the same package. The matching is only re-solved
+        when a package spawns or is picked up, or a robot starts or stops navigating; in between every
+        robot keeps walking to its package, which keeps the matching optimal. Re-solving is
+        incremental: IncrementalAssignment starts from the previous potentials and matching, so only
+        the robots whose package changed (and those they displace) search for a new one.
+        """
+        robots = [robot for robot in self.robots if robot.state == "navigating"]
+        key = (tuple(robot.id for robot in robots), tuple(package.id for package in self.packages))
+        if key == self.assignment_key:
+            return
+        self.assignment_key = key
+        self.assignment = {}
+        if not robots or not self.packages:
+            self.assigner.solve([], [], np.empty((0, 0)))
+            return
+        # One cached distance field per package prices it for every robot at once
+        fields = self.distance_fields
+        fields.max_entries = max(fields.max_entries, 2 * len(self.packages))
+        cols = fields.cols
+        cells = np.array([robot.pos[0] * cols + robot.pos[1] for robot in robots])
+        cost = np.empty((len(robots), len(self.packages)))
+        for j, package in enumerate(self.packages):
+            column = np.frombuffer(fields.field(package.pos), dtype=np.int32)[cells].astype(np.float64)
+            cost[:, j] = column
+        for i, robot in enumerate(robots):
+            # Robots standing on a blocked cell are not in the fields; price them by their neighbours
+            if not fields.free[cells[i]]:
+                cost[i] = [fields.distance(robot.pos, package.pos) for package in self.packages]
+        cost[cost == UNREACHABLE] = FORBIDDEN
+        packages = {package.id: package for package in self.packages}
+        matching = self.assigner.solve(key[0], key[1], cost)
+        for robot in robots:
+            if robot.id in matching:
+                self.assignment[robot] = packages[matching[robot.id]]
+
+    def move_towards(self, robot: Robot, target: Tuple[int, int]) -> None:
+        """Take one step along a shortest path to target (the same moves find_path would allow)."""
+        if self.incremental:
+            if robot.search is None or robot.search.goal != target:
+                # Re-root the robot's search, starting from the goal's shared distance field
+                field = self.distance_fields.field(target)
+                if robot.search is None:
+                    robot.search = DStarLite(self.distance_fields.free, self.grid.rows, self.grid.cols, robot.pos,
+                                             target, field)
+                else:
+                    robot.search.reset(robot.pos, target, field)
+                self.planner_calls += 1
+            robot.search.move_to(robot.pos)
+            next_pos = robot.search.next_step()
+        else:
+            if not self.plan_is_valid(robot, target):
+                self.replan(robot, target)
+            next_pos = None
+            if robot.plan_index + 1 < len(robot.plan):
+                # The cell being left is behind the robot now; edits to it no longer affect the plan
+                self.release_cell(robot, robot.plan[robot.plan_index])
+                robot.plan_index += 1
+                next_pos = robot.plan[robot.plan_index]
+        if next_pos is not None:
+            robot.pos = next_pos
+
+    def plan_is_valid(self, robot: Robot, target: Tuple[int, int]) -> bool:
+        """
+        O(1) check that the stored plan can still be followed: same target, not invalidated by an edit
+        to one of its cells, and the robot is where the plan says. A plan that found no path is retried
+        only after the grid changed.
+        """
+        if robot.plan_target != target:
+            return False
+        if not robot.plan:
+            return robot.plan_version == self.distance_fields.version
+        return robot.plan[robot.plan_index] == robot.pos
+
+    def replan(self, robot: Robot, target: Tuple[int, int]) -> None:
+        """Compute and store a fresh plan, and index its cells so an edit to any of them invalidates it."""
+        # Cells before plan_index were released as the robot passed them
+        for cell in robot.plan[robot.plan_index:]:
+            self.release_cell(robot, cell)
+        robot.plan = self.distance_fields.path(robot.pos, target)
+        robot.plan_index = 0
+        robot.plan_target = target
+        robot.plan_version = self.distance_fields.version
+        for cell in robot.plan:
+            self.path_users.setdefault(cell, set()).add(robot)
+        self.planner_calls += 1
+
+    def release_cell(self, robot: Robot, cell: Tuple[int, int]) -> None:
+        """Stop indexing cell as part of robot's plan (cells nobody plans through leave path_users)."""
+        users = self.path_users.get(cell)
+        if users is not None:
+            users.discard(robot)
+            if not users:
+                del self.path_users[cell]
+
+    def move_cooperatively(self) -> None:
+        """Move all robots one step along conflict-free plans from the shared reservation table."""
+        goals = []
+        for robot in self.robots:
+            if robot.state == "carrying":
+                goals.append(get_drop_off_point(robot.delivery_zone))
+            else:
+                goals.append(self.package_target(robot) or robot.pos)
+        positions = self.cooperative.step([robot.pos for robot in self.robots], goals)
+        self.planner_calls += self.cooperative.last_replans
+        for i, (robot, pos) in enumerate(zip(self.robots, positions)):
+            robot.pos = pos
+            robot.plan = self.cooperative.planned_path(i)
+
+    def set_cell(self, cell: Tuple[int, int], value: int) -> None:
+        """Edit the grid (0 free, 1 obstacle); only the cached distance fields the edit affects are rebuilt."""
+        self.grid.set(cell, value)
+        self.distance_fields.set_cell(cell, value)
+        self.free_cells.set_cell(cell, value)
+        # Stored plans crossing a newly blocked cell are recomputed when next followed
+        if value != 0:
+            for robot in self.path_users.pop(cell, ()):
+                robot.plan_target = None
+        # The searches share the distance cache's free mask and only need to hear which cell changed
+        for robot in self.robots:
+            if robot.search is not None:
+                robot.search.cells_changed([cell])
+
+    def stack_package(self, zone: Tuple[int, int, int, int]) -> Optional[Tuple[int, int]]:
+        """
+        Set a delivered package down in the delivery zone as an obstacle, on the free cell nearest the
+        drop-off point that keeps every other reachable cell reachable (so it never blocks a pathway).
+        Returns the cell, or None if the zone has no such cell.
+        """
+        rows, cols = self.grid.rows, self.grid.cols
+        drop_off = get_drop_off_point(zone)
+        occupied = {robot.pos for robot in self.robots} | {package.pos for package in self.packages}
+        free = self.distance_fields.free
+        # Candidates must be reachable from the drop-off, and closing them must not cut any cell off
+        from_drop_off = self.distance_fields.field(drop_off)
+        cells = sorted(((r, c) for r in range(zone[0], zone[2] + 1) for c in range(zone[1], zone[3] + 1)),
+                       key=lambda cell: abs(cell[0] - drop_off[0]) + abs(cell[1] - drop_off[1]))
+        for cell in cells:
+            i = cell[0] * cols + cell[1]
+            if cell == drop_off or cell in occupied or not free[i] or from_drop_off[i] == UNREACHABLE:
+                continue
+            if not separates(free, rows, cols, cell):
+                self.set_cell(cell, 1)
+                self.stacked.append(cell)
+                return cell
+        return None
+
+    def start_recording(self, path: str) -> None:
+        """Record every robot's position and state after each step, starting with the current one."""
+        self.recorder = TrajectoryWriter(path, ["robot"] * len(self.robots), ROBOT_STATES,
+                                         metadata={"grid": self.grid.to_rows()})
+        self.record_tick()
+
+    def record_tick(self) -> None:
+        self.recorder.record(self.tick, [robot.pos for robot in self.robots],
+                             [ROBOT_STATES.index(robot.state) for robot in self.robots])
+
+    def stop_recording(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def step(self) -> None:
+        """Advance the simulation by one time step."""
+        previous = [robot.pos for robot in self.robots]
+        if self.cooperative is not None:
+            self.move_cooperatively()
+        else:
+            # Simple reactive behavior for each robot
+            for robot in self.robots:
+                if robot.state == "navigating":
+                    # Plan a path to the chosen package
+                    target = self.package_target(robot)
+                    if target is not None:
+                        self.move_towards(robot, target)
+                elif robot.state == "carrying":
+                    # Plan a path to the designated drop-off point
+                    drop_off = get_drop_off_point(robot.delivery_zone)
+                    self.move_towards(robot, drop_off)
+
+        for robot, pos in zip(self.robots, previous):
+            self.free_cells.move(pos, robot.pos)
 
         # Package pickup: if a robot reaches a package, pick it up.
         remaining_packages = []
-        for package in global_packages:
+        for package in self.packages:
             picked = False
-            for robot in global_robots:
+            for robot in self.robots:
                 if robot.state == "navigating" and robot.pos == package.pos:
                     robot.state = "carrying"
                     robot.package = package
                     picked = True
+                    self.free_cells.vacate(package.pos)
                     break
             if not picked:
                 remaining_packages.append(package)
-        global_packages = remaining_packages
+        self.packages = remaining_packages
 
         # Package delivery: if a robot carrying a package reaches the drop-off point, deliver it.
-        for robot in global_robots:
+        for robot in self.robots:
             if robot.state == "carrying":
                 drop_off = get_drop_off_point(robot.delivery_zone)
                 if robot.pos == drop_off:
-                    delivered_packages.append(robot.pos)
+                    box = self.stack_package(robot.delivery_zone) if self.stack_deliveries else None
+                    self.delivered_packages.append(box or robot.pos)
                     robot.state = "navigating"
                     robot.package = None
 
         # Generate new packages if all have been delivered
-        if not global_packages:
-            global_packages = generate_new_packages()
+        if not self.packages:
+            # The delivery zones are cleared for the next batch
+            for cell in self.stacked:
+                self.set_cell(cell, 0)
+            self.stacked = []
+            self.packages = generate_new_packages(self.grid, self.robots, self.batch_size, self.free_cells,
+                                                  self.rng)
+            for package in self.packages:
+                self.free_cells.occupy(package.pos)
+        self.tick += 1
+        if self.recorder is not None:
+            self.record_tick()
+
+    def run(self, n_steps: int) -> None:
+        """Advance n_steps time steps back to back."""
+        for _ in range(n_steps):
+            self.step()
+
+def run_environment(record_path: Optional[str] = None, stack_deliveries: bool = False):
+    """
+    Main loop to run the warehouse package delivery environment (optionally recording the robots' trajectories).
+    With stack_deliveries, delivered packages stay in the delivery zones as obstacles until the next batch.
+    """
+    global global_grid, global_robots, global_packages
+    init_display()
+    # Use the environment layout from Enviorment1.py
+    sim = WarehouseSimulation(planning="cooperative", stack_deliveries=stack_deliveries)
+    if record_path:
+        sim.start_recording(record_path)
+    # The reactive planning manager below reads the module-level state
+    global_grid, global_robots, global_packages = sim.grid, sim.robots, sim.packages
+    # Five simulation steps per second for visualization; frames are only drawn after a step
+    scheduler = FixedTimestepScheduler(tick_rate=5, render_rate=60)
+
+    def poll():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                scheduler.stop()
+            elif event.type == pygame.VIDEOEXPOSE and _renderer is not None:
+                _renderer.invalidate()
+                scheduler.request_render()
 
-        draw_warehouse_grid(global_grid, global_robots, global_packages, delivered_packages)
-        pygame.display.flip()
-        clock.tick(5)  # Slow down for visualization
+    def tick():
+        global global_packages
+        sim.step()
+        global_packages = sim.packages
+
+    scheduler.run(tick, lambda: draw_warehouse_grid(sim.grid, sim.robots, sim.packages, sim.delivered_packages), poll)
+    sim.stop_recording()
 
     pygame.quit()
     sys.exit()
 
-def generate_new_packages() -> List[Package]:
-    """Generate new packages at random spawn points not on obstacles or occupied by robots."""
-    new_packages = []
-    attempts = 0
-    while len(new_packages) < 2 and attempts < 50:
-        r = random.randint(1, GRID_SIZE - 2)
-        c = random.randint(1, GRID_SIZE - 2)
-        if global_grid[r][c] == 0 and all(robot.pos != (r, c) for robot in global_robots):
-            # Assign package to a delivery zone based on position
-            if r < GRID_SIZE // 2:
-                new_packages.append(Package((r, c), (2, 2, 5, 5)))
-            else:
-                new_packages.append(Package((r, c), (2, GRID_SIZE - 5, 5, GRID_SIZE - 2)))
-        attempts += 1
-    return new_packages
-
-def find_path(grid: List[List[int]], start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
-    """Find a shortest path from start to goal using BFS."""
-    queue = deque([start])
-    came_from = {start: None}
+def replay_environment(path: str):
+    """Play back a recorded run: robots are drawn where the recording put them, five steps per second."""
+    init_display()
+    with TrajectoryReader(path) as reader:
+        grid = Grid.from_rows(reader.header["grid"])
+        robots = [Robot((0, 0), None) for _ in reader.agent_kinds]
+
+        def draw_frame(frame):
+            for robot, pos, state in zip(robots, frame.positions, frame.states):
+                robot.pos = pos
+                robot.state = reader.state_names[state]
+            draw_warehouse_grid(grid, robots, [], [])
+
+        def poll(scheduler):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    scheduler.stop()
+                elif event.type == pygame.VIDEOEXPOSE and _renderer is not None:
+                    _renderer.invalidate()
+                    scheduler.request_render()
+
+        replay(reader, draw_frame, tick_rate=5, poll=poll)
+    pygame.quit()
+
+def spawn_region(grid: Grid) -> List[Tuple[int, int]]:
+    """Cells where packages may spawn: everywhere except the outer ring of the grid."""
+    return [(r, c) for r in range(1, len(grid) - 1) for c in range(1, len(grid[0]) - 1)]
+
+def generate_new_packages(grid: Grid, robots: List[Robot], count: int = 2,
+                          free_cells: Optional[FreeCellIndex] = None,
+                          rng: random.Random = random) -> List[Package]:
+    """
+    Generate new packages at random spawn points not on obstacles or occupied by robots.
+    Pass the simulation's free_cells index to draw in O(count); without it one is built from the grid.
+    Spawn points are drawn from rng, the global random module by default.
+    Fewer than count packages are returned only if fewer spawn points are free.
+    """
+    rows = len(grid)
+    if free_cells is None:
+        free_cells = FreeCellIndex(grid, spawn_region(grid), [robot.pos for robot in robots])
+    # Packages are assigned to the robots' delivery zones by horizontal band of the grid
+    zones = sorted({robot.delivery_zone for robot in robots})
+    return [Package((r, c), zones[r * len(zones) // rows])
+            for r, c in free_cells.sample(min(count, len(free_cells)), rng)]
+
+def find_path(grid: Grid, start: Tuple[int, int], goal: Tuple[int, int],
+              method: str = "bfs", weights: Optional[List[List[float]]] = None) -> List[Tuple[int, int]]:
+    """
+    Find a shortest path from start to goal using BFS.
+    method "astar" or "jps" uses Path_Planner instead, which only searches around the corridor
+    towards the goal (weights, the cost of entering each cell, need "astar"). method "hpa" plans
+    on Hierarchical_Planner's cluster abstraction and "pyramid" coarse-to-fine on a Grid_Pyramid
+    (both give near-shortest paths). Unweighted astar and jps queries on a Grid reuse a cached
+    planner per grid (Path_Planner.planner_for); for many hpa or pyramid queries on one large map,
+    keep a HierarchicalPlanner or GridPyramid instead of rebuilding one on every call.
+    """
+    if method in ("hpa", "pyramid"):
+        if weights is not None:
+            raise ValueError(f"{method} ignores cell weights; use method='astar'")
+        if method == "pyramid":
+            # Every cell but obstacles is passable here, as in the BFS below
+            return GridPyramid(grid, allowed=(FREE, SAFETY_ZONE)).find_path(start, goal)
+        return HierarchicalPlanner(grid).find_path(start, goal)
+    if method != "bfs":
+        if weights is None and isinstance(grid, Grid):
+            return planner_for(grid).find_path(start, goal, method)
+        return GridPlanner(grid, weights).find_path(start, goal, method)
+    if weights is not None:
+        raise ValueError("BFS ignores cell weights; use method='astar'")
+    grid = as_grid(grid)
+    if not (grid.in_bounds(start) and grid.in_bounds(goal)):
+        return []
+    # Search over flat cell indices with the grid's neighbour table (up, down, left, right)
+    neighbours = grid.flat_neighbours()
+    passable = grid.passable_mask()
+    source, target = grid.index(start), grid.index(goal)
+    queue = deque([source])
+    came_from = {source: -1}
     while queue:
         current = queue.popleft()
-        if current == goal:
+        if current == target:
             break
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            next_pos = (current[0] + dx, current[1] + dy)
-            if (0 <= next_pos[0] < GRID_SIZE and 0 <= next_pos[1] < GRID_SIZE and
-                    grid[next_pos[0]][next_pos[1]] != 1 and next_pos not in came_from):
-                queue.append(next_pos)
-                came_from[next_pos] = current
-    if goal not in came_from:
+        for next_index in neighbours[4 * current:4 * current + 4]:
+            if next_index >= 0 and passable[next_index] and next_index not in came_from:
+                queue.append(next_index)
+                came_from[next_index] = current
+    if target not in came_from:
         return []
     # Reconstruct path
     path = []
-    current = goal
-    while current is not None:
-        path.append(current)
+    current = target
+    while current != -1:
+        path.append(divmod(current, grid.cols))
         current = came_from[current]
     path.reverse()
     return path
@@ -321,7 +684,16 @@ def main_manager(transition_systems: List[List[int]], ltl_constraints: List[str]
 # --------------------------------------------------
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warehouse package delivery environment.")
+    parser.add_argument("--record", metavar="PATH", help="record the robots' trajectories to a binary file")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded run instead of simulating")
+    parser.add_argument("--stack-deliveries", action="store_true",
+                        help="set delivered packages down in the delivery zones as obstacles")
+    args = parser.parse_args()
     try:
-        run_environment()
+        if args.replay:
+            replay_environment(args.replay)
+        else:
+            run_environment(args.record, args.stack_deliveries)
     except Exception as e:
         print("Exiting environment loop:", e)
@@ -0,0 +1,84 @@
+"""Optimality of the Hungarian solvers in Assignment against brute force on small cost matrices."""
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from Assignment import FORBIDDEN, IncrementalAssignment, solve_assignment
+
+
+def brute_force(cost):
+    """Minimum total cost over all matchings of min(rows, cols) pairs (FORBIDDEN pairs included)."""
+    n, m = cost.shape
+    if n <= m:
+        return min(sum(cost[i, j] for i, j in enumerate(cols)) for cols in itertools.permutations(range(m), n))
+    return min(sum(cost[i, j] for j, i in enumerate(rows)) for rows in itertools.permutations(range(n), m))
+
+
+def random_cost(rng, n, m):
+    return np.array([[FORBIDDEN if rng.random() < 0.15 else rng.randint(0, 20) for _ in range(m)]
+                     for _ in range(n)], dtype=np.float64)
+
+
+def total(cost, pairs, n, m):
+    """Cost of a matching with FORBIDDEN counted for every pair the solver left out."""
+    return sum(cost[i, j] for i, j in pairs) + FORBIDDEN * (min(n, m) - len(pairs))
+
+
+def check_matching(cost, pairs):
+    rows = [i for i, _ in pairs]
+    cols = [j for _, j in pairs]
+    assert len(set(rows)) == len(rows) and len(set(cols)) == len(cols)
+    assert all(cost[i, j] < FORBIDDEN for i, j in pairs)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_solve_assignment_is_optimal(seed):
+    rng = random.Random(seed)
+    n, m = rng.randint(1, 6), rng.randint(1, 6)
+    cost = random_cost(rng, n, m)
+    pairs = solve_assignment(cost)
+    check_matching(cost, pairs)
+    assert total(cost, pairs, n, m) == brute_force(cost)
+
+
+def test_solve_assignment_rejects_non_matrices():
+    with pytest.raises(ValueError):
+        solve_assignment([1, 2, 3])
+    assert solve_assignment(np.zeros((0, 3))) == []
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_incremental_assignment_stays_optimal(seed):
+    # Robots and packages come and go and costs drift; every solve must match a fresh brute force
+    rng = random.Random(seed)
+    assigner = IncrementalAssignment()
+    ids = itertools.count()
+    rows = [next(ids) for _ in range(rng.randint(0, 5))]
+    cols = [next(ids) for _ in range(rng.randint(0, 5))]
+    costs = {}
+    for _ in range(15):
+        if rows and rng.random() < 0.3:
+            rows.remove(rng.choice(rows))
+        if len(rows) < 6 and rng.random() < 0.3:
+            rows.append(next(ids))
+        if cols and rng.random() < 0.3:
+            cols.remove(rng.choice(cols))
+        if len(cols) < 6 and rng.random() < 0.3:
+            cols.append(next(ids))
+        for key in list(costs):
+            if rng.random() < 0.3:
+                del costs[key]
+        cost = np.array([[costs.setdefault((r, c), FORBIDDEN if rng.random() < 0.15 else rng.randint(0, 20))
+                          for c in cols] for r in rows], dtype=np.float64).reshape(len(rows), len(cols))
+
+        result = assigner.solve(rows, cols, cost)
+
+        pairs = [(rows.index(r), cols.index(c)) for r, c in result.items()]
+        check_matching(cost, pairs)
+        if rows and cols:
+            assert total(cost, pairs, len(rows), len(cols)) == brute_force(cost)
+        else:
+            assert result == {}
@@ -0,0 +1,49 @@
+"""Invariants of Conflict_Resolver.resolve_simultaneous_moves on hand-made and random steps."""
+
+import random
+
+import pytest
+
+from Conflict_Resolver import resolve_simultaneous_moves
+
+
+def test_vertex_conflict_goes_to_lowest_index():
+    assert resolve_simultaneous_moves([(0, 0), (0, 2)], [(0, 1), (0, 1)]) == [(0, 1), (0, 2)]
+
+
+def test_swap_waits():
+    assert resolve_simultaneous_moves([(0, 0), (0, 1)], [(0, 1), (0, 0)]) == [(0, 0), (0, 1)]
+
+
+def test_rotation_moves():
+    current = [(0, 0), (0, 1), (1, 1), (1, 0)]
+    proposed = [(0, 1), (1, 1), (1, 0), (0, 0)]
+    assert resolve_simultaneous_moves(current, proposed) == proposed
+
+
+def test_waiting_agent_blocks_a_chain():
+    # Agent 2 cannot move, so agent 1 cannot enter its cell, so agent 0 cannot enter agent 1's
+    current = [(0, 0), (0, 1), (0, 2)]
+    assert resolve_simultaneous_moves(current, [(0, 1), (0, 2), None]) == current
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_steps_keep_cells_distinct_and_never_swap(seed):
+    rng = random.Random(seed)
+    size = rng.randint(2, 6)
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    current = rng.sample(cells, rng.randint(1, len(cells)))
+    proposed = []
+    for r, c in current:
+        moves = [(r + dr, c + dc) for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                 if 0 <= r + dr < size and 0 <= c + dc < size]
+        proposed.append(rng.choice(moves + [None]))
+
+    result = resolve_simultaneous_moves(current, proposed)
+
+    assert len(set(result)) == len(result)
+    for i, pos in enumerate(result):
+        assert pos == current[i] or pos == proposed[i]
+    moved = {current[i]: pos for i, pos in enumerate(result) if pos != current[i]}
+    for start, end in moved.items():
+        assert moved.get(end) != start
@@ -0,0 +1,85 @@
+"""Connectivity's component labelling and cut checks against a plain flood fill on random grids."""
+
+import random
+
+import numpy as np
+import pytest
+
+from Connectivity import ConnectivityIndex, count_components, label_components, separates
+from Grid import FREE, OBSTACLE, SAFETY_ZONE, Grid
+
+
+def flood_labels(rows, allowed):
+    """Component label per open cell, by iterative flood fill."""
+    n, m = len(rows), len(rows[0])
+    labels = {}
+    count = 0
+    for r in range(n):
+        for c in range(m):
+            if rows[r][c] in allowed and (r, c) not in labels:
+                stack = [(r, c)]
+                labels[(r, c)] = count
+                while stack:
+                    cr, cc = stack.pop()
+                    for nr, nc in ((cr - 1, cc), (cr + 1, cc), (cr, cc - 1), (cr, cc + 1)):
+                        if 0 <= nr < n and 0 <= nc < m and rows[nr][nc] in allowed and (nr, nc) not in labels:
+                            labels[(nr, nc)] = count
+                            stack.append((nr, nc))
+                count += 1
+    return labels, count
+
+
+def random_rows(rng, n, m, density):
+    return [[rng.choice([OBSTACLE, OBSTACLE, SAFETY_ZONE]) if rng.random() < density else FREE for _ in range(m)]
+            for _ in range(n)]
+
+
+@pytest.mark.parametrize("allowed", [(FREE,), (FREE, SAFETY_ZONE)])
+@pytest.mark.parametrize("seed", range(60))
+def test_labels_match_flood_fill(seed, allowed):
+    rng = random.Random(seed)
+    rows = random_rows(rng, rng.randint(1, 30), rng.randint(1, 30), rng.choice([0.0, 0.3, 0.5, 0.7]))
+    expected, count = flood_labels(rows, set(allowed))
+    labels, n_labels = label_components(Grid.from_rows(rows), allowed)
+    assert n_labels == count == count_components(rows, allowed)
+    # The same partition, whatever the numbering
+    pairs = {(expected[cell], int(labels[cell])) for cell in expected}
+    assert len(pairs) == count
+    closed = np.ones(labels.shape, dtype=bool)
+    for cell in expected:
+        closed[cell] = False
+    assert (labels[closed] < 0).all()
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_separates_matches_flood_fill(seed):
+    rng = random.Random(seed)
+    n, m = rng.randint(1, 12), rng.randint(1, 12)
+    rows = [[OBSTACLE if rng.random() < 0.35 else FREE for _ in range(m)] for _ in range(n)]
+    free = bytearray(int(v == FREE) for row in rows for v in row)
+    for r in range(n):
+        for c in range(m):
+            if rows[r][c] != FREE:
+                continue
+            rows[r][c] = OBSTACLE
+            labels, _ = flood_labels(rows, {FREE})
+            rows[r][c] = FREE
+            neighbours = {labels[(nr, nc)] for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1))
+                          if (nr, nc) in labels}
+            assert separates(free, n, m, (r, c)) == (len(neighbours) > 1)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_index_tracks_connectedness_across_edits(seed):
+    rng = random.Random(seed)
+    n, m = rng.randint(1, 10), rng.randint(1, 10)
+    rows = [[OBSTACLE if rng.random() < 0.3 else FREE for _ in range(m)] for _ in range(n)]
+    index = ConnectivityIndex(rows)
+    for _ in range(60):
+        r, c = rng.randrange(n), rng.randrange(m)
+        value = FREE if rows[r][c] != FREE else OBSTACLE
+        connected = flood_labels(rows, {FREE})[1] <= 1
+        rows[r][c] = value
+        assert index.would_disconnect((r, c)) == (connected and flood_labels(rows, {FREE})[1] > 1)
+        index.set_cell((r, c), value)
+        assert index.is_connected() == (flood_labels(rows, {FREE})[1] <= 1)
@@ -0,0 +1,97 @@
+"""Distance_Fields against a plain BFS, across cell edits, LRU eviction and save/load."""
+
+import random
+from collections import deque
+
+import pytest
+
+from Distance_Fields import UNREACHABLE, DistanceFieldCache
+from Grid import Grid
+
+
+def bfs_distance(rows, start, goal):
+    """Steps from start to goal through cells of value 0 (start itself may be anything)."""
+    if start == goal:
+        return 0
+    n, m = len(rows), len(rows[0])
+    if rows[goal[0]][goal[1]] != 0:
+        return UNREACHABLE
+    seen = {start: 0}
+    queue = deque([start])
+    while queue:
+        r, c = queue.popleft()
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < n and 0 <= nc < m and rows[nr][nc] == 0 and (nr, nc) not in seen:
+                seen[(nr, nc)] = seen[(r, c)] + 1
+                if (nr, nc) == goal:
+                    return seen[goal]
+                queue.append((nr, nc))
+    return UNREACHABLE
+
+
+def random_rows(rng, n, m):
+    return [[1 if rng.random() < 0.3 else 0 for _ in range(m)] for _ in range(n)]
+
+
+def check(cache, rows, start, goal):
+    expected = bfs_distance(rows, start, goal)
+    assert cache.distance(start, goal) == expected
+    path = cache.path(start, goal)
+    if expected == UNREACHABLE:
+        assert path == []
+    else:
+        assert len(path) - 1 == expected and path[0] == start and path[-1] == goal
+        assert all(rows[r][c] == 0 for r, c in path[1:])
+        for a, b in zip(path, path[1:]):
+            assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_distances_match_bfs_across_edits(seed):
+    rng = random.Random(seed)
+    n, m = rng.randint(1, 16), rng.randint(1, 16)
+    rows = random_rows(rng, n, m)
+    cache = DistanceFieldCache(Grid.from_rows(rows), max_entries=4)
+    goals = [(rng.randrange(n), rng.randrange(m)) for _ in range(6)]
+    for _ in range(10):
+        for _ in range(8):
+            check(cache, rows, (rng.randrange(n), rng.randrange(m)), rng.choice(goals))
+        r, c = rng.randrange(n), rng.randrange(m)
+        rows[r][c] = 1 - rows[r][c]
+        cache.set_cell((r, c), rows[r][c])
+        assert len(cache) <= 4
+
+
+def test_edits_drop_only_affected_fields():
+    # Two rooms separated by a wall; an edit in one room keeps the other room's field
+    rows = [[0, 0, 1, 0, 0],
+            [0, 0, 1, 0, 0]]
+    cache = DistanceFieldCache(rows)
+    cache.field((0, 0))
+    cache.field((0, 4))
+    cache.set_cell((1, 4), 1)
+    assert cache.hits == 0
+    cache.field((0, 0))
+    assert cache.hits == 1
+    cache.field((0, 4))
+    assert cache.misses == 3
+
+
+def test_save_and_load(tmp_path):
+    rng = random.Random(1)
+    rows = random_rows(rng, 12, 12)
+    cache = DistanceFieldCache(rows)
+    goals = [(r, c) for r in range(12) for c in range(12) if rows[r][c] == 0][:5]
+    for goal in goals:
+        cache.field(goal)
+    path = str(tmp_path / "fields.npz")
+    cache.save(path)
+
+    loaded = DistanceFieldCache(rows)
+    assert loaded.load(path) == len(goals)
+    for goal in goals:
+        assert list(loaded.field(goal)) == list(cache.field(goal))
+    assert loaded.misses == 0
+
+    rows[0][0] = 1 - rows[0][0]
+    assert DistanceFieldCache(rows).load(path) == 0
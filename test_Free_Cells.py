@@ -0,0 +1,66 @@
+"""FreeCellIndex against a recomputed set of available cells under random occupancy and grid edits."""
+
+import random
+from collections import Counter
+
+import pytest
+
+from Free_Cells import FreeCellIndex
+
+
+def available(rows, region, occupants):
+    return {(r, c) for r in range(len(rows)) for c in range(len(rows[0]))
+            if rows[r][c] == 0 and (r, c) in region and not occupants[(r, c)]}
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_index_tracks_available_cells(seed):
+    rng = random.Random(seed)
+    n, m = rng.randint(1, 12), rng.randint(1, 12)
+    rows = [[1 if rng.random() < 0.3 else 0 for _ in range(m)] for _ in range(n)]
+    cells = [(r, c) for r in range(n) for c in range(m)]
+    region = set(rng.sample(cells, rng.randint(1, len(cells))))
+    occupants = Counter(rng.sample(cells, rng.randint(0, len(cells) // 2)))
+    index = FreeCellIndex(rows, region, list(occupants))
+    for _ in range(100):
+        action = rng.random()
+        cell = rng.choice(cells)
+        if action < 0.3:
+            index.occupy(cell)
+            occupants[cell] += 1
+        elif action < 0.5 and occupants[cell]:
+            index.vacate(cell)
+            occupants[cell] -= 1
+        elif action < 0.7:
+            source = rng.choice([c for c in cells if occupants[c]] or [cell])
+            if occupants[source]:
+                index.move(source, cell)
+                occupants[source] -= 1
+                occupants[cell] += 1
+        elif action < 0.85:
+            rows[cell[0]][cell[1]] ^= 1
+            index.set_cell(cell, rows[cell[0]][cell[1]])
+        else:
+            expected = available(rows, region, occupants)
+            k = rng.randint(0, len(expected))
+            sample = index.sample(k, rng)
+            assert len(set(sample)) == k and set(sample) <= expected
+        expected = available(rows, region, occupants)
+        assert len(index) == len(expected)
+        assert all((cell in index) == (cell in expected) for cell in cells)
+
+
+def test_sample_is_uniform():
+    index = FreeCellIndex([[0, 0, 0, 0]])
+    rng = random.Random(0)
+    counts = Counter(cell for _ in range(4000) for cell in index.sample(1, rng))
+    assert set(counts) == {(0, 0), (0, 1), (0, 2), (0, 3)}
+    assert all(800 < count < 1200 for count in counts.values())
+
+
+def test_errors():
+    index = FreeCellIndex([[0, 1]])
+    with pytest.raises(ValueError):
+        index.sample(2)
+    with pytest.raises(ValueError):
+        index.vacate((0, 0))
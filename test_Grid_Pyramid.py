@@ -0,0 +1,46 @@
+"""Coarse-to-fine planning (Grid_Pyramid) against BFS on random grids, and the up/downsampling helpers."""
+
+import random
+
+import numpy as np
+import pytest
+
+from Distance_Fields import UNREACHABLE, distance_field
+from Grid import FREE, OBSTACLE, Grid
+from Grid_Pyramid import GridPyramid, downsample, upsample
+
+
+def random_grid(rng, rows, cols, density=0.3):
+    return Grid(rows, cols, bytearray(OBSTACLE if rng.random() < density else FREE for _ in range(rows * cols)))
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_paths_agree_with_bfs(seed):
+    # Corridor searches give near-shortest paths; they must exist exactly when BFS finds one
+    rng = random.Random(seed)
+    grid = random_grid(rng, rng.randint(1, 48), rng.randint(1, 48), rng.choice([0.0, 0.2, 0.35]))
+    pyramid = GridPyramid(grid)
+    free = [(r, c) for r in range(grid.rows) for c in range(grid.cols) if grid.get((r, c)) == FREE]
+    for _ in range(10 if free else 0):
+        start, goal = rng.choice(free), rng.choice(free)
+        distance = distance_field(grid.passable_mask(), grid.rows, grid.cols, [goal])[start[0] * grid.cols + start[1]]
+        path = pyramid.find_path(start, goal)
+        if distance == UNREACHABLE:
+            assert path == []
+            continue
+        assert path[0] == start and path[-1] == goal
+        for a, b in zip(path, path[1:]):
+            assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+        assert all(grid.get(cell) == FREE for cell in path)
+        assert len(path) - 1 >= distance
+
+
+def test_downsample_marks_blocks_with_any_open_cell():
+    mask = np.zeros((4, 4), dtype=bool)
+    mask[0, 1] = mask[3, 3] = True
+    assert downsample(mask).tolist() == [[True, False], [False, True]]
+
+
+def test_upsample_repeats_cells():
+    grid = upsample(Grid.from_rows([[0, 1], [2, 0]]), 2)
+    assert grid.to_rows() == [[0, 0, 1, 1], [0, 0, 1, 1], [2, 2, 0, 0], [2, 2, 0, 0]]
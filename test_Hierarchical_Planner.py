@@ -0,0 +1,74 @@
+"""HPA* (Hierarchical_Planner) against BFS on random grids, including after cell edits."""
+
+import random
+
+import pytest
+
+from Distance_Fields import UNREACHABLE, distance_field
+from Grid import FREE, OBSTACLE, Grid
+from Hierarchical_Planner import HierarchicalPlanner
+
+
+def random_grid(rng, rows, cols, density=0.3):
+    return Grid(rows, cols, bytearray(OBSTACLE if rng.random() < density else FREE for _ in range(rows * cols)))
+
+
+def bfs_distance(grid, start, goal):
+    return distance_field(grid.passable_mask(), grid.rows, grid.cols, [goal])[start[0] * grid.cols + start[1]]
+
+
+def random_queries(rng, grid, n):
+    free = [(r, c) for r in range(grid.rows) for c in range(grid.cols) if grid.get((r, c)) == FREE]
+    return [(rng.choice(free), rng.choice(free)) for _ in range(n)] if free else []
+
+
+def check_query(grid, planner, start, goal, exact):
+    """HPA* paths are near-shortest: they must exist exactly when BFS finds one and never be shorter."""
+    path = planner.find_path(start, goal)
+    distance = bfs_distance(grid, start, goal)
+    if distance == UNREACHABLE:
+        assert path == []
+        return
+    assert path[0] == start and path[-1] == goal
+    for a, b in zip(path, path[1:]):
+        assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+    assert all(grid.get(cell) != OBSTACLE for cell in path)
+    if exact:
+        assert len(path) - 1 == distance
+    else:
+        assert len(path) - 1 >= distance
+
+
+@pytest.mark.parametrize("cluster_size", [4, 8, 16])
+@pytest.mark.parametrize("seed", range(40))
+def test_paths_agree_with_bfs(seed, cluster_size):
+    rng = random.Random(seed)
+    grid = random_grid(rng, rng.randint(2, 48), rng.randint(2, 48), rng.choice([0.0, 0.2, 0.35]))
+    planner = HierarchicalPlanner(grid, cluster_size)
+    for start, goal in random_queries(rng, grid, 10):
+        check_query(grid, planner, start, goal, exact=False)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_single_cluster_paths_are_shortest(seed):
+    # With one cluster there are no borders to cross, so the in-cluster path is the shortest path
+    rng = random.Random(seed)
+    grid = random_grid(rng, rng.randint(2, 16), rng.randint(2, 16))
+    planner = HierarchicalPlanner(grid, 16)
+    for start, goal in random_queries(rng, grid, 10):
+        check_query(grid, planner, start, goal, exact=True)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_paths_follow_cell_edits(seed):
+    rng = random.Random(seed)
+    grid = random_grid(rng, 32, 32, 0.25)
+    planner = HierarchicalPlanner(grid, 8)
+    for _ in range(8):
+        for _ in range(10):
+            cell = (rng.randrange(32), rng.randrange(32))
+            value = rng.choice([FREE, OBSTACLE])
+            grid.set(cell, value)
+            planner.set_cell(cell, value)
+        for start, goal in random_queries(rng, grid, 5):
+            check_query(grid, planner, start, goal, exact=False)
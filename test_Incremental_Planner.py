@@ -0,0 +1,80 @@
+"""D* Lite (Incremental_Planner) against BFS distances as the robot moves, cells flip and goals change."""
+
+import math
+import random
+
+import pytest
+
+from Distance_Fields import UNREACHABLE, distance_field
+from Incremental_Planner import DStarLite
+
+
+def bfs_field(free, rows, cols, goal):
+    return distance_field(free, rows, cols, [goal] if free[goal[0] * cols + goal[1]] else [])
+
+
+def check_against_bfs(search, free, rows, cols):
+    expected = bfs_field(free, rows, cols, search.goal)[search.start[0] * cols + search.start[1]]
+    if search.start == search.goal:
+        expected = 0
+    distance = search.distance()
+    path = search.path()
+    if expected == UNREACHABLE:
+        assert distance == math.inf
+        assert path == []
+    else:
+        assert distance == expected
+        assert len(path) - 1 == expected and path[0] == search.start and path[-1] == search.goal
+        assert all(free[r * cols + c] for r, c in path[1:])
+
+
+def random_free_cell(rng, free, rows, cols):
+    cells = [(r, c) for r in range(rows) for c in range(cols) if free[r * cols + c]]
+    return rng.choice(cells)
+
+
+@pytest.mark.parametrize("seeded", [False, True])
+@pytest.mark.parametrize("seed", range(40))
+def test_distances_match_bfs_after_edits(seed, seeded):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 20), rng.randint(3, 20)
+    free = bytearray(int(rng.random() > 0.25) for _ in range(rows * cols))
+    free[0] = 1
+    start, goal = random_free_cell(rng, free, rows, cols), random_free_cell(rng, free, rows, cols)
+    search = DStarLite(free, rows, cols, start, goal, bfs_field(free, rows, cols, goal) if seeded else None)
+    check_against_bfs(search, free, rows, cols)
+    for _ in range(15):
+        # Walk a few steps, then flip some cells other than the robot's
+        for _ in range(rng.randint(0, 3)):
+            step = search.next_step()
+            if step is None:
+                break
+            search.move_to(step)
+        flipped = []
+        for _ in range(rng.randint(1, 6)):
+            cell = (rng.randrange(rows), rng.randrange(cols))
+            if cell != search.start:
+                free[cell[0] * cols + cell[1]] ^= 1
+                flipped.append(cell)
+        search.cells_changed(flipped)
+        check_against_bfs(search, free, rows, cols)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_reset_to_new_goals(seed):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 20), rng.randint(3, 20)
+    free = bytearray(int(rng.random() > 0.25) for _ in range(rows * cols))
+    free[0] = 1
+    search = DStarLite(free, rows, cols, (0, 0), random_free_cell(rng, free, rows, cols))
+    for _ in range(10):
+        cell = (rng.randrange(rows), rng.randrange(cols))
+        if cell != search.start:
+            free[cell[0] * cols + cell[1]] ^= 1
+            search.cells_changed([cell])
+        goal = random_free_cell(rng, free, rows, cols)
+        search.reset(search.start, goal, bfs_field(free, rows, cols, goal) if rng.random() < 0.5 else None)
+        check_against_bfs(search, free, rows, cols)
+        step = search.next_step()
+        if step is not None:
+            search.move_to(step)
@@ -0,0 +1,81 @@
+"""Round-trips and content hashes of Map_Format's binary map files."""
+
+import pytest
+
+from Grid import OBSTACLE, SAFETY_ZONE
+from Map_Format import MapFile, content_hash, main, save_map
+from Map_Generator import generate_map
+
+
+@pytest.fixture
+def generated():
+    return generate_map(24, 31, density=0.25, seed=3, safety_zones=2, delivery_zones=2, spawns=4)
+
+
+def test_round_trip(tmp_path, generated):
+    path = str(tmp_path / "floor.map")
+    digest = save_map(path, generated.grid, generated.safety_zones, generated.delivery_zones, generated.spawns,
+                      metadata={"name": "floor"})
+    with MapFile(path) as map_file:
+        assert map_file.hash == digest
+        assert map_file.verify()
+        assert (map_file.rows, map_file.cols) == (24, 31)
+        assert map_file.header["name"] == "floor"
+        assert map_file.safety_zones == [tuple(zone) for zone in generated.safety_zones]
+        assert map_file.delivery_zones == [tuple(zone) for zone in generated.delivery_zones]
+        assert map_file.spawns == [tuple(cell) for cell in generated.spawns]
+        assert bytes(map_file.cells) == bytes(generated.grid.cells)
+        view = map_file.array()
+        assert view.tolist() == generated.grid.to_rows()
+        del view
+        grid = map_file.grid()
+        assert grid == generated.grid
+        assert sorted(grid.layer_cells("spawn")) == sorted(map_file.spawns)
+        assert sorted(grid.layer_cells("delivery")) == sorted(
+            (r, c) for r0, c0, r1, c1 in map_file.delivery_zones for r in range(r0, r1 + 1) for c in range(c0, c1 + 1))
+        # The grid is a copy: editing it leaves the file alone
+        grid.set((0, 0), OBSTACLE if grid.get((0, 0)) != OBSTACLE else SAFETY_ZONE)
+        assert map_file.verify()
+
+
+def test_hash_covers_the_map_but_not_metadata(tmp_path, generated):
+    grid, safety, delivery, spawns = generated
+    digest = content_hash(grid, safety, delivery, spawns)
+    assert save_map(str(tmp_path / "a.map"), grid, safety, delivery, spawns, metadata={"name": "a"}) == digest
+    assert save_map(str(tmp_path / "b.map"), grid, safety, delivery, spawns, metadata={"name": "b"}) == digest
+    assert content_hash(grid, safety, delivery, spawns[:-1]) != digest
+    assert content_hash(grid, safety[:1], delivery, spawns) != digest
+    edited = grid.copy()
+    edited.set((0, 0), OBSTACLE if grid.get((0, 0)) != OBSTACLE else 0)
+    assert content_hash(edited, safety, delivery, spawns) != digest
+
+
+def test_corrupted_payload_fails_verification(tmp_path, generated):
+    path = tmp_path / "floor.map"
+    save_map(str(path), generated.grid)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 1
+    path.write_bytes(bytes(data))
+    with MapFile(str(path)) as map_file:
+        assert not map_file.verify()
+
+
+def test_bad_files_raise(tmp_path, generated):
+    path = tmp_path / "floor.map"
+    save_map(str(path), generated.grid)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        MapFile(str(path))
+    (tmp_path / "other.bin").write_bytes(b"NOPE\x00\x00\x00\x00")
+    with pytest.raises(ValueError):
+        MapFile(str(tmp_path / "other.bin"))
+
+
+def test_generate_command_writes_a_seeded_map(tmp_path, capsys):
+    path = str(tmp_path / "cli.map")
+    main(["generate", path, "--rows", "16", "--cols", "20", "--seed", "5", "--delivery-zones", "2"])
+    digest = capsys.readouterr().out.strip()
+    expected = generate_map(16, 20, density=0.2, seed=5, delivery_zones=2)
+    with MapFile(path) as map_file:
+        assert map_file.hash == digest
+        assert map_file.grid() == expected.grid
@@ -0,0 +1,68 @@
+"""Connectivity, placement and determinism of Map_Generator's seeded maps."""
+
+import random
+
+import pytest
+
+from Connectivity import is_connected
+from Grid import FREE, OBSTACLE, SAFETY_ZONE
+from Map_Generator import generate_map
+
+
+def gap(a, b):
+    """Cells strictly between two inclusive rectangles (negative if they overlap)."""
+    rows = max(b[0] - a[2], a[0] - b[2]) - 1
+    cols = max(b[1] - a[3], a[1] - b[3]) - 1
+    return max(rows, cols)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_maps_are_connected_and_placements_keep_clear(seed):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(8, 60), rng.randint(8, 60)
+    density = rng.choice([0.0, 0.1, 0.2, 0.35, 0.6])
+    keep_free = [(rng.randrange(rows), rng.randrange(cols)) for _ in range(rng.randint(0, 3))]
+    clearance = rng.choice([1, 2])
+    generated = generate_map(rows, cols, density=density, seed=seed, safety_zones=rng.randint(0, 2),
+                             delivery_zones=rng.randint(0, 2), spawns=rng.randint(0, 5), clearance=clearance,
+                             keep_free=keep_free)
+    grid = generated.grid
+
+    assert is_connected(grid, (FREE,))
+    assert is_connected(grid, (FREE, SAFETY_ZONE))
+    # Opening obstacles stops at the requested density; the maze may already be below it
+    assert grid.count(OBSTACLE) <= int(round(density * rows * cols))
+    for cell in keep_free:
+        assert grid.get(cell) == FREE
+
+    zones = generated.safety_zones + generated.delivery_zones
+    placed = zones + [(r, c, r, c) for r, c in generated.spawns]
+    for i, a in enumerate(placed):
+        for b in placed[i + 1:]:
+            assert gap(a, b) >= clearance
+        for r, c in keep_free:
+            assert gap(a, (r, c, r, c)) >= clearance
+    for r0, c0, r1, c1 in generated.safety_zones:
+        assert all(grid.get((r, c)) == SAFETY_ZONE for r in range(r0, r1 + 1) for c in range(c0, c1 + 1))
+    for r0, c0, r1, c1 in generated.delivery_zones:
+        assert all(grid.get((r, c)) == FREE for r in range(r0, r1 + 1) for c in range(c0, c1 + 1))
+    assert sorted(grid.layer_cells("spawn")) == sorted(generated.spawns)
+    assert all(grid.get(cell) == FREE for cell in generated.spawns)
+
+
+def test_same_seed_same_map():
+    first = generate_map(30, 40, density=0.25, seed=9, safety_zones=2, delivery_zones=2, spawns=6)
+    second = generate_map(30, 40, density=0.25, seed=9, safety_zones=2, delivery_zones=2, spawns=6)
+    assert first.grid == second.grid
+    assert (first.safety_zones, first.delivery_zones, first.spawns) == \
+        (second.safety_zones, second.delivery_zones, second.spawns)
+    assert generate_map(30, 40, density=0.25, seed=10).grid != first.grid
+
+
+def test_bad_arguments_raise():
+    with pytest.raises(ValueError):
+        generate_map(0, 5)
+    with pytest.raises(ValueError):
+        generate_map(5, 5, density=1.0)
+    with pytest.raises(ValueError):
+        generate_map(5, 5, seed=0, delivery_zones=10)
@@ -0,0 +1,120 @@
+"""Legality invariants of the batched movement kernel (Movement_Kernel.propose_moves) on random boards."""
+
+import random
+
+import numpy as np
+import pytest
+
+import Movement_Kernel
+from Movement_Kernel import RobberUpdate, agent_halo, apply_updates, dilate, propose_moves
+
+STEPS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+
+class Agent:
+    def __init__(self, pos):
+        self.pos = pos
+        self.last_safety_zone = -1
+        self.safety_zone_steps = 0
+
+
+def random_board(rng, size=12, n_cops=3, n_robbers=3, wall=False):
+    """Free mask, zone lookup tables and agents; wall splits the board into two components."""
+    free = np.array([[rng.random() > 0.25 for _ in range(size)] for _ in range(size)])
+    if wall:
+        free[:, size // 2] = False
+    zone_index = np.full((size, size), -1, dtype=np.int32)
+    for i in range(2):
+        r, c = rng.randrange(size - 1), rng.randrange(size - 1)
+        zone_index[r:r + 2, c:c + 2] = i
+        free[r:r + 2, c:c + 2] = True
+    if wall:
+        free[:, size // 2] = False
+        zone_index[:, size // 2] = -1
+    cop_forbidden = dilate(zone_index != -1)
+    cells = [tuple(cell) for cell in np.argwhere(free).tolist()]
+    rng.shuffle(cells)
+    cop_cells = [cell for cell in cells if not cop_forbidden[cell]][:n_cops]
+    if wall:
+        # Robbers on the other side of the wall from every cop
+        cop_cells = [cell for cell in cop_cells if cell[1] < size // 2]
+        robber_cells = [cell for cell in cells if cell[1] > size // 2][:n_robbers]
+    else:
+        robber_cells = [cell for cell in cells if cell not in cop_cells][:n_robbers]
+    return free, zone_index, cop_forbidden, [Agent(c) for c in cop_cells], [Agent(c) for c in robber_cells]
+
+
+def legal_targets(pos, free, blocked):
+    rows, cols = free.shape
+    return [(pos[0] + dr, pos[1] + dc) for dr, dc in STEPS
+            if 0 <= pos[0] + dr < rows and 0 <= pos[1] + dc < cols
+            and free[pos[0] + dr, pos[1] + dc] and not blocked[pos[0] + dr, pos[1] + dc]]
+
+
+def check_proposals(free, zone_index, cop_forbidden, cops, robbers, cop_strategy, robber_strategy):
+    proposals, updates = propose_moves(free, zone_index, cop_forbidden, cops, robbers, 5,
+                                       cop_strategy, robber_strategy)
+    assert len(proposals) == len(updates) == len(cops) + len(robbers)
+    occupied = np.zeros(free.shape, dtype=bool)
+    for agent in cops + robbers:
+        occupied[agent.pos] = True
+
+    cop_moves = proposals[:len(cops)]
+    for cop, move in zip(cops, cop_moves):
+        legal = legal_targets(cop.pos, free, cop_forbidden | occupied)
+        if move is None:
+            assert not legal
+        else:
+            assert move in legal
+
+    targets = np.array([move for move in cop_moves if move is not None], dtype=np.int64).reshape(-1, 2)
+    cop_pos = np.array([cop.pos for cop in cops], dtype=np.int64).reshape(-1, 2)
+    halo = agent_halo(np.concatenate([cop_pos, targets]), free.shape)
+    for robber, move in zip(robbers, proposals[len(cops):]):
+        legal = legal_targets(robber.pos, free, halo | occupied)
+        if move is None:
+            assert not legal
+        else:
+            assert move in legal
+    assert updates[:len(cops)] == [None] * len(cops)
+
+
+@pytest.mark.parametrize("cop_strategy", sorted(Movement_Kernel.COP_STRATEGIES))
+@pytest.mark.parametrize("robber_strategy", sorted(Movement_Kernel.ROBBER_STRATEGIES))
+@pytest.mark.parametrize("seed", range(40))
+def test_proposals_are_legal(seed, cop_strategy, robber_strategy):
+    rng = random.Random(seed)
+    random.seed(seed)
+    check_proposals(*random_board(rng), cop_strategy, robber_strategy)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_chase_without_robbers_stays_legal(seed):
+    rng = random.Random(seed)
+    check_proposals(*random_board(rng, n_robbers=0), "chase", "escape")
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_chase_with_unreachable_robbers_stays_legal(seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    check_proposals(*random_board(rng, wall=True), "chase", "escape")
+
+
+def test_chase_steps_towards_the_robber():
+    free = np.ones((1, 7), dtype=bool)
+    zone_index = np.full((1, 7), -1, dtype=np.int32)
+    cop_forbidden = np.zeros((1, 7), dtype=bool)
+    cops, robbers = [Agent((0, 3))], [Agent((0, 0))]
+    proposals, _ = propose_moves(free, zone_index, cop_forbidden, cops, robbers, 5)
+    assert proposals[0] == (0, 2)
+
+
+def test_updates_apply_only_to_accepted_moves():
+    robbers = [Agent((0, 0)), Agent((0, 2))]
+    proposals = [(0, 1), (0, 1)]
+    updates = [RobberUpdate(1, 1), RobberUpdate(0, 3)]
+    # The second robber lost the vertex conflict and stays put
+    apply_updates(robbers, proposals, updates, [(0, 1), (0, 2)])
+    assert (robbers[0].pos, robbers[0].last_safety_zone, robbers[0].safety_zone_steps) == ((0, 1), 1, 1)
+    assert (robbers[1].pos, robbers[1].last_safety_zone, robbers[1].safety_zone_steps) == ((0, 2), -1, 0)
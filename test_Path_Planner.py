@@ -0,0 +1,107 @@
+"""A* and JPS (Path_Planner) against BFS distances on random grids, including after cell edits."""
+
+import heapq
+import random
+
+import pytest
+
+from Distance_Fields import UNREACHABLE, distance_field
+from Grid import FREE, OBSTACLE, Grid
+from Path_Planner import GridPlanner, planner_for
+
+
+def random_grid(rng, rows, cols, density=0.3):
+    return Grid(rows, cols, bytearray(OBSTACLE if rng.random() < density else FREE for _ in range(rows * cols)))
+
+
+def bfs_distance(grid, start, goal):
+    return distance_field(grid.passable_mask(), grid.rows, grid.cols, [goal])[start[0] * grid.cols + start[1]]
+
+
+def check_path(grid, path, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for a, b in zip(path, path[1:]):
+        assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+    assert all(grid.get(cell) != OBSTACLE for cell in path[1:])
+
+
+def random_queries(rng, grid, n):
+    free = [(r, c) for r in range(grid.rows) for c in range(grid.cols) if grid.get((r, c)) == FREE]
+    return [(rng.choice(free), rng.choice(free)) for _ in range(n)] if free else []
+
+
+@pytest.mark.parametrize("method", ["astar", "jps"])
+@pytest.mark.parametrize("seed", range(60))
+def test_path_lengths_match_bfs(seed, method):
+    rng = random.Random(seed)
+    grid = random_grid(rng, rng.randint(1, 40), rng.randint(1, 40), rng.choice([0.0, 0.2, 0.35]))
+    planner = GridPlanner(grid)
+    for start, goal in random_queries(rng, grid, 10):
+        path = planner.find_path(start, goal, method)
+        distance = bfs_distance(grid, start, goal)
+        if distance == UNREACHABLE:
+            assert path == []
+        else:
+            check_path(grid, path, start, goal)
+            assert len(path) - 1 == distance
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_weighted_astar_matches_dijkstra(seed):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(2, 20), rng.randint(2, 20)
+    grid = random_grid(rng, rows, cols, 0.2)
+    weights = [[rng.choice([1, 1, 2, 5]) for _ in range(cols)] for _ in range(rows)]
+    planner = GridPlanner(grid, weights)
+    for start, goal in random_queries(rng, grid, 5):
+        # Dijkstra over the cost of entering each cell
+        best = {start: 0}
+        heap = [(0, start)]
+        while heap:
+            d, (r, c) = heapq.heappop(heap)
+            if d > best[(r, c)]:
+                continue
+            for n in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if grid.in_bounds(n) and grid.get(n) != OBSTACLE and d + weights[n[0]][n[1]] < best.get(n, float("inf")):
+                    best[n] = d + weights[n[0]][n[1]]
+                    heapq.heappush(heap, (best[n], n))
+        path = planner.find_path(start, goal, "astar")
+        if goal not in best:
+            assert path == []
+        else:
+            check_path(grid, path, start, goal)
+            assert sum(weights[r][c] for r, c in path[1:]) == best[goal]
+
+
+@pytest.mark.parametrize("method", ["astar", "jps"])
+@pytest.mark.parametrize("seed", range(20))
+def test_planners_follow_cell_edits(seed, method):
+    rng = random.Random(seed)
+    grid = random_grid(rng, 24, 24)
+    edited = GridPlanner(grid)
+    for _ in range(10):
+        for _ in range(15):
+            cell = (rng.randrange(24), rng.randrange(24))
+            value = rng.choice([FREE, OBSTACLE])
+            grid.set(cell, value)
+            edited.set_cell(cell, value)
+        cached = planner_for(grid)
+        for start, goal in random_queries(rng, grid, 5):
+            distance = bfs_distance(grid, start, goal)
+            for planner in (edited, cached):
+                path = planner.find_path(start, goal, method)
+                assert len(path) - 1 == (distance if distance != UNREACHABLE else -1)
+
+
+def test_planner_for_reuses_the_planner_of_a_grid():
+    grid = Grid(8, 8)
+    planner = planner_for(grid)
+    assert planner_for(grid) is planner
+    grid.set((0, 1), OBSTACLE)
+    assert planner_for(grid) is planner
+    assert planner_for(Grid(8, 8)) is not planner
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        GridPlanner(Grid(2, 2)).find_path((0, 0), (1, 1), "dfs")
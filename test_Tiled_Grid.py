@@ -0,0 +1,57 @@
+"""TiledGrid against an in-memory Grid: cell access, edits, LRU paging and windows."""
+
+import random
+
+import pytest
+
+from Grid import FREE, OBSTACLE, SAFETY_ZONE, Grid
+from Tiled_Grid import TiledGrid
+
+
+def random_grid(rng, rows, cols):
+    return Grid(rows, cols, bytearray(rng.choice([FREE, FREE, OBSTACLE, SAFETY_ZONE]) for _ in range(rows * cols)))
+
+
+@pytest.mark.parametrize("tile_size", [1, 3, 8, 64])
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_grid_under_edits(tmp_path, seed, tile_size):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 40), rng.randint(1, 40)
+    grid = random_grid(rng, rows, cols)
+    with TiledGrid.from_grid(grid, str(tmp_path / "map.tiles"), tile_size, max_tiles=2) as tiled:
+        assert (len(tiled), len(tiled[0])) == (rows, cols)
+        for _ in range(300):
+            cell = (rng.randrange(rows), rng.randrange(cols))
+            if rng.random() < 0.3:
+                value = rng.choice([FREE, OBSTACLE, SAFETY_ZONE])
+                grid.set(cell, value)
+                tiled[cell[0]][cell[1]] = value
+            assert tiled.get(cell) == grid.get(cell)
+            assert tiled.valid_moves(cell) == grid.valid_moves(cell)
+            assert tiled.is_valid_position(cell, (FREE, SAFETY_ZONE)) == grid.is_valid_position(cell, (FREE, SAFETY_ZONE))
+            assert tiled.resident_tiles <= 2
+        for value in (FREE, OBSTACLE, SAFETY_ZONE):
+            assert tiled.count(value) == grid.count(value)
+        top, left = rng.randrange(rows), rng.randrange(cols)
+        window = tiled.window(top, left, rng.randint(1, rows), rng.randint(1, cols))
+        assert window.to_rows() == [row[left:left + window.cols]
+                                    for row in grid.to_rows()[top:top + window.rows]]
+
+    # Edits reach the file and survive reopening it
+    with TiledGrid(str(tmp_path / "map.tiles"), rows, cols, tile_size, writable=False) as reopened:
+        assert reopened.window(0, 0, rows, cols) == grid
+
+
+def test_paste_and_bounds(tmp_path):
+    with TiledGrid.create(str(tmp_path / "map.tiles"), 5, 7, tile_size=2) as tiled:
+        tiled.paste(bytes([1, 2, 1, 2, 1, 2]), (3, 4), 3)
+        assert tiled.window(3, 4, 2, 3).to_rows() == [[1, 2, 1], [2, 1, 2]]
+        assert tiled.count(FREE) == 35 - 6
+        with pytest.raises(ValueError):
+            tiled.paste(bytes(4), (4, 6), 2)
+        with pytest.raises(IndexError):
+            tiled[5][0]
+        with pytest.raises(ValueError):
+            tiled.window(5, 0, 1, 1)
+    with pytest.raises(ValueError):
+        TiledGrid(str(tmp_path / "map.tiles"), 7, 7, tile_size=2)
@@ -0,0 +1,65 @@
+"""Round-trips through Trajectory_Recorder's binary trajectory files."""
+
+import random
+
+import pytest
+
+from Trajectory_Recorder import MAX_COORDINATE, TrajectoryReader, TrajectoryWriter
+
+
+def test_round_trip(tmp_path):
+    rng = random.Random(0)
+    path = str(tmp_path / "run.trj")
+    kinds = ["cop", "cop", "robber"]
+    frames = [(tick, [(rng.randrange(MAX_COORDINATE + 1), rng.randrange(MAX_COORDINATE + 1)) for _ in kinds],
+               [rng.randrange(3) for _ in kinds]) for tick in range(500)]
+    with TrajectoryWriter(path, kinds, ["idle", "moving", "carrying"], metadata={"maze": [[0, 1], [1, 0]]}) as writer:
+        for tick, positions, states in frames:
+            writer.record(tick, positions, states)
+
+    with TrajectoryReader(path) as reader:
+        assert reader.agent_kinds == kinds
+        assert reader.state_names == ["idle", "moving", "carrying"]
+        assert reader.header["maze"] == [[0, 1], [1, 0]]
+        assert len(reader) == len(frames)
+        for i, (tick, positions, states) in enumerate(frames):
+            assert tuple(reader[i]) == (tick, positions, states)
+        assert tuple(reader[-1]) == tuple(frames[-1])
+        with pytest.raises(IndexError):
+            reader[len(frames)]
+        records = reader.frames_array()
+        assert records["tick"].tolist() == [tick for tick, _, _ in frames]
+        assert [list(zip(r, c)) for r, c in zip(records["row"].tolist(), records["col"].tolist())] == \
+            [positions for _, positions, _ in frames]
+        assert records["state"].tolist() == [states for _, _, states in frames]
+        del records
+
+
+def test_states_default_to_zero(tmp_path):
+    path = str(tmp_path / "run.trj")
+    with TrajectoryWriter(path, ["robot"]) as writer:
+        writer.record(7, [(1, 2)])
+    with TrajectoryReader(path) as reader:
+        assert tuple(reader[0]) == (7, [(1, 2)], [0])
+
+
+def test_trailing_partial_record_is_ignored(tmp_path):
+    path = str(tmp_path / "run.trj")
+    with TrajectoryWriter(path, ["robot", "robot"]) as writer:
+        writer.record(0, [(0, 0), (1, 1)])
+        writer.record(1, [(0, 1), (1, 2)])
+    with open(path, "ab") as f:
+        f.write(b"\x02\x00")
+    with TrajectoryReader(path) as reader:
+        assert len(reader) == 2
+
+
+def test_invalid_records_raise(tmp_path):
+    with TrajectoryWriter(str(tmp_path / "run.trj"), ["robot"]) as writer:
+        with pytest.raises(ValueError):
+            writer.record(0, [(0, 0), (1, 1)])
+        with pytest.raises(ValueError):
+            writer.record(0, [(0, MAX_COORDINATE + 1)])
+    (tmp_path / "other.bin").write_bytes(b"NOPE\x00\x00\x00\x00")
+    with pytest.raises(ValueError):
+        TrajectoryReader(str(tmp_path / "other.bin"))